@@ -0,0 +1,112 @@
+"""Compare reading agent .env files with python-dotenv and with src.envfile.
+
+Usage: python -m benchmarks.bench_envfile [--keys 10 1000 10000] [--repeat 5]
+
+For each size a .env file with that many variables is generated, a tenth of
+them multi-line quoted values (certificates, prompts) and the ALIAS near the
+top, and these readers are timed:
+
+- dotenv_values: python-dotenv, every variable interpolated
+- read_env: src.envfile's full read, same result as dotenv_values
+- dotenv_header: the previous discovery reader, python-dotenv's tokenizer
+  keeping only ALIAS and PREWARM
+- read_env_header: src.envfile's header mode, as discovery reads agents
+- read_env_cached: the compiled environment cache, warm, as launches read
+  agents (see src.envcache)
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+
+from dotenv import dotenv_values
+from dotenv.parser import parse_stream
+
+from src.config import SELECTOR_KEYS
+from src.envcache import read_env_cached
+from src.envfile import read_env, read_env_header
+
+# Lines of each multi-line value
+MULTILINE_LINES = 20
+
+
+def make_env_file(path: Path, keys: int) -> Path:
+    """Write a .env file with keys variables and the ALIAS on the third line."""
+    lines = ["# Agent configuration", "export HOME_DIR=/opt/agent"]
+    lines.append('ALIAS="${HOME_DIR}/bin/agent --model large"')
+    for i in range(keys):
+        if i % 10 == 0:
+            text = f"line of value {i} " + "x" * 48
+            body = "\n".join([text] * MULTILINE_LINES)
+            lines.append(f'MULTI_{i}="{body}"')
+        else:
+            lines.append(f"VAR_{i}=value-{i}-" + "y" * 32 + f"  # comment {i}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def dotenv_header(env_file: Path) -> dict[str, str | None]:
+    """Read ALIAS and PREWARM as discovery did with python-dotenv."""
+    with open(env_file, encoding="utf-8") as f:
+        values = {
+            binding.key: binding.value
+            for binding in parse_stream(f)
+            if binding.key in SELECTOR_KEYS
+        }
+    if any(value and "$" in value for value in values.values()):
+        parsed = dotenv_values(env_file)
+        values = {key: parsed.get(key) for key in values}
+    return values
+
+
+def median_ms(run: Callable[[], object], repeat: int) -> float:
+    """Return the median milliseconds of repeat calls of run."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    readers: dict[str, Callable[[Path], object]] = {
+        "dotenv_values": dotenv_values,
+        "read_env": read_env,
+        "dotenv_header": dotenv_header,
+        "read_env_header": lambda path: read_env_header(path, SELECTOR_KEYS),
+        "read_env_cached": read_env_cached,
+    }
+    print(f"{'keys':>6} {'size':>10} " + " ".join(f"{n:>16}" for n in readers))
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["XDG_CACHE_HOME"] = str(Path(tmp) / "cache")
+        for keys in args.keys:
+            env_file = make_env_file(Path(tmp) / f"{keys}.env", keys)
+            assert read_env(env_file) == dotenv_values(env_file)
+            # Out of the racy window, so the cache trusts the file's mtime
+            past = time.time() - 60
+            os.utime(env_file, (past, past))
+            read_env_cached(env_file)
+            timings = [
+                median_ms(partial(read, env_file), args.repeat)
+                for read in readers.values()
+            ]
+            print(
+                f"{keys:>6} {env_file.stat().st_size // 1024:>8}KB "
+                + " ".join(f"{t:>14.2f}ms" for t in timings)
+            )
+
+
+if __name__ == "__main__":
+    main()
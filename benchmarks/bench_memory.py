@@ -0,0 +1,108 @@
+"""Measure the memory held by large agent registries with tracemalloc.
+
+Usage: python -m benchmarks.bench_memory [--count 10000]
+
+Compares, for the same synthetic agents, a plain (dict-backed) dataclass
+holding a parsed env_vars dict, as Agent used to be, with the slotted Agent
+and its lazy env_vars, and with an AgentTable. Only the memory still
+allocated once the registry is built is counted.
+"""
+
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from src.config import Agent, LazyEnvVars
+from src.table import AgentTable
+
+
+@dataclass
+class PlainAgent:
+    """The former Agent representation, for comparison."""
+
+    name: str
+    command: str
+    env_vars: dict[str, str] = field(default_factory=dict)
+    env_file: Path = field(default_factory=Path)
+    directory: Path | None = None
+
+
+def plain_agents(count: int, env_keys: int) -> list[PlainAgent]:
+    """Build count agents the way discovery used to."""
+    return [
+        PlainAgent(
+            name=f"agent-{i:05d}",
+            command=f"npx @scope/agent-{i % 10}",
+            env_vars={f"VAR_{k}": f"value-{k}" for k in range(env_keys)},
+            env_file=Path(f"/home/user/ia/agent-{i:05d}/.env"),
+            directory=Path(f"/home/user/ia/agent-{i:05d}"),
+        )
+        for i in range(count)
+    ]
+
+
+def agents(count: int) -> list[Agent]:
+    """Build count agents the way discovery does now."""
+    result = []
+    for i in range(count):
+        directory = Path(f"/home/user/ia/agent-{i:05d}")
+        env_file = directory / ".env"
+        result.append(
+            Agent(
+                name=f"agent-{i:05d}",
+                command=f"npx @scope/agent-{i % 10}",
+                env_vars=LazyEnvVars(env_file),
+                env_file=env_file,
+                directory=directory,
+            )
+        )
+    return result
+
+
+def table(count: int) -> AgentTable:
+    """Build an AgentTable of count agents, without keeping the Agent objects."""
+    return AgentTable(agents(count))
+
+
+def retained(build: Callable[[], object]) -> int:
+    """Return the bytes still allocated after build() returns its result."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> None:
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--env-keys", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {
+        "plain dataclass": retained(lambda: plain_agents(args.count, args.env_keys)),
+        "slotted Agent": retained(lambda: agents(args.count)),
+        "AgentTable": retained(lambda: table(args.count)),
+    }
+
+    baseline = results["plain dataclass"]
+    print(f"{args.count} agents")
+    print(f"{'representation':<16} {'total':>10} {'per agent':>10} {'ratio':>6}")
+    for label, size in results.items():
+        print(
+            f"{label:<16} {size / 1024 / 1024:>8.2f}MB {size / args.count:>9.0f}B "
+            f"{size / baseline:>6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Compare launch-to-first-output of an npx agent with and without PREWARM.
+
+Usage: python -m benchmarks.bench_prewarm [--repeat 10]
+
+A fake agent package, whose binary prints a line and exits, is installed in
+the node_modules of a temporary agent directory. Without PREWARM the ALIAS
+runs through a shell and npx, as execute_agent() does; with PREWARM the
+cached resolution is looked up and the package binary is executed directly.
+Requires node and npx on PATH; nothing is downloaded.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from src.config import Agent
+from src.prewarm import resolve_command
+
+PACKAGE = "fake-agent"
+
+
+def make_npm_agent(agent_dir: Path) -> Agent:
+    """Install the fake agent package in agent_dir/node_modules."""
+    package_dir = agent_dir / "node_modules" / PACKAGE
+    package_dir.mkdir(parents=True)
+    (package_dir / "package.json").write_text(
+        json.dumps({"name": PACKAGE, "version": "1.0.0", "bin": {PACKAGE: "cli.js"}})
+    )
+    script = package_dir / "cli.js"
+    script.write_text('#!/usr/bin/env node\nconsole.log("ready");\n')
+    script.chmod(0o755)
+
+    bin_dir = agent_dir / "node_modules" / ".bin"
+    bin_dir.mkdir()
+    (bin_dir / PACKAGE).symlink_to(Path("..", PACKAGE, "cli.js"))
+    (agent_dir / "package.json").write_text(
+        json.dumps({"dependencies": {PACKAGE: "1.0.0"}})
+    )
+
+    return Agent(
+        name=agent_dir.name,
+        command=f"npx --no-install {PACKAGE}",
+        directory=agent_dir,
+        prewarm=True,
+    )
+
+
+def time_first_output(spawn: Callable[[], subprocess.Popen[bytes]]) -> float:
+    """Return the seconds from spawning the agent to its first output byte."""
+    start = time.perf_counter()
+    with spawn() as process:
+        assert process.stdout is not None
+        process.stdout.read(1)
+        elapsed = time.perf_counter() - start
+        process.stdout.read()
+    return elapsed
+
+
+def main() -> None:
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if not (shutil.which("node") and shutil.which("npx")):
+        raise SystemExit("node and npx are required for this benchmark")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["XDG_CACHE_HOME"] = str(Path(tmp) / "cache")
+        agent = make_npm_agent(Path(tmp) / "agent")
+        cwd = agent.full_path  # npx only finds packages installed in the cwd
+
+        def plain() -> subprocess.Popen[bytes]:
+            return subprocess.Popen(
+                agent.command, shell=True, cwd=cwd, stdout=subprocess.PIPE
+            )
+
+        def prewarmed() -> subprocess.Popen[bytes]:
+            argv = resolve_command(agent)
+            assert argv is not None, "the fake agent was not resolved"
+            return subprocess.Popen(argv, cwd=cwd, stdout=subprocess.PIPE)
+
+        resolve_command(agent)  # Fill the resolution cache
+        results = {}
+        for label, spawn in (("npx", plain), ("prewarm", prewarmed)):
+            time_first_output(spawn)  # Warm the page cache
+            results[label] = [time_first_output(spawn) for _ in range(args.repeat)]
+
+    print(f"{'mode':>8} {'median':>10} {'min':>10}")
+    for label, samples in results.items():
+        print(
+            f"{label:>8} {statistics.median(samples) * 1000:>8.1f}ms "
+            f"{min(samples) * 1000:>8.1f}ms"
+        )
+    speedup = statistics.median(results["npx"]) / statistics.median(results["prewarm"])
+    print(f"speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Time every startup stage of the selector on synthetic agent trees.
+
+Usage: python -m benchmarks.suite [--sizes 10 1000 10000] [--repeat 5]
+                                  [--output results.json] [--compare old.json]
+
+For each size a tree of agents with .env files of varied size, some broken
+(see benchmarks.synthetic.make_varied_tree), is generated and these stages
+are timed:
+
+- discovery_cold: discover_agents() parsing every .env (no index)
+- discovery_index_build: discover_agents() writing a new index
+- discovery_indexed: discover_agents() with a fresh index
+- menu_build: sort_agents() and the picker's search index
+- picker_typing: the picker's matches updated key by key for a query
+- log_execution: one launch record logged, as the launch waits for it (the
+  record is written in the background)
+- time_to_menu: main() until the menu would be shown, logo included, as in
+  a new process in a terminal
+- main: main() end to end with the menu answered at once, the agent being
+  ``echo``
+
+Results are printed and, with --output, written to JSON. With --compare,
+stages slower than a previous JSON by more than --threshold are reported
+and the exit code is 1, so runs of two versions can be compared.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from benchmarks.synthetic import age_tree, make_varied_tree
+from src import selector
+from src.cache import index_path
+from src.config import Agent, discover_agents, reset_settings
+from src.executor import log_execution
+from src.history import flush_records
+from src.main import main as selector_main
+from src.picker import PickerState
+from src.selector import sort_agents
+
+RESULTS_VERSION = 1
+
+# Query typed in the picker_typing stage, one key at a time
+QUERY = "agent-0042"
+
+
+@contextlib.contextmanager
+def environment(root: Path, **variables: str) -> Iterator[None]:
+    """Point the selector at root, with its caches and data under root too."""
+    saved = dict(os.environ)
+    os.environ.update(
+        {
+            "AI_AGENTS_DIR": str(root / "agents"),
+            "XDG_CACHE_HOME": str(root / "cache"),
+            "XDG_DATA_HOME": str(root / "data"),
+            "XDG_RUNTIME_DIR": str(root / "runtime"),
+            "AI_SELECTOR_DAEMON": "0",
+            "AI_SELECTOR_CLEAR": "0",
+            **variables,
+        }
+    )
+    reset_settings()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+        reset_settings()
+
+
+def measure(
+    run: Callable[[], object],
+    repeat: int,
+    setup: Callable[[], object] | None = None,
+) -> dict[str, float]:
+    """Time repeat calls of run, calling setup (untimed) before each one.
+
+    Returns
+    -------
+        Median and minimum in milliseconds, and the number of samples
+
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "samples": repeat,
+    }
+
+
+def bench_size(tmp: Path, size: int, repeat: int) -> dict[str, dict[str, float]]:
+    """Run every stage on a new tree of size agents."""
+    agents_dir = make_varied_tree(tmp / "agents", size)
+    age_tree(agents_dir)
+    results = {}
+
+    with environment(tmp, AI_SELECTOR_CACHE="0"):
+        results["discovery_cold"] = measure(discover_agents, repeat)
+
+    with environment(tmp):
+        index = index_path(agents_dir)
+        results["discovery_index_build"] = measure(
+            discover_agents, repeat, setup=lambda: index.unlink(missing_ok=True)
+        )
+        discover_agents()
+        results["discovery_indexed"] = measure(discover_agents, repeat)
+        agents = discover_agents()
+
+        results["menu_build"] = measure(
+            lambda: PickerState(sort_agents(agents)), repeat
+        )
+        state = PickerState(sort_agents(agents))
+
+        def type_query() -> None:
+            for end in range(len(QUERY) + 1):
+                state.set_query(QUERY[:end])
+
+        results["picker_typing"] = measure(type_query, repeat)
+
+        agent = agents[0]
+        results["log_execution"] = measure(
+            lambda: log_execution(agent, str(tmp)), repeat
+        )
+        flush_records()
+
+        def reset_logo() -> None:
+            selector.load_logo.cache_clear()
+            selector._logo_shown = False
+
+        with (
+            patch("src.selector.is_tty", lambda stream=None: True),
+            patch("src.main.select_agent", lambda choices: None),
+        ):
+            results["time_to_menu"] = measure(
+                lambda: selector_main([]), repeat, setup=reset_logo
+            )
+
+        def pick_first(choices: list[Agent]) -> Agent:
+            return sort_agents(choices)[0]
+
+        with patch("src.main.select_agent", pick_first):
+            results["main"] = measure(lambda: selector_main([]), repeat)
+
+    return results
+
+
+def git_revision() -> str | None:
+    """Get the commit being benchmarked, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """Find the stages slower than in baseline by more than threshold times.
+
+    Returns
+    -------
+        A line per regression, for the sizes and stages found in both
+
+    """
+    regressions = []
+    for size, stages in results["sizes"].items():
+        for stage, timing in stages.items():
+            try:
+                before = baseline["sizes"][size][stage]["median_ms"]
+            except (KeyError, TypeError):
+                continue
+            if before > 0 and timing["median_ms"] / before > threshold:
+                regressions.append(
+                    f"{size:>6} {stage:<22} {before:>10.2f}ms -> "
+                    f"{timing['median_ms']:>10.2f}ms "
+                    f"({timing['median_ms'] / before:.2f}x)"
+                )
+    return regressions
+
+
+def main() -> int:
+    """Run the suite and print, save and compare the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write the results to JSON")
+    parser.add_argument("--compare", type=Path, help="results JSON to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="slowdown reported as a regression (default: 1.25x)",
+    )
+    args = parser.parse_args()
+
+    results: dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    print(f"{'agents':>6} {'stage':<22} {'median':>12} {'min':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            stages = bench_size(Path(tmp), size, args.repeat)
+        results["sizes"][str(size)] = stages
+        for stage, timing in stages.items():
+            print(
+                f"{size:>6} {stage:<22} {timing['median_ms']:>10.2f}ms "
+                f"{timing['min_ms']:>10.2f}ms"
+            )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\nCompared with {args.compare} ({baseline.get('revision')}):")
+        for line in regressions:
+            print(line)
+        if regressions:
+            return 1
+        print(f"no stage is more than {args.threshold:.2f}x slower")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
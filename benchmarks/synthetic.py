@@ -0,0 +1,90 @@
+"""Synthetic agent trees for benchmarks."""
+
+import os
+import time
+from pathlib import Path
+
+# Contents of the broken agents of make_varied_tree, cycled through
+BROKEN_ENV_FILES = (
+    b"",  # Empty
+    b"VAR_0=no alias here\n",  # Missing ALIAS
+    b"ALIAS=\n",  # Empty ALIAS
+    b"this is not a dotenv line\nALIAS='unterminated\n",  # Garbage
+    b"ALIAS=echo \xff\xfe\n",  # Not UTF-8
+)
+
+
+def make_agent_tree(root: Path, count: int, env_keys: int = 5) -> Path:
+    """Create count agent directories with a .env file each under root.
+
+    Args:
+    ----
+        root: Directory to create the agents in (created if needed)
+        count: Number of agent directories
+        env_keys: Number of extra variables written to every .env file
+
+    Returns:
+    -------
+        The agents directory
+
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    extra = "".join(f"VAR_{i}=value-{i}\n" for i in range(env_keys))
+
+    for i in range(count):
+        agent_dir = root / f"agent-{i:05d}"
+        agent_dir.mkdir(exist_ok=True)
+        (agent_dir / ".env").write_text(f"ALIAS=echo agent {i}\n{extra}")
+
+    return root
+
+
+def make_varied_tree(root: Path, count: int, broken_every: int = 50) -> Path:
+    """Create count agents with .env files of varied size, some of them broken.
+
+    Every .env sets ALIAS and 0 to 49 extra variables, some quoted, commented
+    or interpolated. One agent in broken_every gets a broken .env (see
+    BROKEN_ENV_FILES) and another one has no .env at all.
+
+    Returns
+    -------
+        The agents directory
+
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    broken = 0
+    for i in range(count):
+        agent_dir = root / f"agent-{i:05d}"
+        agent_dir.mkdir(exist_ok=True)
+        env_file = agent_dir / ".env"
+        if broken_every and i % broken_every == broken_every - 1:
+            env_file.write_bytes(BROKEN_ENV_FILES[broken % len(BROKEN_ENV_FILES)])
+            broken += 1
+            continue
+        if broken_every and i % broken_every == broken_every // 2:
+            continue  # A directory that is not an agent
+
+        lines = [f"# Agent {i}", f"ALIAS=echo agent {i}"]
+        for k in range(i % 50):
+            if k % 7 == 0:
+                lines.append(f'VAR_{k}="quoted value {k}"  # comment')
+            elif k % 11 == 0:
+                lines.append(f"VAR_{k}=${{VAR_0}}-{k}")
+            else:
+                lines.append(f"VAR_{k}=value-{k}")
+        env_file.write_text("\n".join(lines) + "\n")
+
+    return root
+
+
+def age_tree(root: Path, seconds: float = 3600) -> None:
+    """Move the modification times of root and everything in it to the past.
+
+    Files modified just before the discovery index is written are never
+    trusted (see src.cache), so trees are aged before timing indexed runs.
+    """
+    old = time.time() - seconds
+    for directory, _, files in os.walk(root):
+        for name in files:
+            os.utime(os.path.join(directory, name), (old, old))
+        os.utime(directory, (old, old))
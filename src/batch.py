@@ -0,0 +1,257 @@
+"""Batch mode: run one non-interactive agent over many directories.
+
+``ai-selector run-many <agent> <dirs...>`` launches the agent once per
+directory, with that directory as the working directory, running at most
+``--jobs`` processes at a time on an asyncio event loop. Each job's stdout
+and stderr go to files in the run's output directory and its launch and exit
+are written to the agent's execution log, as for interactive launches. With
+``--fail-fast`` the first failure stops the running jobs and skips the rest.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from .config import Agent, list_agent_names, load_agent
+from .executor import child_environment, command_argv, log_execution, log_exit
+from .prewarm import resolve_command
+from .search import match_names
+from .usage import get_data_dir, record_launch
+
+# Exit code reported for jobs stopped by --fail-fast
+CANCELLED = -signal.SIGTERM
+
+
+@dataclass
+class JobResult:
+    """Outcome of one job of a batch run.
+
+    exit_code is None for jobs that never started (skipped by --fail-fast).
+    """
+
+    directory: Path
+    exit_code: int | None
+    duration: float
+    stdout: Path
+    stderr: Path
+
+
+def default_output_dir(agent: Agent) -> Path:
+    """Get a new directory for the output files of a batch run of agent."""
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return get_data_dir() / "runs" / f"{agent.name.replace('/', '-')}-{stamp}"
+
+
+async def _run_job(
+    agent: Agent,
+    argv: list[str] | None,
+    directory: Path,
+    stdout: Path,
+    stderr: Path,
+    env: dict[str, str] | None,
+) -> int:
+    """Run the agent in directory and return its exit code.
+
+    The command runs through the shell when argv is None. The job is logged
+    as soon as the process has started, without startup timings: they would
+    count the jobs run before it as selector overhead. The process leads its
+    own process group, so cancelling the job terminates it along with its
+    children.
+    """
+    with open(stdout, "wb") as out, open(stderr, "wb") as err:
+        started = time.monotonic()
+        if argv is None:
+            process = await asyncio.create_subprocess_shell(
+                agent.command,
+                cwd=directory,
+                env=env,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=out,
+                stderr=err,
+                start_new_session=True,
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *argv,
+                cwd=directory,
+                env=env,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=out,
+                stderr=err,
+                start_new_session=True,
+            )
+        launch_id = log_execution(agent, str(directory), timed=False)
+
+        try:
+            exit_code = await process.wait()
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                with suppress(ProcessLookupError):
+                    os.killpg(process.pid, signal.SIGTERM)
+            await process.wait()
+            log_exit(agent, launch_id, CANCELLED, time.monotonic() - started)
+            raise
+
+    log_exit(agent, launch_id, exit_code, time.monotonic() - started)
+    return exit_code
+
+
+async def run_many(
+    agent: Agent,
+    directories: list[Path],
+    output_dir: Path,
+    jobs: int,
+    fail_fast: bool = False,
+) -> list[JobResult]:
+    """Run agent once in each directory, at most jobs at a time.
+
+    Args:
+    ----
+        agent: The agent to run; its command must not need a terminal
+        directories: Working directory of each job
+        output_dir: Directory for the ``<n>-<dir>.stdout/.stderr`` files
+        jobs: Maximum number of agent processes running at once
+        fail_fast: Stop every job as soon as one fails
+
+    Returns:
+    -------
+        The result of each job, in the order of directories
+
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    env = child_environment(agent)
+    argv: list[str] | None = resolve_command(agent) or command_argv(agent.command)
+    if argv is not None and argv[:2] == ["/bin/sh", "-c"]:
+        argv = None  # Shell syntax: let asyncio run it through the shell
+
+    limit = asyncio.Semaphore(max(jobs, 1))
+    failed = asyncio.Event()
+    results: list[JobResult] = []
+    for number, directory in enumerate(directories, 1):
+        stem = f"{number:03d}-{directory.name or 'root'}"
+        results.append(
+            JobResult(
+                directory=directory,
+                exit_code=None,
+                duration=0.0,
+                stdout=output_dir / f"{stem}.stdout",
+                stderr=output_dir / f"{stem}.stderr",
+            )
+        )
+
+    async def job(result: JobResult) -> None:
+        async with limit:
+            if failed.is_set():
+                return
+            started = time.monotonic()
+            try:
+                result.exit_code = await _run_job(
+                    agent, argv, result.directory, result.stdout, result.stderr, env
+                )
+            except asyncio.CancelledError:
+                result.exit_code = CANCELLED
+            except OSError as e:
+                result.stderr.write_text(f"Error executing agent: {e}\n")
+                result.exit_code = 127
+            finally:
+                result.duration = time.monotonic() - started
+            if result.exit_code != 0 and fail_fast:
+                failed.set()
+
+    tasks = [asyncio.create_task(job(result)) for result in results]
+    if fail_fast:
+
+        async def cancel_on_failure() -> None:
+            await failed.wait()
+            for task in tasks:
+                task.cancel()
+
+        watcher = asyncio.create_task(cancel_on_failure())
+        await asyncio.gather(*tasks, return_exceptions=True)
+        watcher.cancel()
+    else:
+        await asyncio.gather(*tasks)
+
+    return results
+
+
+def format_results(results: list[JobResult]) -> str:
+    """Format the results of a batch run as a summary table."""
+    width = max([len(str(r.directory)) for r in results] + [len("Directory")])
+    lines = [f"{'Directory':<{width}} {'Exit':>6} {'Time':>9}  Output"]
+    for result in results:
+        if result.exit_code is None:
+            status, took = "skip", "-"
+        else:
+            status, took = str(result.exit_code), f"{result.duration:.1f}s"
+        lines.append(
+            f"{str(result.directory):<{width}} {status:>6} {took:>9}  "
+            f"{result.stdout.with_suffix('.*')}"
+        )
+    ok = sum(1 for r in results if r.exit_code == 0)
+    lines.append(f"{ok}/{len(results)} succeeded")
+    return "\n".join(lines)
+
+
+def run_many_command(argv: list[str]) -> int:
+    """Run the ``ai-selector run-many`` subcommand."""
+    parser = argparse.ArgumentParser(
+        prog="ai-selector run-many",
+        description="Run a non-interactive agent in many directories concurrently.",
+    )
+    parser.add_argument("agent", help="agent name, prefix or abbreviation")
+    parser.add_argument("directories", nargs="+", type=Path, metavar="dir")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 4,
+        help="maximum number of agents running at once (default: CPU count)",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="stop every job as soon as one fails",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        help="directory for the output files (default: a new one under "
+        "$XDG_DATA_HOME/ai-selector/runs)",
+    )
+    args = parser.parse_args(argv)
+
+    matches = match_names(args.agent, list_agent_names())
+    if len(matches) != 1:
+        print(f"'{args.agent}' does not match a single agent.")
+        return 1
+    agent = load_agent(matches[0])
+    if agent is None:
+        return 1
+
+    directories = [d.expanduser().resolve() for d in args.directories]
+    missing = [str(d) for d in directories if not d.is_dir()]
+    if missing:
+        print(f"Not a directory: {', '.join(missing)}")
+        return 1
+
+    output_dir = args.output_dir or default_output_dir(agent)
+    print(f"Running {agent.name} in {len(directories)} directories ({output_dir})")
+    record_launch(agent.name)
+    try:
+        results = asyncio.run(
+            run_many(agent, directories, output_dir, args.jobs, args.fail_fast)
+        )
+    except KeyboardInterrupt:
+        print("\n\nInterrupted by user.")
+        return 130
+
+    print(format_results(results))
+    return 0 if all(r.exit_code == 0 for r in results) else 1
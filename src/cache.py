@@ -0,0 +1,170 @@
+"""On-disk discovery index for AI Agent Selector.
+
+The index remembers the result of scanning an agents directory together with
+the stat signature (mtime, size, inode) of the directory itself and of every
+agent .env file, so later runs can revalidate it with stats only and re-parse
+just the files that changed.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+INDEX_VERSION = 5
+
+# Files modified this close to the moment the index was written may change again
+# without their mtime moving (coarse timestamps on some filesystems), so they are
+# never trusted from the index.
+RACY_WINDOW_NS = 2_000_000_000
+
+Signature = tuple[int, int, int]  # (mtime_ns, size, inode)
+
+
+@dataclass
+class IndexEntry:
+    """Cached state of a single agent directory."""
+
+    env: Signature | None  # Signature of the .env file when it was parsed
+    record: dict[str, Any] | None  # Serialized agent, None if not a valid agent
+
+
+@dataclass
+class DiscoveryIndex:
+    """Cached result of scanning an agents directory."""
+
+    root: Signature | None = None  # Signature of the agents directory
+    entries: dict[str, IndexEntry] = field(default_factory=dict)
+    written_ns: int = 0  # When the index was last written to disk
+    # Signatures of the grouping directories walked below the root, by path
+    groups: dict[str, Signature | None] = field(default_factory=dict)
+    # Discovery settings the index was built with (depth, pruned names)
+    options: dict[str, Any] = field(default_factory=dict)
+
+    def is_fresh(self, cached: Signature | None, current: Signature | None) -> bool:
+        """Check whether a cached signature can be trusted for the current one."""
+        if cached is None or cached != current:
+            return False
+        return cached[0] < self.written_ns - RACY_WINDOW_NS
+
+    def is_tree_fresh(self, root: Signature | None) -> bool:
+        """Check whether the directory listings of the root and groups are fresh."""
+        return self.is_fresh(self.root, root) and all(
+            self.is_fresh(sig, stat_signature(Path(group)))
+            for group, sig in self.groups.items()
+        )
+
+
+def get_cache_dir() -> Path:
+    """Get the ai-selector cache directory, honouring XDG_CACHE_HOME."""
+    base = os.getenv("XDG_CACHE_HOME") or "~/.cache"
+    return Path(base).expanduser() / "ai-selector"
+
+
+def index_path(agents_dir: Path) -> Path:
+    """Get the path of the discovery index for an agents directory."""
+    digest = hashlib.sha1(str(agents_dir).encode("utf-8")).hexdigest()[:16]
+    return get_cache_dir() / f"discovery-{digest}.json"
+
+
+def stat_signature(path: Path) -> Signature | None:
+    """Return the stat signature of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _to_signature(value: Any) -> Signature | None:
+    if value is None:
+        return None
+    mtime_ns, size, inode = value
+    return (int(mtime_ns), int(size), int(inode))
+
+
+def load_index(agents_dir: Path) -> DiscoveryIndex:
+    """Load the discovery index for agents_dir.
+
+    A missing, outdated or corrupted index yields an empty one, which makes the
+    caller fall back to a full scan.
+
+    Args:
+    ----
+        agents_dir: The agents directory the index belongs to
+
+    Returns:
+    -------
+        The cached DiscoveryIndex, or an empty one
+
+    """
+    try:
+        data = json.loads(index_path(agents_dir).read_text(encoding="utf-8"))
+        if data["version"] != INDEX_VERSION or data["agents_dir"] != str(agents_dir):
+            return DiscoveryIndex()
+
+        entries: dict[str, IndexEntry] = {}
+        for name, entry in data["entries"].items():
+            record = entry["record"]
+            if record is not None and not isinstance(record, dict):
+                return DiscoveryIndex()
+            entries[name] = IndexEntry(env=_to_signature(entry["env"]), record=record)
+
+        return DiscoveryIndex(
+            root=_to_signature(data["root"]),
+            entries=entries,
+            written_ns=int(data["written_ns"]),
+            groups={
+                str(path): _to_signature(sig) for path, sig in data["groups"].items()
+            },
+            options=dict(data["options"]),
+        )
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return DiscoveryIndex()
+
+
+def save_index(agents_dir: Path, index: DiscoveryIndex) -> None:
+    """Atomically write the discovery index for agents_dir."""
+    index.written_ns = time.time_ns()
+    data = {
+        "version": INDEX_VERSION,
+        "agents_dir": str(agents_dir),
+        "written_ns": index.written_ns,
+        "root": index.root,
+        "groups": index.groups,
+        "options": index.options,
+        "entries": {
+            name: {"env": entry.env, "record": entry.record}
+            for name, entry in index.entries.items()
+        },
+    }
+
+    write_private_json(index_path(agents_dir), data)
+
+
+def write_private_json(path: Path, data: Any) -> None:
+    """Atomically write data as JSON to a file only readable by the user.
+
+    Cache files are best effort: any error while writing them is ignored.
+    """
+    write_private_bytes(path, json.dumps(data).encode("utf-8"))
+
+
+def write_private_bytes(path: Path, data: bytes) -> None:
+    """Atomically write data to a file only readable by the user.
+
+    Cache files are best effort: any error while writing them is ignored.
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Records hold agent environment variables, keep them private
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
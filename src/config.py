@@ -1,95 +1,685 @@
 """Configuration management for AI Agent Selector."""
 
 import os
+import sys
+from collections.abc import Callable, Iterator, Mapping
 from dataclasses import dataclass, field
+from functools import cache
 from pathlib import Path
-from typing import cast
+from typing import TYPE_CHECKING, Any
 
-from dotenv import dotenv_values, load_dotenv
+from . import envfile
+from .cache import (
+    DiscoveryIndex,
+    IndexEntry,
+    Signature,
+    load_index,
+    save_index,
+    stat_signature,
+)
+from .envcache import read_env_cached
 
+if TYPE_CHECKING:
+    from threading import Event
 
-@dataclass
+DEFAULT_WORKERS = 8
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+
+# Directories never searched for agents (dependencies, environments, VCS data)
+DEFAULT_PRUNE = frozenset({"node_modules", ".venv", ".git"})
+
+# Below this many directories a thread pool costs more than it saves
+PARALLEL_THRESHOLD = 32
+
+
+# Variables of an agent .env that configure the selector, not the agent
+SELECTOR_KEYS = frozenset({"ALIAS", "PREWARM"})
+
+
+def read_env_header(env_file: Path) -> dict[str, str | None]:
+    """Read only the selector variables (ALIAS, PREWARM) of an agent .env file.
+
+    The file is tokenized only until both were found and the other values
+    are neither interpolated nor kept, so discovery does not hold every
+    agent's variables in memory (see envfile.read_env_header).
+    """
+    return envfile.read_env_header(env_file, SELECTOR_KEYS)
+
+
+def load_env_vars(env_file: Path) -> dict[str, str]:
+    """Load the variables an agent .env file passes to the agent.
+
+    They come from the compiled environment cache unless AI_SELECTOR_CACHE=0
+    (see src.envcache).
+    """
+    try:
+        if get_settings().cache_enabled:
+            values: Mapping[str, str | None] = read_env_cached(env_file)
+        else:
+            values = envfile.read_env(env_file)
+    except FileNotFoundError:
+        return {}
+    return {
+        key: value
+        for key, value in values.items()
+        if key not in SELECTOR_KEYS and value is not None
+    }
+
+
+class LazyEnvVars(Mapping[str, str]):
+    """Environment variables of an agent, loaded from its .env on first use.
+
+    Only the agent being launched ever reads its whole .env file. The repr
+    never shows the values, which often are secrets.
+    """
+
+    __slots__ = ("_values", "env_file")
+
+    def __init__(self, env_file: Path) -> None:
+        """Refer to env_file without reading it."""
+        self.env_file = env_file
+        self._values: dict[str, str] | None = None
+
+    def _load(self) -> dict[str, str]:
+        if self._values is None:
+            try:
+                self._values = load_env_vars(self.env_file)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not load {self.env_file}: {e}")
+                self._values = {}
+        return self._values
+
+    def __getitem__(self, key: str) -> str:
+        """Get a variable, loading the .env file if needed."""
+        return self._load()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the variable names."""
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        """Count the variables."""
+        return len(self._load())
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the variables; unloaded ones by the file they come from."""
+        if (
+            isinstance(other, LazyEnvVars)
+            and self._values is None
+            and other._values is None
+        ):
+            return self.env_file == other.env_file
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        """Show the .env path only."""
+        return f"LazyEnvVars({str(self.env_file)!r})"
+
+
+@dataclass(frozen=True, slots=True)
 class Agent:
-    """Represents an AI agent configuration."""
+    """Represents an AI agent configuration.
+
+    Agents are immutable and hashable. env_vars is left out of comparisons
+    and hashing: for discovered agents it is derived from env_file. Names and
+    commands are interned, as large registries hold them in several places
+    (index, daemon, menu, search index).
+    """
 
     name: str  # Directory name (e.g., "claude-code")
     command: str  # Command from ALIAS variable
-    env_vars: dict[str, str] = field(default_factory=dict)  # Environment variables
+    # Environment variables, a LazyEnvVars for discovered agents
+    env_vars: Mapping[str, str] = field(default_factory=dict, compare=False)
     env_file: Path = field(default_factory=Path)  # Path to .env file
+    directory: Path | None = None  # Absolute agent directory, set at discovery
+    prewarm: bool = False  # PREWARM: launch the resolved npx/uvx binary directly
+
+    def __post_init__(self) -> None:
+        """Intern the name and the command."""
+        object.__setattr__(self, "name", sys.intern(self.name))
+        object.__setattr__(self, "command", sys.intern(self.command))
 
     @property
     def full_path(self) -> Path:
         """Get the full path to the agent directory."""
-        agents_dir = get_agents_directory()
-        return agents_dir / self.name
+        if self.directory is not None:
+            return self.directory
+        return get_agents_directory() / self.name
 
+    def to_record(self) -> dict[str, Any]:
+        """Serialize the agent into a JSON-compatible record.
 
-def get_agents_directory() -> Path:
-    """Get the agents directory from environment variable."""
+        The environment variables are not included: they are read again from
+        env_file when needed.
+        """
+        return {
+            "name": self.name,
+            "command": self.command,
+            "env_file": str(self.env_file),
+            "directory": str(self.full_path),
+            "prewarm": self.prewarm,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> "Agent":
+        """Build an agent from a record created by to_record()."""
+        env_file = Path(record["env_file"])
+        return cls(
+            name=record["name"],
+            command=record["command"],
+            env_vars=LazyEnvVars(env_file),
+            env_file=env_file,
+            directory=Path(record["directory"]),
+            prewarm=bool(record.get("prewarm", False)),
+        )
+
+
+def parse_flag(value: str | None, default: bool) -> bool:
+    """Parse a boolean flag (1/0, true/false, yes/no, on/off)."""
+    value = (value or "").strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    return default
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment."""
+    return parse_flag(os.getenv(name), default)
+
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    """Read an integer from the environment, falling back to default."""
+    try:
+        return max(minimum, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Selector settings, resolved once per process by get_settings()."""
+
+    # AI_AGENTS_DIR, a list of roots separated by ":" (os.pathsep), expanded
+    # and resolved; they may not exist. Earlier roots take precedence.
+    agents_dirs: tuple[Path, ...]
+    max_depth: int = 1  # AI_SELECTOR_MAX_DEPTH: 1 finds agents directly in a root
+    prune: frozenset[str] = DEFAULT_PRUNE  # AI_SELECTOR_PRUNE: comma-separated
+    cache_enabled: bool = True  # AI_SELECTOR_CACHE
+    workers: int = DEFAULT_WORKERS  # AI_SELECTOR_WORKERS
+    exec_mode: bool = False  # AI_SELECTOR_EXEC
+    clear_screen: bool = True  # AI_SELECTOR_CLEAR
+    log_max_bytes: int = DEFAULT_LOG_MAX_BYTES  # AI_SELECTOR_LOG_MAX_BYTES, 0: never
+    log_backups: int = 3  # AI_SELECTOR_LOG_BACKUPS
+    log_max_age_days: int = 0  # AI_SELECTOR_LOG_MAX_AGE_DAYS, 0: keep forever
+    log_async: bool = True  # AI_SELECTOR_LOG_ASYNC: write launch records in background
+    sort_order: str = "frecency"  # AI_SELECTOR_SORT: "frecency" or "alpha"
+    picker: str = "auto"  # AI_SELECTOR_PICKER: "auto", "menu" or "search"
+    use_daemon: bool = True  # AI_SELECTOR_DAEMON: ask a running daemon first
+    record: bool = False  # AI_SELECTOR_RECORD: record sessions under a pty
+    health_check: bool = False  # AI_SELECTOR_HEALTH: disable uninstalled agents
+    health_budget_ms: int = 150  # AI_SELECTOR_HEALTH_BUDGET_MS: menu delay limit
+    live_discovery: bool = True  # AI_SELECTOR_LIVE: show the menu while scanning
+    live_after_ms: int = 100  # AI_SELECTOR_LIVE_AFTER_MS: scan time before that
+
+    @property
+    def agents_dir(self) -> Path:
+        """Get the first (highest precedence) agents directory."""
+        return self.agents_dirs[0]
+
+
+def _parse_roots(value: str) -> tuple[Path, ...]:
+    """Split a list of directories, dropping empty items and duplicates."""
+    roots = [
+        Path(item).expanduser().resolve()
+        for item in value.split(os.pathsep)
+        if item.strip()
+    ]
+    return tuple(dict.fromkeys(roots)) or (Path("~/ia").expanduser().resolve(),)
+
+
+@cache
+def get_settings() -> Settings:
+    """Load the selector settings from the environment.
+
+    The ai-selector project .env is loaded first (without overriding variables
+    already set). The result is memoized; call reset_settings() to reload it.
+    """
     # Load .env from ai-selector project root (not current working directory)
     project_root = Path(__file__).parent.parent
-    env_file = project_root / ".env"
-    load_dotenv(env_file)
+    envfile.load_env(project_root / ".env")
+
+    prune = os.getenv("AI_SELECTOR_PRUNE")
+    return Settings(
+        agents_dirs=_parse_roots(os.getenv("AI_AGENTS_DIR", "~/ia")),
+        max_depth=_env_int("AI_SELECTOR_MAX_DEPTH", 1, minimum=1),
+        prune=(
+            DEFAULT_PRUNE
+            if prune is None
+            else frozenset(name.strip() for name in prune.split(",") if name.strip())
+        ),
+        cache_enabled=_env_flag("AI_SELECTOR_CACHE", True),
+        workers=_env_int("AI_SELECTOR_WORKERS", DEFAULT_WORKERS, minimum=1),
+        exec_mode=_env_flag("AI_SELECTOR_EXEC", False),
+        clear_screen=_env_flag("AI_SELECTOR_CLEAR", True),
+        log_max_bytes=_env_int("AI_SELECTOR_LOG_MAX_BYTES", DEFAULT_LOG_MAX_BYTES),
+        log_backups=_env_int("AI_SELECTOR_LOG_BACKUPS", 3),
+        log_max_age_days=_env_int("AI_SELECTOR_LOG_MAX_AGE_DAYS", 0),
+        log_async=_env_flag("AI_SELECTOR_LOG_ASYNC", True),
+        sort_order=os.getenv("AI_SELECTOR_SORT", "frecency").strip().lower(),
+        picker=os.getenv("AI_SELECTOR_PICKER", "auto").strip().lower(),
+        use_daemon=_env_flag("AI_SELECTOR_DAEMON", True),
+        record=_env_flag("AI_SELECTOR_RECORD", False),
+        health_check=_env_flag("AI_SELECTOR_HEALTH", False),
+        health_budget_ms=_env_int("AI_SELECTOR_HEALTH_BUDGET_MS", 150),
+        live_discovery=_env_flag("AI_SELECTOR_LIVE", True),
+        live_after_ms=_env_int("AI_SELECTOR_LIVE_AFTER_MS", 100),
+    )
+
+
+@cache
+def get_agents_directories() -> tuple[Path, ...]:
+    """Get the existing agents directories from AI_AGENTS_DIR, in precedence order.
 
-    agents_dir = os.getenv("AI_AGENTS_DIR", "~/ia")
-    path = Path(agents_dir).expanduser().resolve()
+    Missing directories are skipped (e.g. a project-local root outside that
+    project); FileNotFoundError is raised if none exists.
+    """
+    roots = get_settings().agents_dirs
+    existing = tuple(path for path in roots if path.is_dir())
 
-    if not path.exists():
+    if not existing:
         raise FileNotFoundError(
-            f"Agents directory not found: {path}\n"
+            f"Agents directory not found: {os.pathsep.join(map(str, roots))}\n"
             f"Please set AI_AGENTS_DIR environment variable or create the directory."
         )
 
-    return path
+    return existing
 
 
-def discover_agents() -> list[Agent]:
-    """Discover all agents by scanning for .env files in AI_AGENTS_DIR.
+def get_agents_directory() -> Path:
+    """Get the first existing agents directory."""
+    return get_agents_directories()[0]
+
+
+def reset_settings() -> None:
+    """Forget the memoized settings so they are loaded again on next use."""
+    get_settings.cache_clear()
+    get_agents_directories.cache_clear()
+
+
+class ScanCancelledError(Exception):
+    """Raised by scan_agents() when its stop event is set."""
+
+
+@dataclass
+class _ScanResult:
+    """Outcome of scanning a single agent directory."""
+
+    entry: IndexEntry
+    agent: Agent | None = None
+    warning: str | None = None
+    changed: bool = False
+
+
+def _parse_agent_entry(name: str, env_file: Path, env_sig: Signature) -> _ScanResult:
+    """Parse the selector variables of an agent .env file.
+
+    Unreadable files are stored in the index without a signature, so they are
+    parsed again on the next run.
+    """
+    try:
+        header = read_env_header(env_file)
+
+        # Check for ALIAS variable
+        alias = header.get("ALIAS")
+        if not alias:
+            return _ScanResult(
+                entry=IndexEntry(env=env_sig, record=None),
+                warning=f"Warning: {name}/.env has no ALIAS variable, skipping",
+                changed=True,
+            )
+
+        agent = Agent(
+            name=name,
+            command=alias,
+            env_vars=LazyEnvVars(env_file),
+            env_file=env_file,
+            directory=env_file.parent,
+            prewarm=parse_flag(header.get("PREWARM"), False),
+        )
+        return _ScanResult(
+            entry=IndexEntry(env=env_sig, record=agent.to_record()),
+            agent=agent,
+            changed=True,
+        )
+
+    except Exception as e:
+        return _ScanResult(
+            entry=IndexEntry(env=None, record=None),
+            warning=f"Warning: Could not load {name}/.env: {e}",
+            changed=True,
+        )
+
+
+def _scan_agent_dir(agents_dir: Path, name: str, index: DiscoveryIndex) -> _ScanResult:
+    """Stat an agent directory and parse its .env file unless the index is fresh."""
+    env_file = agents_dir / name / ".env"
+    env_sig = stat_signature(env_file)
+    cached = index.entries.get(name)
 
-    An agent is any subdirectory that contains a .env file with an ALIAS variable.
+    if env_sig is None:
+        entry = IndexEntry(env=None, record=None)
+        return _ScanResult(entry=entry, changed=cached != entry)
+
+    if cached is None or not index.is_fresh(cached.env, env_sig):
+        return _parse_agent_entry(name, env_file, env_sig)
+
+    if cached.record is None:
+        return _ScanResult(
+            entry=cached,
+            warning=f"Warning: {name}/.env has no ALIAS variable, skipping",
+        )
+
+    try:
+        return _ScanResult(entry=cached, agent=Agent.from_record(cached.record))
+    except (KeyError, TypeError, ValueError):
+        # Corrupted index record: parse the file again
+        return _parse_agent_entry(name, env_file, env_sig)
+
+
+def walk_agents_root(
+    root: Path, max_depth: int, prune: frozenset[str]
+) -> tuple[list[str], dict[str, Signature | None]]:
+    """Find the candidate agent directories below root.
+
+    Directories are listed with os.scandir, whose entries carry the file type
+    so telling directories apart needs no extra stat. Directories named in
+    prune are never entered. Below max_depth, a directory without a .env file
+    is a grouping directory and is searched in turn; agent directories are
+    never searched.
 
     Returns
     -------
-        List of discovered Agent objects
+        Sorted names of the candidates relative to root ("group/agent"), and
+        the signatures of the grouping directories walked, by path
 
     """
-    agents_dir = get_agents_directory()
-    agents: list[Agent] = []
+    names: list[str] = []
+    groups: dict[str, Signature | None] = {}
 
-    # Scan all subdirectories
-    for item in agents_dir.iterdir():
-        if not item.is_dir():
-            continue
+    def walk(path: str, prefix: str, depth: int) -> None:
+        try:
+            with os.scandir(path) as it:
+                children = sorted(
+                    (entry.name, entry.path)
+                    for entry in it
+                    if entry.name not in prune and entry.is_dir()
+                )
+        except OSError:
+            return
+
+        for name, child in children:
+            if depth + 1 < max_depth and not os.path.exists(
+                os.path.join(child, ".env")
+            ):
+                # Stat before listing, so a later change is always noticed
+                groups[child] = stat_signature(Path(child))
+                walk(child, f"{prefix}{name}/", depth + 1)
+            else:
+                names.append(f"{prefix}{name}")
+
+    walk(str(root), "", 0)
+    return sorted(names), groups
+
+
+def _index_options(settings: Settings) -> dict[str, Any]:
+    return {"max_depth": settings.max_depth, "prune": sorted(settings.prune)}
 
-        env_file = item / ".env"
-        if not env_file.exists():
-            continue
 
-        # Load the .env file
+def _load_root_index(root: Path, settings: Settings) -> DiscoveryIndex:
+    """Load the index of root, unless disabled or built with other settings."""
+    if not settings.cache_enabled:
+        return DiscoveryIndex()
+    index = load_index(root)
+    if index.options != _index_options(settings):
+        return DiscoveryIndex()
+    return index
+
+
+def _scan_names(
+    root: Path,
+    names: list[str],
+    index: DiscoveryIndex,
+    workers: int,
+    on_agent: Callable[[Agent], object] | None = None,
+    stop: "Event | None" = None,
+) -> list[_ScanResult]:
+    def scan(name: str) -> _ScanResult:
+        if stop is not None and stop.is_set():
+            raise ScanCancelledError(f"scan of {root} cancelled")
+        result = _scan_agent_dir(root, name, index)
+        if on_agent is not None and result.agent is not None:
+            on_agent(result.agent)
+        return result
+
+    if workers > 1 and len(names) >= PARALLEL_THRESHOLD:
+        # Imported lazily: concurrent.futures (and logging) cost ~20ms at startup
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = ThreadPoolExecutor(max_workers=workers)
         try:
-            env_vars = dotenv_values(env_file)
+            results = list(pool.map(scan, names))
+        except BaseException:
+            # Do not wait for the directories still queued
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+        return results
+    return [scan(name) for name in names]
+
+
+def _scan_root(
+    root: Path,
+    settings: Settings,
+    workers: int,
+    on_agent: Callable[[Agent], object] | None = None,
+    stop: "Event | None" = None,
+) -> tuple[list[Agent], list[str]]:
+    """Discover the agents of a single root, using and refreshing its index."""
+    index = _load_root_index(root, settings)
+    root_sig = stat_signature(root)
+    results = None
+
+    if index.is_tree_fresh(root_sig):
+        names, groups, changed = list(index.entries), index.groups, False
+        results = _scan_names(root, names, index, workers, on_agent, stop)
+        if any(
+            result.entry.env is None and name.count("/") + 1 < settings.max_depth
+            for name, result in zip(names, results)
+        ):
+            results = None  # An agent lost its .env and may now group others
+
+    if results is None:
+        names, groups = walk_agents_root(root, settings.max_depth, settings.prune)
+        changed = True
+        results = _scan_names(root, names, index, workers, on_agent, stop)
+
+    new_index = DiscoveryIndex(
+        root=root_sig, groups=groups, options=_index_options(settings)
+    )
+    agents: list[Agent] = []
+    warnings: list[str] = []
+
+    for name, result in zip(names, results):
+        new_index.entries[name] = result.entry
+        changed = changed or result.changed
+        if result.warning:
+            warnings.append(result.warning)
+        if result.agent is not None:
+            agents.append(result.agent)
+
+    if settings.cache_enabled and changed:
+        save_index(root, new_index)
+
+    return agents, warnings
+
+
+def scan_agents(
+    workers: int | None = None,
+    on_agent: Callable[[Agent], object] | None = None,
+    stop: "Event | None" = None,
+) -> tuple[list[Agent], list[str]]:
+    """Discover all agents by scanning for .env files in AI_AGENTS_DIR.
+
+    An agent is any directory that contains a .env file with an ALIAS variable,
+    directly in one of the roots or, up to AI_SELECTOR_MAX_DEPTH levels down,
+    in grouping directories (see walk_agents_root()). Agents are named by their
+    path relative to their root; when several roots hold the same name, the
+    one listed first in AI_AGENTS_DIR wins, like PATH.
+
+    Each root is backed by an on-disk index (see src.cache): when its directory
+    listings have not changed they are reused, and only the .env files whose
+    stat signature changed are parsed again. Directories are scanned by a
+    thread pool so stat and read latency on network filesystems overlaps;
+    warnings keep the order of the roots and directory names.
+
+    Args:
+    ----
+        workers: Number of scanning threads, AI_SELECTOR_WORKERS by default
+        on_agent: Called with each agent as soon as it is found, from the
+            scanning threads; agents shadowed by a root listed first are
+            not reported
+        stop: Event that cancels the scan when set, checked before each
+            directory; queued directories are dropped without waiting
+
+    Returns:
+    -------
+        Discovered Agent objects sorted by name, and the warnings to report
+
+    Raises:
+    ------
+        ScanCancelledError if stop was set (indexes are left as they were)
+
+    """
+    settings = get_settings()
+    if workers is None:
+        workers = settings.workers
 
-            # Check for ALIAS variable
-            alias = env_vars.get("ALIAS")
-            if not alias:
-                print(f"Warning: {item.name}/.env has no ALIAS variable, skipping")
+    agents: dict[str, Agent] = {}
+    warnings: list[str] = []
+
+    def report(agent: Agent) -> None:
+        # Roots are scanned one after another, so agents holds every name
+        # claimed by the roots listed before this one
+        if on_agent is not None and agent.name not in agents:
+            on_agent(agent)
+
+    for root in get_agents_directories():
+        root_agents, root_warnings = _scan_root(
+            root, settings, workers, report if on_agent is not None else None, stop
+        )
+        warnings.extend(root_warnings)
+        for agent in root_agents:
+            agents.setdefault(agent.name, agent)
+
+    return [agents[name] for name in sorted(agents)], warnings
+
+
+def discover_agents(workers: int | None = None) -> list[Agent]:
+    """Discover all agents, printing a warning for each invalid agent.
+
+    See scan_agents() for the details.
+
+    Returns
+    -------
+        List of discovered Agent objects, sorted by name
+
+    """
+    agents, warnings = scan_agents(workers)
+    for warning in warnings:
+        print(warning)
+    return agents
+
+
+def indexed_agents() -> list[Agent]:
+    """Get the agents recorded in the discovery indexes, without checking them.
+
+    Nothing but the indexes is read, so the result is available at once even
+    on slow filesystems, but it may list agents that changed or were removed
+    since the last scan.
+
+    Returns
+    -------
+        The indexed agents, sorted by name, with the precedence of scan_agents()
+
+    """
+    settings = get_settings()
+    agents: dict[str, Agent] = {}
+    for root in get_agents_directories():
+        for entry in _load_root_index(root, settings).entries.values():
+            if entry.record is None:
+                continue
+            try:
+                agent = Agent.from_record(entry.record)
+            except (KeyError, TypeError, ValueError):
                 continue
+            agents.setdefault(agent.name, agent)
+    return [agents[name] for name in sorted(agents)]
 
-            env_vars_only = cast(
-                dict[str, str],
-                {k: v for k, v in env_vars.items() if k != "ALIAS" and v is not None},
-            )
 
-            agent = Agent(
-                name=item.name,
-                command=alias,
-                env_vars=env_vars_only,
-                env_file=env_file,
-            )
-            agents.append(agent)
+def agent_directories() -> dict[str, Path]:
+    """Map the name of every directory with a .env file to its path.
+
+    Uses the discovery indexes when they are fresh, so no .env file is parsed.
+    Names are sorted and follow the same precedence as scan_agents().
+    """
+    settings = get_settings()
+    directories: dict[str, Path] = {}
+
+    for root in get_agents_directories():
+        index = _load_root_index(root, settings)
+        if index.is_tree_fresh(stat_signature(root)):
+            names = [name for name, entry in index.entries.items() if entry.env]
+        else:
+            candidates, _ = walk_agents_root(root, settings.max_depth, settings.prune)
+            names = [name for name in candidates if (root / name / ".env").exists()]
+        for name in names:
+            directories.setdefault(name, root / name)
+
+    return {name: directories[name] for name in sorted(directories)}
+
 
-        except Exception as e:
-            print(f"Warning: Could not load {item.name}/.env: {e}")
+def list_agent_names() -> list[str]:
+    """List the names of the agent directories that have a .env file."""
+    return list(agent_directories())
+
+
+def load_agent(name: str) -> Agent | None:
+    """Load a single agent by name without scanning the others.
+
+    Args:
+    ----
+        name: The agent name, as returned by list_agent_names()
+
+    Returns:
+    -------
+        The Agent, or None if no root holds a valid agent with that name
+
+    """
+    settings = get_settings()
+    parts = name.split("/")
+    if len(parts) > settings.max_depth or not settings.prune.isdisjoint(parts):
+        return None
+
+    for root in get_agents_directories():
+        if not (root / name / ".env").exists():
             continue
+        result = _scan_agent_dir(root, name, _load_root_index(root, settings))
+        if result.warning:
+            print(result.warning)
+        return result.agent
 
-    return agents
+    return None
@@ -0,0 +1,488 @@
+"""Background daemon keeping a warm agent registry for AI Agent Selector.
+
+``ai-selector daemon`` scans the AI_AGENTS_DIR roots once, keeps the
+discovered agents in memory (with the commands of PREWARM agents resolved,
+see src.prewarm) and rescans whenever they change, watched with inotify on
+Linux (or by polling the stat signatures elsewhere). The registry is served
+over a Unix socket only accessible to the current user; main() asks the
+daemon for the agents when its socket exists and falls back to
+discover_agents() otherwise.
+
+Protocol: the client sends one command line and reads a single JSON reply
+until the daemon closes the connection. ``list`` returns the registry key
+(see registry_key()), the agent records (see Agent.to_record()) and the discovery
+warnings; ``ping`` returns the daemon pid.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import select
+import signal
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .cache import Signature, get_cache_dir, stat_signature
+from .config import (
+    Agent,
+    Settings,
+    get_agents_directories,
+    get_settings,
+    scan_agents,
+    walk_agents_root,
+)
+from .prewarm import warm_agents
+
+if TYPE_CHECKING:
+    import socket
+
+# How long a client waits for the daemon before scanning by itself
+CLIENT_TIMEOUT = 0.5
+
+# Seconds between two stat scans of the polling watcher
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Changes arriving this soon after a first one are handled by the same rescan
+DEBOUNCE = 0.05
+
+# inotify(7) event masks
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+
+ROOT_MASK = (
+    IN_ATTRIB
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+AGENT_MASK = (
+    IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+_EVENT_HEADER = 16
+
+
+def get_runtime_dir() -> Path:
+    """Get the directory holding the daemon sockets.
+
+    XDG_RUNTIME_DIR is preferred (private to the user and cleared at logout);
+    the cache directory is used when it is not set.
+    """
+    runtime = os.getenv("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime) / "ai-selector"
+    return get_cache_dir()
+
+
+def registry_key(settings: Settings) -> str:
+    """Identify the registry discovered with the given settings."""
+    roots = os.pathsep.join(str(root) for root in settings.agents_dirs)
+    prune = ",".join(sorted(settings.prune))
+    return f"{roots}|depth={settings.max_depth}|prune={prune}"
+
+
+def socket_path(settings: Settings | None = None) -> Path:
+    """Get the path of the daemon socket for the current discovery settings."""
+    key = registry_key(settings or get_settings())
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return get_runtime_dir() / f"daemon-{digest}.sock"
+
+
+def watched_tree(
+    settings: Settings,
+) -> tuple[list[Path], list[Path]]:
+    """List the directories to watch: roots and groups, and agent candidates."""
+    directories: list[Path] = []
+    candidates: list[Path] = []
+    for root in get_agents_directories():
+        names, groups = walk_agents_root(root, settings.max_depth, settings.prune)
+        directories.append(root)
+        directories.extend(Path(group) for group in groups)
+        candidates.extend(root / name for name in names)
+    return directories, candidates
+
+
+class Registry:
+    """Agents discovered by the daemon, kept as the reply served to clients.
+
+    Only the encoded reply is kept between refreshes: clients always ask for
+    the whole registry, so no Agent objects need to stay alive.
+    """
+
+    def __init__(self, key: str) -> None:
+        """Create an empty registry; call refresh() to scan the directories."""
+        self.key = key
+        self._reply = b""
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Scan the agents directories again and rebuild the served reply."""
+        try:
+            agents, warnings = scan_agents()
+        except OSError as e:
+            agents, warnings = [], [f"Warning: Could not scan the agents: {e}"]
+
+        # Keep the npx/uvx resolutions of PREWARM agents ready for launch
+        warm_agents(agents)
+
+        reply = json.dumps(
+            {
+                "key": self.key,
+                "agents": [agent.to_record() for agent in agents],
+                "warnings": warnings,
+            },
+            ensure_ascii=False,
+        ).encode("utf-8")
+
+        with self._lock:
+            self._reply = reply
+
+    def handle(self, command: str) -> bytes:
+        """Get the reply to a client command."""
+        if command == "list":
+            with self._lock:
+                return self._reply
+        if command == "ping":
+            return json.dumps({"pid": os.getpid()}).encode("utf-8")
+        return json.dumps({"error": f"unknown command: {command}"}).encode("utf-8")
+
+
+class PollingWatcher:
+    """Detect changes by comparing the stat signatures of the agent .env files.
+
+    The tree is snapshotted at most once per interval, however often wait() is
+    called: the daemon wakes up more often to notice it has to stop.
+    """
+
+    def __init__(self, settings: Settings, interval: float = DEFAULT_POLL_INTERVAL):
+        """Take the initial snapshot of the agents directories."""
+        self.settings = settings
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+        self._next_poll = time.monotonic() + interval
+
+    def _take_snapshot(self) -> dict[Path, Signature | None]:
+        try:
+            directories, candidates = watched_tree(self.settings)
+        except OSError:
+            return {}
+        snapshot = {path: stat_signature(path) for path in directories}
+        snapshot.update((path, stat_signature(path / ".env")) for path in candidates)
+        return snapshot
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds and tell whether anything changed."""
+        remaining = self._next_poll - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return False
+
+        time.sleep(max(0.0, remaining))
+        snapshot = self._take_snapshot()
+        self._next_poll = time.monotonic() + self.interval
+        changed = snapshot != self._snapshot
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        """Release the watcher resources."""
+
+
+class InotifyWatcher:
+    """Detect changes with inotify(7) watches on every directory of the tree.
+
+    Roots and grouping directories are watched for directories coming and
+    going, agent directories for changes to their .env file. Raises OSError
+    when inotify is unavailable or out of watches, in which case the daemon
+    falls back to PollingWatcher.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        """Watch the agents directories and each directory below them."""
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.settings = settings
+        self._directory_wds: set[int] = set()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            self._raise_errno("inotify_init1")
+
+        try:
+            self._watch_tree(strict=True)
+        except OSError:
+            self.close()
+            raise
+
+    def _raise_errno(self, what: str) -> None:
+        import ctypes
+
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"{what}: {os.strerror(errno)}")
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = int(self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask))
+        if wd < 0:
+            self._raise_errno(f"inotify_add_watch {path}")
+        return wd
+
+    def _watch_tree(self, strict: bool = False) -> None:
+        """Watch the current tree (watching a directory again updates its mask)."""
+        try:
+            directories, candidates = watched_tree(self.settings)
+        except OSError:
+            if strict:
+                raise
+            return
+
+        directory_wds: set[int] = set()
+        for masks, paths in ((ROOT_MASK, directories), (AGENT_MASK, candidates)):
+            for path in paths:
+                try:
+                    wd = self._add_watch(path, masks | IN_ONLYDIR)
+                except OSError:
+                    if strict:
+                        raise
+                    continue
+                if masks == ROOT_MASK:
+                    directory_wds.add(wd)
+        self._directory_wds = directory_wds
+
+    def _events(self, data: bytes) -> Iterator[tuple[int, int, str]]:
+        offset = 0
+        while offset + _EVENT_HEADER <= len(data):
+            wd = int.from_bytes(data[offset : offset + 4], sys.byteorder, signed=True)
+            mask = int.from_bytes(data[offset + 4 : offset + 8], sys.byteorder)
+            length = int.from_bytes(data[offset + 12 : offset + 16], sys.byteorder)
+            raw = data[offset + _EVENT_HEADER : offset + _EVENT_HEADER + length]
+            offset += _EVENT_HEADER + length
+            yield wd, mask, os.fsdecode(raw.rstrip(b"\0"))
+
+    def _read(self) -> bool:
+        """Consume the pending events and tell whether any is relevant."""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            for wd, mask, name in self._events(data):
+                if wd in self._directory_wds or mask & IN_Q_OVERFLOW or name == ".env":
+                    relevant = True
+
+        if relevant:
+            # Directories added, removed or renamed, or agents that turned into
+            # grouping directories: watch the new tree
+            self._watch_tree()
+        return relevant
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds and tell whether anything changed."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready or not self._read():
+            return False
+
+        # Editors and sync tools touch several files in a row: coalesce them
+        while select.select([self._fd], [], [], DEBOUNCE)[0]:
+            self._read()
+        return True
+
+    def close(self) -> None:
+        """Release the watcher resources."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def _connect(path: Path, timeout: float) -> "socket.socket":
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(os.fspath(path))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def request(path: Path, command: str, timeout: float = CLIENT_TIMEOUT) -> Any:
+    """Send a command to the daemon listening on path and decode its reply.
+
+    Raises OSError if the daemon cannot be reached and ValueError if the reply
+    is not valid JSON.
+    """
+    with _connect(path, timeout) as sock:
+        sock.sendall(command.encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.read())
+
+
+def query_daemon(
+    timeout: float = CLIENT_TIMEOUT,
+) -> tuple[list[Agent], list[str]] | None:
+    """Get the agents and warnings from the daemon for the current settings.
+
+    Returns
+    -------
+        Same as scan_agents(), or None if no daemon is available
+
+    """
+    settings = get_settings()
+    path = socket_path(settings)
+    if not path.exists():
+        return None
+
+    try:
+        reply = request(path, "list", timeout)
+        if reply.get("key") != registry_key(settings):
+            return None
+        agents = [Agent.from_record(record) for record in reply["agents"]]
+        return agents, [str(warning) for warning in reply["warnings"]]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _is_running(path: Path) -> bool:
+    try:
+        return "pid" in request(path, "ping")
+    except (OSError, ValueError, TypeError):
+        return False
+
+
+def serve(
+    stop: threading.Event,
+    poll: bool = False,
+    interval: float = DEFAULT_POLL_INTERVAL,
+    ready: threading.Event | None = None,
+) -> None:
+    """Serve the agent registry of the current settings until stop is set.
+
+    Args:
+    ----
+        stop: Event that shuts the daemon down
+        poll: Use the polling watcher even if inotify is available
+        interval: Seconds between two scans of the polling watcher
+        ready: Event set once the socket accepts connections
+
+    Raises:
+    ------
+        RuntimeError: If another daemon already serves the same agents
+
+    """
+    import socketserver
+
+    settings = get_settings()
+    path = socket_path(settings)
+    if path.exists():
+        if _is_running(path):
+            raise RuntimeError(f"A daemon is already running on {path}")
+        path.unlink()  # Left behind by a daemon that did not shut down
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    watcher: InotifyWatcher | PollingWatcher
+    if poll:
+        watcher = PollingWatcher(settings, interval)
+    else:
+        try:
+            watcher = InotifyWatcher(settings)
+        except OSError as e:
+            print(f"Warning: inotify unavailable ({e}), polling instead")
+            watcher = PollingWatcher(settings, interval)
+
+    registry = Registry(registry_key(settings))
+    registry.refresh()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            command = self.rfile.readline(256).decode("utf-8", "replace").strip()
+            self.wfile.write(registry.handle(command))
+
+    umask = os.umask(0o177)  # Create the socket with mode 0600
+    try:
+        server = socketserver.ThreadingUnixStreamServer(os.fspath(path), Handler)
+    finally:
+        os.umask(umask)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        if ready is not None:
+            ready.set()
+        while not stop.is_set():
+            # Wake up often to notice stop; PollingWatcher keeps its own pace
+            if watcher.wait(min(interval, 0.5)):
+                registry.refresh()
+    finally:
+        server.shutdown()
+        server.server_close()
+        watcher.close()
+        path.unlink(missing_ok=True)
+
+
+def daemon_command(argv: list[str]) -> int:
+    """Run the ``ai-selector daemon`` subcommand."""
+    parser = argparse.ArgumentParser(
+        prog="ai-selector daemon",
+        description="Keep the agent registry warm and serve it to ai-selector.",
+    )
+    parser.add_argument(
+        "--poll", action="store_true", help="poll for changes instead of inotify"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="seconds between two polls (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--status", action="store_true", help="tell whether a daemon is running"
+    )
+    args = parser.parse_args(argv)
+
+    roots = get_agents_directories()
+    path = socket_path()
+
+    if args.status:
+        if path.exists() and _is_running(path):
+            print(f"Daemon running on {path}")
+            return 0
+        print("Daemon not running.")
+        return 1
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    try:
+        print(f"Serving {os.pathsep.join(map(str, roots))} on {path}")
+        serve(stop, poll=args.poll, interval=args.interval)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+
+    return 0
@@ -0,0 +1,365 @@
+"""Compiled cache of the resolved environment of each agent.
+
+Launching an agent needs its whole .env file parsed and interpolated (see
+src.envfile). The resolved variables are saved in
+``$XDG_CACHE_HOME/ai-selector/env/`` in a compact binary format (no pickle
+or marshal: length-prefixed UTF-8 strings) and loaded with a single read on
+later launches.
+
+An entry is keyed by a hash of the .env contents. While the file's stat
+signature is unchanged it is trusted without reading the file, like the
+discovery index (see src.cache); otherwise the contents are read and hashed.
+Interpolation may use the selector's environment (``${HOME}``, or variables
+set by the selector's own .env), so an entry also records the variables it
+looked up there and is rebuilt when any of them changes.
+
+``ai-selector verify-env`` compares the cached environments with a fresh
+parse of their .env files.
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import time
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+from .cache import (
+    RACY_WINDOW_NS,
+    Signature,
+    get_cache_dir,
+    stat_signature,
+    write_private_bytes,
+)
+from .envfile import decode_env, parse_env
+
+MAGIC = b"AIENV"
+FORMAT_VERSION = 1
+
+# Magic, format version, contents digest, .env signature, write time
+_HEADER = struct.Struct("<5sB16sqqqq")
+_COUNT = struct.Struct("<I")
+# Length of a string; _NONE stands for an unset variable
+_LENGTH = struct.Struct("<I")
+_NONE = 0xFFFFFFFF
+
+
+@dataclass
+class EnvCacheEntry:
+    """Resolved environment of an agent .env file."""
+
+    digest: bytes  # Hash of the .env contents
+    signature: Signature | None  # Stat signature of the .env when compiled
+    written_ns: int  # When the entry was compiled
+    # Variables of the selector environment the values depend on (None: unset)
+    environ: dict[str, str | None]
+    values: dict[str, str]  # Resolved variables, without keys lacking a value
+
+
+class _RecordingEnviron(Mapping[str, str]):
+    """os.environ, remembering the variables that were looked up."""
+
+    def __init__(self) -> None:
+        self.used: dict[str, str | None] = {}
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        self.used[key] = os.environ.get(key)
+        return self.used[key] is not None
+
+    def __getitem__(self, key: str) -> str:
+        return os.environ[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(os.environ)
+
+    def __len__(self) -> int:
+        return len(os.environ)
+
+
+def env_cache_path(env_file: Path) -> Path:
+    """Get the path of the compiled environment of an agent .env file."""
+    digest = hashlib.sha1(str(env_file).encode("utf-8")).hexdigest()[:16]
+    return get_cache_dir() / "env" / f"{digest}.bin"
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _compile(data: bytes, signature: Signature | None) -> EnvCacheEntry:
+    environ = _RecordingEnviron()
+    parsed = parse_env(decode_env(data), environ=environ)
+    return EnvCacheEntry(
+        digest=_digest(data),
+        signature=signature,
+        written_ns=time.time_ns(),
+        environ=environ.used,
+        values={key: value for key, value in parsed.items() if value is not None},
+    )
+
+
+def compile_env(env_file: Path) -> EnvCacheEntry:
+    """Parse and resolve an agent .env file into a cache entry.
+
+    Raises
+    ------
+        OSError if the file cannot be read, ValueError if it is not UTF-8
+
+    """
+    # Stat first: a change made while reading leaves a signature that no
+    # longer matches, so the entry is checked by hash next time
+    signature = stat_signature(env_file)
+    return _compile(env_file.read_bytes(), signature)
+
+
+def _pack_string(value: str | None) -> bytes:
+    if value is None:
+        return _LENGTH.pack(_NONE)
+    encoded = value.encode("utf-8", "surrogateescape")
+    return _LENGTH.pack(len(encoded)) + encoded
+
+
+def _pack_pairs(pairs: Mapping[str, str | None]) -> bytes:
+    return _COUNT.pack(len(pairs)) + b"".join(
+        _pack_string(key) + _pack_string(value) for key, value in pairs.items()
+    )
+
+
+def encode_entry(entry: EnvCacheEntry) -> bytes:
+    """Serialize an entry in the binary cache format."""
+    mtime_ns, size, inode = entry.signature or (-1, -1, -1)
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        entry.digest,
+        mtime_ns,
+        size,
+        inode,
+        entry.written_ns,
+    )
+    return header + _pack_pairs(entry.environ) + _pack_pairs(entry.values)
+
+
+def decode_entry(data: bytes) -> EnvCacheEntry:
+    """Deserialize an entry written by encode_entry().
+
+    Raises
+    ------
+        ValueError if data is not a valid entry of this format version
+
+    """
+    view = memoryview(data)
+    try:
+        magic, version, digest, mtime_ns, size, inode, written_ns = _HEADER.unpack_from(
+            view
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("not an environment cache entry")
+        offset = _HEADER.size
+
+        def string() -> str | None:
+            nonlocal offset
+            (length,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            if length == _NONE:
+                return None
+            if offset + length > len(view):
+                raise ValueError("truncated environment cache entry")
+            value = bytes(view[offset : offset + length])
+            offset += length
+            return value.decode("utf-8", "surrogateescape")
+
+        def pairs() -> dict[str, str | None]:
+            nonlocal offset
+            (count,) = _COUNT.unpack_from(view, offset)
+            offset += _COUNT.size
+            result: dict[str, str | None] = {}
+            for _ in range(count):
+                key = string()
+                if key is None:
+                    raise ValueError("corrupted environment cache entry")
+                result[key] = string()
+            return result
+
+        environ = pairs()
+        values = pairs()
+    except struct.error as e:
+        raise ValueError(f"truncated environment cache entry: {e}") from None
+    if offset != len(view) or any(value is None for value in values.values()):
+        raise ValueError("corrupted environment cache entry")
+
+    return EnvCacheEntry(
+        digest=digest,
+        signature=None if size < 0 else (mtime_ns, size, inode),
+        written_ns=written_ns,
+        environ=environ,
+        values={key: value for key, value in values.items() if value is not None},
+    )
+
+
+def load_entry(env_file: Path) -> EnvCacheEntry | None:
+    """Load the cached environment of env_file, or None if there is none."""
+    try:
+        return decode_entry(env_cache_path(env_file).read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def save_entry(env_file: Path, entry: EnvCacheEntry) -> None:
+    """Write the cached environment of env_file (best effort)."""
+    write_private_bytes(env_cache_path(env_file), encode_entry(entry))
+
+
+def _environ_matches(entry: EnvCacheEntry) -> bool:
+    return all(os.environ.get(key) == value for key, value in entry.environ.items())
+
+
+def _is_trusted(entry: EnvCacheEntry, signature: Signature | None) -> bool:
+    """Check whether the .env is unchanged going by its stat signature alone."""
+    return (
+        signature is not None
+        and entry.signature == signature
+        and signature[0] < entry.written_ns - RACY_WINDOW_NS
+    )
+
+
+def read_env_cached(env_file: Path) -> dict[str, str]:
+    """Get the resolved variables of an agent .env file, from the cache if valid.
+
+    The .env file is not even read while its stat signature is unchanged;
+    otherwise it is hashed and only parsed again if its contents or the
+    environment variables it uses changed. The cache is updated as needed.
+
+    Returns
+    -------
+        Variables with a value, interpolated as read_env() does
+
+    Raises
+    ------
+        OSError if the file cannot be read, ValueError if it is not UTF-8
+
+    """
+    signature = stat_signature(env_file)
+    entry = load_entry(env_file)
+    if entry is not None and not _environ_matches(entry):
+        entry = None
+    if entry is not None and _is_trusted(entry, signature):
+        return entry.values
+
+    data = env_file.read_bytes()
+    if entry is not None and entry.digest == _digest(data):
+        # Same contents, the file was only touched
+        entry.signature = signature
+        entry.written_ns = time.time_ns()
+    else:
+        entry = _compile(data, signature)
+    save_entry(env_file, entry)
+    return entry.values
+
+
+@dataclass
+class Verification:
+    """Result of comparing a cached environment with its .env file."""
+
+    status: str  # "ok", "missing", "stale" or "mismatch"
+    differences: list[str]  # +KEY (only in .env), -KEY (only cached), ~KEY
+    reason: str = ""  # Why a stale entry will be rebuilt
+
+
+def diff_values(cached: Mapping[str, str], source: Mapping[str, str]) -> list[str]:
+    """List the keys that differ between two environments, never the values."""
+    return sorted(
+        [f"+{key}" for key in source.keys() - cached.keys()]
+        + [f"-{key}" for key in cached.keys() - source.keys()]
+        + [
+            f"~{key}"
+            for key in source.keys() & cached.keys()
+            if source[key] != cached[key]
+        ],
+        key=lambda item: item[1:],
+    )
+
+
+def verify_env(env_file: Path) -> Verification:
+    """Compare the cached environment of env_file with a fresh parse.
+
+    An entry the next launch would use must hold the same values as the
+    .env file ("ok"); otherwise it is a "mismatch". Entries the next launch
+    would rebuild are "stale".
+
+    Raises
+    ------
+        OSError if the file cannot be read, ValueError if it is not UTF-8
+
+    """
+    entry = load_entry(env_file)
+    fresh = compile_env(env_file)
+    if entry is None:
+        return Verification("missing", [])
+
+    differences = diff_values(entry.values, fresh.values)
+    changed = [
+        key for key, value in entry.environ.items() if os.environ.get(key) != value
+    ]
+    if changed:
+        return Verification("stale", differences, f"{', '.join(changed)} changed")
+    if not _is_trusted(entry, fresh.signature) and entry.digest != fresh.digest:
+        return Verification("stale", differences, ".env changed")
+    return Verification("mismatch" if differences else "ok", differences)
+
+
+def verify_env_command(argv: list[str]) -> int:
+    """Run the ``ai-selector verify-env`` subcommand."""
+    # Imported here: config imports this module
+    from .config import agent_directories
+    from .search import match_names
+
+    parser = argparse.ArgumentParser(
+        prog="ai-selector verify-env",
+        description="Compare the cached agent environments with their .env files.",
+    )
+    parser.add_argument(
+        "agents",
+        nargs="*",
+        help="agent names, prefixes or abbreviations (default: all)",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="compile the entries that are not ok again",
+    )
+    args = parser.parse_args(argv)
+
+    directories = agent_directories()
+    names = list(directories)
+    if args.agents:
+        names = []
+        for query in args.agents:
+            matches = match_names(query, list(directories))
+            if len(matches) != 1:
+                print(f"'{query}' does not match a single agent.")
+                return 1
+            names.append(matches[0])
+
+    mismatches = 0
+    for name in names:
+        env_file = directories[name] / ".env"
+        try:
+            result = verify_env(env_file)
+        except (OSError, ValueError) as e:
+            print(f"{'error':<9} {name}: {e}")
+            continue
+        details = " ".join(result.differences)
+        if result.reason:
+            details = f"({result.reason}) {details}".rstrip()
+        print(f"{result.status:<9} {name}{': ' + details if details else ''}")
+        if result.status == "mismatch":
+            mismatches += 1
+        if args.rebuild and result.status != "ok":
+            save_entry(env_file, compile_env(env_file))
+
+    return 1 if mismatches else 0
@@ -0,0 +1,252 @@
+"""Dependency-free reader of .env files, compatible with python-dotenv.
+
+Files are tokenized with the grammar of python-dotenv's parser (``export``,
+quoted keys and values, escapes, multi-line quoted values, inline comments)
+and values are interpolated like ``dotenv_values()`` does (``${VAR}`` and
+``${VAR:-default}``, from the variables above and then the environment).
+Lines that cannot be parsed are skipped with the same warning.
+
+Two modes are provided:
+
+- read_env(): every variable, interpolated, for launching an agent
+- read_env_header(): only a few keys, for listing agents. Tokenizing stops
+  after the last place the keys appear in the file, and values are
+  interpolated only when those keys reference other variables.
+"""
+
+import os
+import re
+from collections.abc import Collection, Iterator, Mapping
+from pathlib import Path
+
+_MULTILINE_WHITESPACE = re.compile(r"\s*", re.MULTILINE)
+_WHITESPACE = re.compile(r"[^\S\r\n]*")
+_EXPORT = re.compile(r"(?:export[^\S\r\n]+)?")
+_SINGLE_QUOTED_KEY = re.compile(r"'([^']+)'")
+_UNQUOTED_KEY = re.compile(r"([^=\#\s]+)")
+_EQUAL_SIGN = re.compile(r"=[^\S\r\n]*")
+# A backslash always escapes the character after it
+_SINGLE_QUOTED_VALUE = re.compile(r"'((?:\\.|[^'\\])*)'", re.DOTALL)
+_DOUBLE_QUOTED_VALUE = re.compile(r'"((?:\\.|[^"\\])*)"', re.DOTALL)
+_UNQUOTED_VALUE = re.compile(r"[^\r\n]*")
+_INLINE_COMMENT = re.compile(r"\s+#.*")
+_COMMENT = re.compile(r"(?:[^\S\r\n]*#[^\r\n]*)?")
+_END_OF_LINE = re.compile(r"[^\S\r\n]*(?:\r\n|\n|\r|$)")
+_REST_OF_LINE = re.compile(r"[^\r\n]*(?:\r|\n|\r\n)?")
+_NEWLINE = re.compile(r"\r\n|\n|\r")
+_SINGLE_QUOTE_ESCAPES = re.compile(r"\\[\\']")
+_DOUBLE_QUOTE_ESCAPES = re.compile(r"\\[\\'\"abfnrtv]")
+_ESCAPES = {
+    "\\\\": "\\",
+    "\\'": "'",
+    '\\"': '"',
+    "\\a": "\a",
+    "\\b": "\b",
+    "\\f": "\f",
+    "\\n": "\n",
+    "\\r": "\r",
+    "\\t": "\t",
+    "\\v": "\v",
+}
+_VARIABLE = re.compile(r"\$\{(?P<name>[^\}:]*)(?::-(?P<default>[^\}]*))?\}")
+
+
+class _ParseError(Exception):
+    """A statement does not follow the .env grammar."""
+
+
+def _skip(pattern: re.Pattern[str], text: str, pos: int) -> int:
+    """Get the position after the match of pattern at pos (pos if none)."""
+    match = pattern.match(text, pos)
+    return pos if match is None else match.end()
+
+
+def _unescape(match: re.Match[str]) -> str:
+    return _ESCAPES[match.group(0)]
+
+
+def _parse_value(text: str, pos: int) -> tuple[str, int]:
+    """Parse the value starting at pos, returning it and the position after it."""
+    char = text[pos : pos + 1]
+    if char in ("'", '"'):
+        single = char == "'"
+        match = (_SINGLE_QUOTED_VALUE if single else _DOUBLE_QUOTED_VALUE).match(
+            text, pos
+        )
+        if match is None:
+            raise _ParseError
+        escapes = _SINGLE_QUOTE_ESCAPES if single else _DOUBLE_QUOTE_ESCAPES
+        value = match.group(1)
+        if "\\" in value:
+            value = escapes.sub(_unescape, value)
+        return value, match.end()
+    if char in ("", "\n", "\r"):
+        return "", pos
+    end = _skip(_UNQUOTED_VALUE, text, pos)
+    value = text[pos:end]
+    if "#" in value:
+        value = _INLINE_COMMENT.sub("", value)
+    return value.rstrip(), end
+
+
+def _scan(text: str) -> Iterator[tuple[str, str | None, int]]:
+    """Tokenize .env text, yielding (key, raw value, end position) bindings.
+
+    Keys without ``=`` have a None value. Comments and blank lines yield
+    nothing; statements that cannot be parsed are logged and skipped.
+    """
+    pos, end = 0, len(text)
+    while pos < end:
+        start = pos = _skip(_MULTILINE_WHITESPACE, text, pos)
+        if pos >= end:
+            return
+        try:
+            pos = _skip(_EXPORT, text, pos)
+            key: str | None = None
+            if not text.startswith("#", pos):
+                match = (
+                    _SINGLE_QUOTED_KEY if text.startswith("'", pos) else _UNQUOTED_KEY
+                ).match(text, pos)
+                if match is None:
+                    raise _ParseError
+                key, pos = match.group(1), match.end()
+            pos = _skip(_WHITESPACE, text, pos)
+
+            value: str | None = None
+            if text.startswith("=", pos):
+                equal = _skip(_EQUAL_SIGN, text, pos)
+                # "KEY= # comment" is empty, but in "KEY=#value" # is the value
+                if equal - pos > 1 and text.startswith("#", equal):
+                    value, pos = "", equal
+                else:
+                    value, pos = _parse_value(text, equal)
+
+            pos = _skip(_COMMENT, text, pos)
+            match = _END_OF_LINE.match(text, pos)
+            if match is None:
+                raise _ParseError
+            pos = match.end()
+        except _ParseError:
+            pos = _skip(_REST_OF_LINE, text, pos)
+            # Imported here: logging costs ~10ms and is only needed for this
+            import logging
+
+            logging.getLogger(__name__).warning(
+                "python-dotenv could not parse statement starting at line %s",
+                len(_NEWLINE.findall(text, 0, start)) + 1,
+            )
+            continue
+        if key is not None:
+            yield key, value, pos
+
+
+def interpolate(value: str, *scopes: Mapping[str, str | None]) -> str:
+    """Expand ``${VAR}`` and ``${VAR:-default}`` references in value.
+
+    Variables are looked up in each scope in turn; unset ones expand to their
+    default, or to an empty string.
+    """
+    if "${" not in value:
+        return value
+
+    def resolve(match: re.Match[str]) -> str:
+        name = match["name"]
+        for scope in scopes:
+            if name in scope:
+                return scope[name] or ""
+        return match["default"] or ""
+
+    return _VARIABLE.sub(resolve, value)
+
+
+def parse_env(
+    text: str,
+    interpolate_values: bool = True,
+    override: bool = True,
+    environ: Mapping[str, str] | None = None,
+) -> dict[str, str | None]:
+    """Parse .env text as python-dotenv does.
+
+    Args:
+    ----
+        text: Contents of the .env file
+        interpolate_values: Expand variable references in the values
+        override: Prefer the file's variables to the environment's when
+            expanding references (as ``dotenv_values()``; ``load_dotenv()``
+            does not by default)
+        environ: The environment, os.environ by default
+
+    Returns:
+    -------
+        Variables in file order; keys without ``=`` have a None value
+
+    """
+    environ = os.environ if environ is None else environ
+    values: dict[str, str | None] = {}
+    scopes = (values, environ) if override else (environ, values)
+    for key, value, _ in _scan(text.removeprefix("\ufeff")):
+        if value is not None and interpolate_values:
+            value = interpolate(value, *scopes)
+        values[key] = value
+    return values
+
+
+def decode_env(data: bytes) -> str:
+    """Decode the contents of a .env file as reading it in text mode does.
+
+    The file is UTF-8 and every line ending is turned into a newline.
+    """
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def read_env(env_file: Path, interpolate_values: bool = True) -> dict[str, str | None]:
+    """Read a .env file as ``dotenv_values()`` does (see parse_env)."""
+    return parse_env(env_file.read_text(encoding="utf-8"), interpolate_values)
+
+
+def read_env_header(env_file: Path, keys: Collection[str]) -> dict[str, str | None]:
+    """Read only the given keys of a .env file.
+
+    Gives the same values as read_env(), doing less work: the file is
+    tokenized only up to the last place one of the keys appears, and values
+    are interpolated only if one of the keys references other variables (then
+    only up to the last key, since a value can only reference the variables
+    above it).
+
+    Returns
+    -------
+        The keys found in the file, with their values
+
+    """
+    text = env_file.read_text(encoding="utf-8").removeprefix("\ufeff")
+
+    values: dict[str, str | None] = {}
+    # No key can be assigned after the last place one of them appears
+    last = max((text.rfind(key) for key in keys), default=-1)
+    stop = 0
+    for key, value, end in _scan(text):
+        if key in keys:
+            values[key] = value
+            stop = end
+        if end > last:
+            break
+
+    if any(value and "${" in value for value in values.values()):
+        parsed = parse_env(text[:stop])
+        values = {key: parsed[key] for key in values}
+    return values
+
+
+def load_env(env_file: Path) -> None:
+    """Set the variables of a .env file in os.environ, if the file exists.
+
+    Variables already set in the environment are not overridden, like
+    ``load_dotenv()`` does by default.
+    """
+    try:
+        values = parse_env(env_file.read_text(encoding="utf-8"), override=False)
+    except FileNotFoundError:
+        return
+    for key, value in values.items():
+        if value is not None and key not in os.environ:
+            os.environ[key] = value
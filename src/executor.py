@@ -1,72 +1,206 @@
 """Agent execution module."""
 
 import os
+import shlex
 import subprocess
 import sys
-from datetime import datetime
+import time
+import uuid
+from typing import Any
 
-from .config import Agent
+from . import metrics
+from .config import Agent, get_settings
+from .history import LOG_FILENAME, submit_record, timestamp
+from .prewarm import resolve_command
+from .terminal import clear_screen
+from .usage import record_launch
 
+# Characters that only a shell can interpret (pipes, redirections, expansions...)
+SHELL_METACHARACTERS = frozenset("|&;<>()$`\\*?[]{}~!#\n")
 
-def clear_screen() -> None:
-    """Clear the terminal screen."""
-    # Use 'cls' on Windows, 'clear' on Unix-like systems
-    os.system("cls" if os.name == "nt" else "clear")
+# First words that are shell builtins or keywords rather than programs
+SHELL_KEYWORDS = frozenset(
+    {"cd", "source", ".", "export", "exec", "eval", "if", "for", "while", "case"}
+)
 
 
-def log_execution(agent: Agent, current_dir: str) -> None:
-    """Log the agent execution to a log file in the agent's directory.
+def log_execution(
+    agent: Agent, current_dir: str, background: bool = True, timed: bool = True
+) -> str:
+    """Log the agent launch to the execution log in the agent's directory.
 
     Args:
     ----
         agent: The agent being executed
         current_dir: Current working directory from where selector was run
+        background: Let a thread write the record (see history.submit_record())
+        timed: Store the launch path timings (see metrics.snapshot()); off for
+            launches that did not go through it alone, like batch jobs
+
+    Returns:
+    -------
+        The launch id, to be passed to log_exit()
 
     """
-    log_file = agent.full_path / "agent-execution.log"
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    launch_id = uuid.uuid4().hex
+    record: dict[str, Any] = {
+        "event": "launch",
+        "id": launch_id,
+        "ts": timestamp(),
+        "agent": agent.name,
+        "command": agent.command,
+        "cwd": current_dir,
+        "env": list(agent.env_vars.keys()),
+    }
+    if timed:
+        record["timings"] = metrics.snapshot()
 
-    log_lines = [
-        f"[{timestamp}] ====================================================",
-        f"[{timestamp}] Agent: {agent.name}",
-        f"[{timestamp}] Command: {agent.command}",
-        f"[{timestamp}] Executed from: {current_dir}",
-    ]
+    try:
+        submit_record(agent.full_path / LOG_FILENAME, record, background)
+    except Exception as e:
+        print(f"Warning: Could not write to log file: {e}")
 
-    if agent.env_vars:
-        env_vars_str = ", ".join(agent.env_vars.keys())
-        log_lines.append(f"[{timestamp}] Environment variables: {env_vars_str}")
+    return launch_id
 
-    log_lines.append(f"[{timestamp}] ======== Executing Agent ========")
-    log_lines.append("")  # Empty line for readability
+
+def log_exit(agent: Agent, launch_id: str, exit_code: int, duration: float) -> None:
+    """Log the end of an agent session started by log_execution().
+
+    Args:
+    ----
+        agent: The agent that was executed
+        launch_id: The id returned by log_execution()
+        exit_code: Exit code of the agent process
+        duration: Session duration in seconds
+
+    """
+    record = {
+        "event": "exit",
+        "id": launch_id,
+        "ts": timestamp(),
+        "agent": agent.name,
+        "exit_code": exit_code,
+        "duration": round(duration, 3),
+    }
 
     try:
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write("\n".join(log_lines) + "\n")
+        # The session is over: no need to write it in the background
+        submit_record(agent.full_path / LOG_FILENAME, record, background=False)
     except Exception as e:
         print(f"Warning: Could not write to log file: {e}")
 
 
-def execute_agent(agent: Agent) -> int:
+def command_argv(command: str) -> list[str]:
+    """Split an ALIAS command into an argv list for direct execution.
+
+    Commands using shell syntax (pipes, redirections, variable expansion,
+    globbing, variable assignments or shell builtins) are wrapped in
+    ``/bin/sh -c`` so they keep working as before.
+
+    Args:
+    ----
+        command: The agent command from its ALIAS variable
+
+    Returns:
+    -------
+        The argv list to execute
+
+    """
+    shell_argv = ["/bin/sh", "-c", command]
+    if any(char in SHELL_METACHARACTERS for char in command):
+        return shell_argv
+
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        # Unbalanced quotes: let the shell report the error
+        return shell_argv
+
+    if not argv or argv[0] in SHELL_KEYWORDS or "=" in argv[0]:
+        return shell_argv
+
+    return argv
+
+
+def child_environment(agent: Agent) -> dict[str, str] | None:
+    """Build the environment of the agent process.
+
+    The selector environment is copied only when the agent adds variables;
+    None means the agent inherits it unchanged.
+    """
+    if not agent.env_vars:
+        return None
+    return {**os.environ, **agent.env_vars}
+
+
+def exec_agent(argv: list[str], env: dict[str, str] | None) -> int:
+    """Replace the selector process with the agent.
+
+    The selector's memory is released and signals and the exit code go
+    straight to the agent. Only returns if the program cannot be executed.
+    The agent inherits the selector environment when env is None.
+
+    Returns
+    -------
+        127 if the program could not be executed
+
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        if env is None:
+            os.execvp(argv[0], argv)
+        else:
+            os.execvpe(argv[0], argv, env)
+    except OSError as e:
+        print(f"\nError executing agent: {e}")
+    return 127
+
+
+def execute_agent(
+    agent: Agent, exec_mode: bool | None = None, record: bool | None = None
+) -> int:
     """Execute the selected agent with its environment variables.
 
     The command is executed in the current directory (not changed to agent's directory).
     Environment variables from the agent's .env are added to the process environment.
 
+    In exec mode the selector process is replaced by the agent (see exec_agent),
+    so this function only returns if the agent could not be started.
+
+    PREWARM agents run their resolved npx/uvx binary directly (see src.prewarm).
+
+    With AI_SELECTOR_HEALTH=1 an agent whose program is not installed is not
+    launched (see src.health).
+
+    When recording, the agent runs under a pseudo-terminal and its output is
+    saved to a recording file (see src.recording); exec mode is ignored.
+
     Args:
     ----
         agent: The agent to execute
+        exec_mode: Replace the selector process, AI_SELECTOR_EXEC by default
+        record: Record the session, AI_SELECTOR_RECORD by default
 
     Returns:
     -------
         Exit code from the agent process
 
     """
+    settings = get_settings()
+    if settings.health_check:
+        # Imported here to avoid a circular import (health uses this module)
+        from .health import unavailable_agents
+
+        missing = unavailable_agents([agent]).get(agent.name)
+        if missing is not None:
+            print(f"Error executing agent: {missing} not found")
+            return 127
+
     # Get current directory before clearing screen
     current_dir = os.getcwd()
-
-    # Log the execution
-    log_execution(agent, current_dir)
+    started = time.monotonic()
+    launch_id: str | None = None
 
     # Clear the screen
     clear_screen()
@@ -81,28 +215,75 @@ def execute_agent(agent: Agent) -> int:
     print(f"{'=' * 60}\n")
 
     try:
-        # Prepare environment: copy current environment and add agent's variables
-        env = os.environ.copy()
-        env.update(agent.env_vars)
+        # Current environment plus the agent's variables, built once
+        env = child_environment(agent)
+
+        resolved: list[str] | None = None
+        if agent.prewarm:
+            with metrics.stage("resolve"):
+                resolved = resolve_command(agent)
+
+        if record is None:
+            record = settings.record
+        if record:
+            # Imported here: pty and gzip are only needed to record
+            from .recording import record_session, recording_path
+
+            path = recording_path(agent.name)
+            # Written now: forking the pty with the log thread running is unsafe
+            launch_id = log_execution(agent, current_dir, background=False)
+            record_launch(agent.name)
+            exit_code = record_session(
+                resolved or command_argv(agent.command), env, path, title=agent.name
+            )
+            log_exit(agent, launch_id, exit_code, time.monotonic() - started)
+            print(f"\nSession recorded to {path}")
+            return exit_code
+
+        if exec_mode is None:
+            exec_mode = settings.exec_mode
+        if exec_mode:
+            # Written now: exit handlers do not run once the process is replaced
+            log_execution(agent, current_dir, background=False)
+            record_launch(agent.name)
+            return exec_agent(resolved or command_argv(agent.command), env)
 
         # Execute command in current directory with agent's environment
         # Use shell=True to support shell syntax in commands
-        result = subprocess.run(
-            agent.command,
-            shell=True,
-            env=env,
-            # Inherit stdin, stdout, stderr to allow full interactivity
-            stdin=sys.stdin,
-            stdout=sys.stdout,
-            stderr=sys.stderr,
-        )
-
-        return result.returncode
+        with metrics.stage("spawn"):
+            process = subprocess.Popen(
+                resolved or agent.command,
+                shell=resolved is None,
+                env=env,
+                # Inherit stdin, stdout, stderr to allow full interactivity
+                stdin=sys.stdin,
+                stdout=sys.stdout,
+                stderr=sys.stderr,
+            )
+
+        # Log the execution once the agent is running, with the startup timings
+        launch_id = log_execution(agent, current_dir)
+        record_launch(agent.name)
+
+        with process:
+            try:
+                exit_code = process.wait()
+            except KeyboardInterrupt:
+                process.kill()
+                raise
+
+        log_exit(agent, launch_id, exit_code, time.monotonic() - started)
+        return exit_code
 
     except KeyboardInterrupt:
         print("\n\nAgent execution interrupted by user.")
+        if launch_id is not None:
+            log_exit(agent, launch_id, 130, time.monotonic() - started)
         return 130  # Standard exit code for SIGINT
 
     except Exception as e:
         print(f"\nError executing agent: {e}")
+        if launch_id is None:
+            launch_id = log_execution(agent, current_dir)
+        log_exit(agent, launch_id, 1, time.monotonic() - started)
         return 1
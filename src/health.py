@@ -0,0 +1,191 @@
+"""Agent health pre-check: find agents whose command is not installed.
+
+With ``AI_SELECTOR_HEALTH=1`` the program each ALIAS runs (its first word)
+is looked up in the agent's ``node_modules/.bin`` and ``.venv/bin`` and on
+PATH before the menu is shown, and agents whose program is missing are
+listed as disabled. Lookups run in a thread pool and the menu never waits
+for them longer than ``AI_SELECTOR_HEALTH_BUDGET_MS``; agents not checked in
+time are assumed to be available.
+
+Results are cached in ``$XDG_CACHE_HOME/ai-selector/health.json`` for the
+current PATH. A found program is trusted until its mtime changes or it goes
+away; a missing one until a directory it was looked up in changes (which is
+what installing it does).
+"""
+
+import json
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .cache import Signature, get_cache_dir, stat_signature, write_private_json
+from .config import Agent, get_settings
+from .executor import command_argv
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+CACHE_VERSION = 1
+
+# Directories of an agent searched before PATH
+AGENT_BIN_DIRS = (Path("node_modules", ".bin"), Path(".venv", "bin"))
+
+
+def health_cache_path() -> Path:
+    """Get the path of the health check cache."""
+    return get_cache_dir() / "health.json"
+
+
+def command_program(command: str) -> str | None:
+    """Get the program an ALIAS command runs, or None if only a shell knows."""
+    argv = command_argv(command)
+    if argv[:2] == ["/bin/sh", "-c"]:
+        return None
+    return argv[0]
+
+
+def _path_dirs(path: str) -> list[Path]:
+    return [Path(item) for item in path.split(os.pathsep) if item]
+
+
+def _is_executable(path: Path) -> bool:
+    return path.is_file() and os.access(path, os.X_OK)
+
+
+def resolve_program(program: str, agent_dir: Path, path: str) -> Path | None:
+    """Find program in the agent's bin directories or on path.
+
+    Programs given with a directory (``./run.sh``, ``~/bin/agent``) are
+    checked as they are.
+    """
+    if "/" in program:
+        candidate = Path(program).expanduser()
+        return candidate if _is_executable(candidate) else None
+
+    for directory in [agent_dir / d for d in AGENT_BIN_DIRS] + _path_dirs(path):
+        candidate = directory / program
+        if _is_executable(candidate):
+            return candidate
+    return None
+
+
+def _signature(path: Path) -> list[int] | None:
+    # JSON turns the signature tuples into lists
+    sig: Signature | None = stat_signature(path)
+    return list(sig) if sig else None
+
+
+def _local_dirs(agent_dir: Path) -> dict[str, list[int] | None]:
+    return {str(d): _signature(agent_dir / d) for d in AGENT_BIN_DIRS}
+
+
+def _check(agent: Agent, program: str, path: str) -> dict[str, Any]:
+    """Resolve the agent's program and build its cache entry."""
+    binary = resolve_program(program, agent.full_path, path)
+    return {
+        "command": agent.command,
+        "binary": None if binary is None else str(binary),
+        "sig": None if binary is None else _signature(binary),
+        "dirs": _local_dirs(agent.full_path),
+    }
+
+
+def _is_valid(entry: Any, agent: Agent, path_fresh: bool) -> bool:
+    try:
+        if entry["command"] != agent.command:
+            return False
+        if entry["binary"] is not None:
+            sig = _signature(Path(entry["binary"]))
+            return sig is not None and sig == entry["sig"]
+        return path_fresh and entry["dirs"] == _local_dirs(agent.full_path)
+    except (KeyError, TypeError):
+        return False
+
+
+def _load_cache(path: str) -> dict[str, Any]:
+    try:
+        data = json.loads(health_cache_path().read_text(encoding="utf-8"))
+        if data["version"] == CACHE_VERSION and data["path"] == path:
+            return dict(data)
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return {}
+
+
+def unavailable_agents(
+    agents: Iterable[Agent], budget: float | None = None
+) -> dict[str, str]:
+    """Find the agents whose program is not installed.
+
+    Args:
+    ----
+        agents: The agents to check
+        budget: Seconds to wait for uncached lookups, AI_SELECTOR_HEALTH_BUDGET_MS
+            by default
+
+    Returns:
+    -------
+        Agent name -> missing program, for the agents known to be broken
+
+    """
+    settings = get_settings()
+    if budget is None:
+        budget = settings.health_budget_ms / 1000
+    path = os.getenv("PATH", os.defpath)
+    cache = _load_cache(path)
+    entries: dict[str, Any] = dict(cache.get("agents") or {})
+    path_dirs = {str(d): _signature(d) for d in _path_dirs(path)}
+    path_fresh = cache.get("path_dirs") == path_dirs
+
+    missing: dict[str, str] = {}
+    pending: list[tuple[Agent, str]] = []
+    for agent in agents:
+        program = command_program(agent.command)
+        if program is None:
+            continue
+        entry: Any = entries.get(str(agent.full_path))
+        if not _is_valid(entry, agent, path_fresh):
+            pending.append((agent, program))
+        elif entry["binary"] is None:
+            missing[agent.name] = program
+
+    if not pending and path_fresh:
+        return missing
+
+    # Imported here: the selector loads this module on every launch
+    from concurrent.futures import ThreadPoolExecutor, wait
+
+    pool = ThreadPoolExecutor(max_workers=settings.workers)
+    futures: "dict[Future[dict[str, Any]], tuple[Agent, str]]" = {
+        pool.submit(_check, agent, program, path): (agent, program)
+        for agent, program in pending
+    }
+    done, _ = wait(futures, timeout=budget)
+    # Lookups still running finish in the background; their result is lost
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    for future, (agent, program) in futures.items():
+        key = str(agent.full_path)
+        try:
+            entry = future.result() if future in done else None
+        except OSError:
+            entry = None
+        if entry is None:
+            # Checked again next time (a stale entry could be trusted otherwise)
+            entries.pop(key, None)
+            continue
+        entries[key] = entry
+        if entry["binary"] is None:
+            missing[agent.name] = program
+
+    write_private_json(
+        health_cache_path(),
+        {
+            "version": CACHE_VERSION,
+            "path": path,
+            "path_dirs": path_dirs,
+            "agents": entries,
+        },
+    )
+    return missing
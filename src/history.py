@@ -0,0 +1,447 @@
+"""Structured execution log and history queries for AI Agent Selector.
+
+Every launch appends JSON lines to ``agent-execution.jsonl`` in the agent's
+directory: a ``launch`` record when the agent starts and an ``exit`` record,
+sharing the same id, with its exit code and duration when it finishes. Logs
+are rotated by size and age, and read back as streams so multi-hundred-MB
+histories never have to fit in memory.
+
+Many terminals may launch the same agent at once, so each record is
+appended with a single ``O_APPEND`` write of at most MAX_RECORD_BYTES and
+lands whole, never interleaved with another. Launch records are written by a
+background thread (see submit_record()) so logging adds no latency before
+the agent starts.
+"""
+
+import argparse
+import atexit
+import fcntl
+import heapq
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from .config import agent_directories, get_settings
+from .search import match_names
+
+LOG_FILENAME = "agent-execution.jsonl"
+
+# Launch records kept waiting for their exit record before being emitted as
+# unfinished (sessions killed without logging an exit never get one)
+MAX_PENDING_LAUNCHES = 1000
+
+# Largest record written to a log: up to PIPE_BUF, so that a single O_APPEND
+# write() is never split or interleaved with the writes of other processes
+MAX_RECORD_BYTES = 4096
+
+# Fields dropped, in this order, from records larger than MAX_RECORD_BYTES
+TRUNCATED_FIELDS = ("timings", "env", "command", "cwd")
+
+# Seconds the selector waits at exit for records still being written
+FLUSH_TIMEOUT = 5.0
+
+
+def timestamp() -> str:
+    """Get the current local time as used in log records."""
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _backup_path(log_file: Path, number: int) -> Path:
+    return log_file.with_name(f"{log_file.name}.{number}")
+
+
+def _first_timestamp(log_file: Path) -> datetime | None:
+    """Get the timestamp of the first record of a log file."""
+    try:
+        with open(log_file, encoding="utf-8") as f:
+            return datetime.fromisoformat(json.loads(f.readline())["ts"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def rotate_log(log_file: Path) -> None:
+    """Rotate log_file if it exceeds the configured size or age.
+
+    The current file becomes ``<name>.1``, older backups shift by one and
+    those beyond AI_SELECTOR_LOG_BACKUPS, or older than
+    AI_SELECTOR_LOG_MAX_AGE_DAYS, are deleted.
+    """
+    settings = get_settings()
+    try:
+        stat = os.stat(log_file)
+    except OSError:
+        return
+
+    size = stat.st_size
+    max_age = settings.log_max_age_days * 86400
+    too_big = settings.log_max_bytes and size >= settings.log_max_bytes
+    first = _first_timestamp(log_file) if max_age else None
+    too_old = first is not None and time.time() - first.timestamp() > max_age
+    if not (too_big or too_old):
+        return
+
+    # Concurrent launches may decide to rotate at once: only the one that
+    # locks the file while it is still the current log rotates it
+    try:
+        fd = os.open(log_file, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            current = os.path.samestat(stat, os.fstat(fd)) and os.path.samestat(
+                stat, os.stat(log_file)
+            )
+        except OSError:
+            current = False
+        if current:
+            _shift_backups(log_file)
+    finally:
+        os.close(fd)
+
+
+def _shift_backups(log_file: Path) -> None:
+    """Make log_file the first backup, deleting the backups in excess."""
+    settings = get_settings()
+    max_age = settings.log_max_age_days * 86400
+
+    # Shift the backups: .1 -> .2, ... and the current file becomes .1
+    backups = settings.log_backups
+    _backup_path(log_file, max(backups, 1)).unlink(missing_ok=True)
+    for number in range(backups - 1, 0, -1):
+        backup = _backup_path(log_file, number)
+        if backup.exists():
+            backup.replace(_backup_path(log_file, number + 1))
+    if backups:
+        log_file.replace(_backup_path(log_file, 1))
+    else:
+        log_file.unlink()
+
+    if not max_age:
+        return
+    for number in range(1, backups + 1):
+        backup = _backup_path(log_file, number)
+        try:
+            if time.time() - backup.stat().st_mtime > max_age:
+                backup.unlink()
+        except OSError:
+            continue
+
+
+def encode_record(record: dict[str, Any]) -> bytes:
+    """Serialize a record as a JSON line of at most MAX_RECORD_BYTES.
+
+    Larger records lose their TRUNCATED_FIELDS, one at a time, and are
+    marked with ``"truncated": true``.
+
+    Raises
+    ------
+        ValueError if the record is too large even without those fields
+
+    """
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    if len(line) <= MAX_RECORD_BYTES:
+        return line
+
+    record = {**record, "truncated": True}
+    for field in TRUNCATED_FIELDS:
+        record.pop(field, None)
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        if len(line) <= MAX_RECORD_BYTES:
+            return line
+    raise ValueError(f"log record larger than {MAX_RECORD_BYTES} bytes")
+
+
+def _append_lines(log_file: Path, lines: list[bytes]) -> None:
+    """Append encoded records to log_file, one write() each, rotating it first."""
+    rotate_log(log_file)
+    fd = os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        for line in lines:
+            if os.write(fd, line) != len(line):
+                raise OSError(f"short write to {log_file}")
+    finally:
+        os.close(fd)
+
+
+def append_record(log_file: Path, record: dict[str, Any]) -> None:
+    """Append a record to log_file as a single JSON line, rotating it first."""
+    _append_lines(log_file, [encode_record(record)])
+
+
+class LogWriter:
+    """Background thread appending records to execution logs.
+
+    The thread runs only while records are pending, so none is left behind
+    (e.g. when forking). Records queued while a batch is being written are
+    written together, opening each log once per batch.
+    """
+
+    def __init__(self) -> None:
+        """Create an idle writer."""
+        self._queue: queue.SimpleQueue[tuple[Path, bytes]] = queue.SimpleQueue()
+        self._pending = 0
+        self._running = False
+        self._idle = threading.Condition()
+
+    def submit(self, log_file: Path, line: bytes) -> None:
+        """Queue an encoded record to be appended to log_file."""
+        with self._idle:
+            self._pending += 1
+            self._queue.put((log_file, line))
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, name="log", daemon=True).start()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait up to timeout seconds for the queue to be written; True if it was."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines: dict[Path, list[bytes]] = {}
+            for log_file, line in batch:
+                lines.setdefault(log_file, []).append(line)
+            for log_file, file_lines in lines.items():
+                try:
+                    _append_lines(log_file, file_lines)
+                except Exception as e:
+                    print(f"Warning: Could not write to log file: {e}", file=sys.stderr)
+
+            with self._idle:
+                self._pending -= len(batch)
+                if not self._pending:
+                    self._running = False
+                    self._idle.notify_all()
+                    return
+
+
+_writer: LogWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def submit_record(
+    log_file: Path, record: dict[str, Any], background: bool = True
+) -> None:
+    """Append a record to log_file, in the background with AI_SELECTOR_LOG_ASYNC.
+
+    Records are written in the order they are submitted; background=False
+    writes this one before returning (still after those queued). Call
+    flush_records() before replacing the process (os.exec*); they are also
+    flushed when the selector exits.
+
+    Raises
+    ------
+        ValueError if the record is too large; OSError if it cannot be
+        written synchronously
+
+    """
+    global _writer
+    line = encode_record(record)
+    if not (background and get_settings().log_async):
+        flush_records()
+        _append_lines(log_file, [line])
+        return
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = LogWriter()
+            atexit.register(flush_records)
+    _writer.submit(log_file, line)
+
+
+def flush_records(timeout: float | None = FLUSH_TIMEOUT) -> bool:
+    """Wait for the records submitted in the background to be written.
+
+    Returns
+    -------
+        False if some were still pending after timeout seconds
+
+    """
+    return _writer is None or _writer.flush(timeout)
+
+
+def log_files(agent_dir: Path) -> list[Path]:
+    """List the log files of an agent directory, oldest first."""
+    log_file = agent_dir / LOG_FILENAME
+    backups: list[Path] = []
+    number = 1
+    while (backup := _backup_path(log_file, number)).exists():
+        backups.append(backup)
+        number += 1
+    return [*reversed(backups), log_file]
+
+
+def iter_records(paths: Iterable[Path]) -> Iterator[dict[str, Any]]:
+    """Stream the records of the given log files line by line.
+
+    Missing files and lines that are not JSON records (e.g. from the old
+    plain-text log format) are skipped.
+    """
+    for path in paths:
+        try:
+            f = open(path, encoding="utf-8")
+        except OSError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and "ts" in record:
+                    yield record
+
+
+def join_sessions(records: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    """Merge launch records with their exit records, in launch order.
+
+    Yields one session per launch record; exit_code and duration are None for
+    sessions without an exit record (still running, killed or exec mode).
+    """
+    pending: OrderedDict[str, dict[str, Any]] = OrderedDict()
+    finished: set[str] = set()
+
+    def flush(force: bool) -> Iterator[dict[str, Any]]:
+        while pending:
+            launch_id, session = next(iter(pending.items()))
+            if not (force or launch_id in finished):
+                return
+            pending.popitem(last=False)
+            finished.discard(launch_id)
+            yield session
+
+    for record in records:
+        event = record.get("event")
+        launch_id = str(record.get("id"))
+        if event == "launch":
+            pending[launch_id] = {**record, "exit_code": None, "duration": None}
+            if len(pending) > MAX_PENDING_LAUNCHES:
+                # The oldest launch will never see its exit record
+                oldest_id, session = pending.popitem(last=False)
+                finished.discard(oldest_id)
+                yield session
+        elif event == "exit" and launch_id in pending:
+            pending[launch_id]["exit_code"] = record.get("exit_code")
+            pending[launch_id]["duration"] = record.get("duration")
+            finished.add(launch_id)
+            yield from flush(force=False)
+
+    yield from flush(force=True)
+
+
+def iter_sessions(
+    agent_dirs: Iterable[Path],
+    agent: str | None = None,
+    cwd: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Stream the sessions of several agents merged in chronological order.
+
+    Args:
+    ----
+        agent_dirs: Directories of the agents whose logs are read
+        agent: Only sessions of this agent name
+        cwd: Only sessions launched from this directory or below
+        since: Only sessions launched at or after this time
+        until: Only sessions launched before this time
+
+    Returns:
+    -------
+        Iterator over session records
+
+    """
+    streams = [join_sessions(iter_records(log_files(d))) for d in agent_dirs]
+    since_ts = since.isoformat(timespec="seconds") if since else None
+    until_ts = until.isoformat(timespec="seconds") if until else None
+    cwd_prefix = cwd.rstrip("/") if cwd else None
+
+    for session in heapq.merge(*streams, key=lambda s: str(s["ts"])):
+        if agent is not None and session.get("agent") != agent:
+            continue
+        if cwd_prefix is not None:
+            session_cwd = str(session.get("cwd", ""))
+            if session_cwd != cwd_prefix and not session_cwd.startswith(
+                cwd_prefix + "/"
+            ):
+                continue
+        if since_ts is not None and session["ts"] < since_ts:
+            continue
+        if until_ts is not None and session["ts"] >= until_ts:
+            continue
+        yield session
+
+
+def format_session(session: dict[str, Any]) -> str:
+    """Format a session as a single human-readable line."""
+    ts = str(session["ts"]).replace("T", " ")
+    exit_code = session.get("exit_code")
+    duration = session.get("duration")
+    status = "running/unknown" if exit_code is None else f"exit {exit_code}"
+    took = "" if duration is None else f"{duration:.1f}s"
+    return (
+        f"{ts}  {session.get('agent', '?'):<20} {status:<15} {took:>9}  "
+        f"{session.get('cwd', '')}"
+    )
+
+
+def history_command(argv: list[str]) -> int:
+    """Run the ``ai-selector history`` subcommand."""
+    parser = argparse.ArgumentParser(
+        prog="ai-selector history",
+        description="Show past agent launches from the execution logs.",
+    )
+    parser.add_argument("--agent", help="only this agent (name or prefix)")
+    parser.add_argument("--cwd", help="only launches from this directory or below")
+    parser.add_argument(
+        "--since", type=datetime.fromisoformat, help="YYYY-MM-DD[THH:MM:SS]"
+    )
+    parser.add_argument(
+        "--until", type=datetime.fromisoformat, help="YYYY-MM-DD[THH:MM:SS]"
+    )
+    parser.add_argument("-n", "--limit", type=int, help="only the last N launches")
+    parser.add_argument("--json", action="store_true", help="print JSON lines")
+    args = parser.parse_args(argv)
+
+    directories = agent_directories()
+    names = list(directories)
+    agent = None
+    if args.agent:
+        matches = match_names(args.agent, names)
+        if len(matches) != 1:
+            print(f"'{args.agent}' does not match a single agent.")
+            return 1
+        agent = matches[0]
+        names = [agent]
+
+    sessions: Iterable[dict[str, Any]] = iter_sessions(
+        (directories[name] for name in names),
+        agent=agent,
+        cwd=str(Path(args.cwd).expanduser().resolve()) if args.cwd else None,
+        since=args.since,
+        until=args.until,
+    )
+    if args.limit is not None:
+        sessions = deque(sessions, maxlen=args.limit)
+
+    for session in sessions:
+        print(json.dumps(session) if args.json else format_session(session))
+
+    return 0
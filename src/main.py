@@ -1,33 +1,253 @@
 #!/usr/bin/env python3
 """AI Agent Selector - Interactive CLI for selecting and running AI agents."""
 
+import argparse
+import importlib
 import sys
+from typing import TYPE_CHECKING
 
-from src.config import discover_agents
+from src import metrics
+from src.config import (
+    Agent,
+    discover_agents,
+    get_settings,
+    list_agent_names,
+    load_agent,
+)
+from src.daemon import query_daemon, socket_path
 from src.executor import execute_agent
-from src.selector import select_agent
+from src.search import match_names
+from src.selector import display_logo, select_agent, select_agent_live
+from src.terminal import is_tty
 
+if TYPE_CHECKING:
+    from src.stream import DiscoveryStream
 
-def main() -> int:
+# Subcommands, checked before parsing (use "ai-selector -- <name>" to launch an
+# agent whose name clashes with one of them), as "module:function" so that a
+# module is only imported when its subcommand runs
+COMMANDS = {
+    "daemon": "src.daemon:daemon_command",
+    "history": "src.history:history_command",
+    "recordings": "src.recording:recordings_command",
+    "run-many": "src.batch:run_many_command",
+    "stats": "src.metrics:stats_command",
+    "verify-env": "src.envcache:verify_env_command",
+}
+
+
+# Seconds to wait for a stopped discovery to end before recording a session
+STOP_TIMEOUT = 1.0
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="ai-selector",
+        description="Interactive CLI for selecting and running AI agents.",
+        epilog=f"subcommands: {', '.join(COMMANDS)} (see ai-selector <command> -h)",
+    )
+    parser.add_argument(
+        "agent",
+        nargs="?",
+        help="launch this agent directly (exact name, prefix or abbreviation)",
+    )
+    parser.add_argument(
+        "--exec",
+        dest="exec_mode",
+        action="store_true",
+        default=None,
+        help="replace the selector process with the agent (AI_SELECTOR_EXEC=1)",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        default=None,
+        help="record the session under a pseudo-terminal (AI_SELECTOR_RECORD=1)",
+    )
+    return parser.parse_args(argv)
+
+
+def run_command(name: str, argv: list[str]) -> int:
+    """Import the subcommand name and run it with argv."""
+    module, _, function = COMMANDS[name].partition(":")
+    command = getattr(importlib.import_module(module), function)
+    return int(command(argv))
+
+
+def load_agents() -> list[Agent]:
+    """Get the agents from the daemon when one is running, else scan for them."""
+    if get_settings().use_daemon:
+        result = query_daemon()
+        if result is not None:
+            agents, warnings = result
+            for warning in warnings:
+                print(warning)
+            return agents
+
+    return discover_agents()
+
+
+def start_live_discovery() -> "DiscoveryStream | None":
+    """Start discovering the agents in the background, to show the menu early.
+
+    Only with AI_SELECTOR_LIVE, in a terminal, and when no daemon is
+    listening (it answers at once).
+    """
+    settings = get_settings()
+    if not (settings.live_discovery and is_tty(sys.stdin) and is_tty(sys.stdout)):
+        return None
+    if settings.use_daemon and socket_path(settings).exists():
+        return None
+
+    # Imported here: asyncio is only needed for the live menu
+    from src.stream import DiscoveryStream
+
+    return DiscoveryStream()
+
+
+def report_no_agents() -> None:
+    """Explain that no agent was found."""
+    print("No agents found in the configured directory.")
+    print("Agents must have a .env file with an ALIAS variable.")
+    print("Check AI_AGENTS_DIR environment variable.")
+
+
+def stream_result(stream: "DiscoveryStream") -> list[Agent]:
+    """Get the agents of a finished discovery, printing its warnings."""
+    agents, warnings = stream.result()
+    for warning in warnings:
+        print(warning)
+    return agents
+
+
+def select_live(stream: "DiscoveryStream") -> Agent | None:
+    """Show the menu while discovery goes on (see select_agent_live()).
+
+    The pick is resolved by name to the agent the scan confirmed, which
+    follows the precedence of the roots; an agent picked before the scan
+    confirmed it is loaded again, as the discovery index it comes from may
+    be out of date.
+    """
+    try:
+        selected = select_agent_live(stream)
+    finally:
+        finished = stream.wait(0)
+        # Whatever was chosen, the rest of the scan is not needed
+        stream.stop()
+    if finished:
+        stream_result(stream)
+    if selected is None:
+        return None
+
+    agent = stream.found(selected.name)
+    if agent is not None:
+        return agent
+    agent = load_agent(selected.name)
+    if agent is None:
+        print(f"Agent '{selected.name}' is no longer available.")
+    return agent
+
+
+def launch_by_name(
+    query: str, exec_mode: bool | None = None, record: bool | None = None
+) -> int:
+    """Launch the agent matching query without showing the menu.
+
+    Only the matched agent's .env file is parsed.
+
+    Args:
+    ----
+        query: Agent name, prefix or abbreviation
+        exec_mode: Replace the selector process with the agent
+        record: Record the session
+
+    Returns:
+    -------
+        Exit code from the agent process, or 1 if no single agent matches
+
+    """
+    with metrics.stage("discovery"):
+        matches = match_names(query, list_agent_names())
+
+        if not matches:
+            print(f"No agent matches '{query}'.")
+            return 1
+
+        if len(matches) > 1:
+            print(f"'{query}' matches several agents: {', '.join(matches)}")
+            return 1
+
+        agent = load_agent(matches[0])
+
+    if agent is None:
+        return 1
+
+    return execute_agent(agent, exec_mode=exec_mode, record=record)
+
+
+def main(argv: list[str] | None = None) -> int:
     """Run the main application logic."""
+    metrics.reset()
+    argv = sys.argv[1:] if argv is None else argv
+
     try:
-        # Discover agents by scanning for .env files
-        available_agents = discover_agents()
+        if argv and argv[0] in COMMANDS:
+            return run_command(argv[0], argv[1:])
 
-        if not available_agents:
-            print("No agents found in the configured directory.")
-            print("Agents must have a .env file with an ALIAS variable.")
-            print("Check AI_AGENTS_DIR environment variable.")
+        args = parse_args(argv)
+
+        if args.agent:
+            return launch_by_name(
+                args.agent, exec_mode=args.exec_mode, record=args.record
+            )
+
+        # Show the logo first, so the screen is not blank during discovery
+        display_logo()
+
+        # Discover agents by scanning for .env files; when that takes long the
+        # menu is shown while the scan goes on, with the agents found so far
+        available_agents: list[Agent] | None = None
+        with metrics.stage("discovery"):
+            stream = start_live_discovery()
+            if stream is None:
+                available_agents = load_agents()
+            elif stream.wait(get_settings().live_after_ms / 1000):
+                available_agents = stream_result(stream)
+
+        if available_agents is not None and not available_agents:
+            report_no_agents()
             return 1
 
         # Show interactive selector
-        selected_agent = select_agent(available_agents)
+        with metrics.stage("selection"):
+            if available_agents is None:
+                assert stream is not None
+                selected_agent = select_live(stream)
+                if (
+                    selected_agent is None
+                    and stream.wait(0)
+                    and not stream.cancelled
+                    and not stream.result()[0]
+                ):
+                    report_no_agents()
+                    return 1
+            else:
+                selected_agent = select_agent(available_agents)
 
         if selected_agent is None:
             return 0  # User cancelled
 
+        record = get_settings().record if args.record is None else args.record
+        if available_agents is None and record:
+            # The pty must not be forked while scanning threads are running
+            assert stream is not None
+            stream.wait(STOP_TIMEOUT)
+
         # Execute the selected agent (environment vars already loaded in Agent)
-        exit_code = execute_agent(selected_agent)
+        exit_code = execute_agent(
+            selected_agent, exec_mode=args.exec_mode, record=args.record
+        )
 
         return exit_code
 
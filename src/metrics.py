@@ -0,0 +1,145 @@
+"""Startup instrumentation and usage statistics for AI Agent Selector.
+
+Stages of the launch path (discovery, selection, spawn) are timed with a
+monotonic clock and stored in the launch record of the execution log, so
+``ai-selector stats`` can report the selector's own overhead next to the
+agents' session counts and durations.
+"""
+
+import argparse
+import math
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any
+
+from .config import agent_directories
+from .history import iter_sessions
+
+# Start of the launch path, reset by main() (module import time by default)
+_origin = time.monotonic()
+_stages: dict[str, float] = {}
+
+
+def reset() -> None:
+    """Start timing a new launch."""
+    global _origin
+    _origin = time.monotonic()
+    _stages.clear()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as the named stage."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        _stages[name] = _stages.get(name, 0.0) + time.monotonic() - started
+
+
+def snapshot() -> dict[str, float]:
+    """Get the stage timings so far, in seconds.
+
+    ``overhead`` is the time spent by the selector since the launch started,
+    excluding the time the user spent in the menu.
+    """
+    elapsed = time.monotonic() - _origin
+    timings = {name: round(seconds, 6) for name, seconds in _stages.items()}
+    timings["overhead"] = round(elapsed - _stages.get("selection", 0.0), 6)
+    return timings
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Get the pct percentile of values (nearest-rank on sorted values)."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(sessions: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Aggregate sessions into startup overhead and per-agent statistics.
+
+    Returns
+    -------
+        Dict with ``overhead`` (p50/p95 in seconds) and ``agents`` (per agent
+        session count, total and median duration)
+
+    """
+    # Imported here: this module is loaded on every launch to time it
+    import statistics
+
+    overheads: list[float] = []
+    agents: dict[str, dict[str, Any]] = {}
+
+    for session in sessions:
+        timings = session.get("timings") or {}
+        if isinstance(timings.get("overhead"), (int, float)):
+            overheads.append(float(timings["overhead"]))
+
+        stats = agents.setdefault(
+            str(session.get("agent")), {"sessions": 0, "durations": []}
+        )
+        stats["sessions"] += 1
+        if isinstance(session.get("duration"), (int, float)):
+            stats["durations"].append(float(session["duration"]))
+
+    return {
+        "overhead": {
+            "samples": len(overheads),
+            "p50": percentile(overheads, 50) if overheads else None,
+            "p95": percentile(overheads, 95) if overheads else None,
+        },
+        "agents": {
+            name: {
+                "sessions": stats["sessions"],
+                "total_duration": sum(stats["durations"]),
+                "median_duration": (
+                    statistics.median(stats["durations"])
+                    if stats["durations"]
+                    else None
+                ),
+            }
+            for name, stats in sorted(agents.items())
+        },
+    }
+
+
+def _format_seconds(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    return f"{seconds:.1f}s"
+
+
+def stats_command(argv: list[str]) -> int:
+    """Run the ``ai-selector stats`` subcommand."""
+    parser = argparse.ArgumentParser(
+        prog="ai-selector stats",
+        description="Show startup overhead and per-agent session statistics.",
+    )
+    parser.add_argument(
+        "--since", type=datetime.fromisoformat, help="YYYY-MM-DD[THH:MM:SS]"
+    )
+    args = parser.parse_args(argv)
+
+    summary = summarize(iter_sessions(agent_directories().values(), since=args.since))
+
+    overhead = summary["overhead"]
+    print(
+        f"Startup overhead ({overhead['samples']} launches): "
+        f"p50 {_format_seconds(overhead['p50'])}, "
+        f"p95 {_format_seconds(overhead['p95'])}"
+    )
+    print()
+    print(f"{'Agent':<24} {'Sessions':>8} {'Total':>10} {'Median':>10}")
+    for name, stats in summary["agents"].items():
+        print(
+            f"{name:<24} {stats['sessions']:>8} "
+            f"{_format_seconds(stats['total_duration']):>10} "
+            f"{_format_seconds(stats['median_duration']):>10}"
+        )
+
+    return 0
@@ -0,0 +1,251 @@
+"""Search-as-you-type agent picker for large agent lists.
+
+Used by select_agent() when there are too many agents for a plain menu. The
+query is matched incrementally against a SearchIndex of the agent names and
+commands, and only the visible window of matches is rendered, so the picker
+stays responsive with thousands of agents. Agents can also be added while
+the picker is shown (see selector.select_agent_live()). prompt_toolkit is
+only imported by build_picker().
+"""
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
+
+from .config import Agent
+from .search import IncrementalSearch, SearchIndex
+
+if TYPE_CHECKING:
+    from prompt_toolkit.application import Application
+    from prompt_toolkit.formatted_text import StyleAndTextTuples
+    from prompt_toolkit.styles import BaseStyle
+
+# Number of matches shown at once
+DEFAULT_HEIGHT = 15
+
+
+class PickerState:
+    """Query, matches, selection and scroll position of the picker."""
+
+    def __init__(
+        self,
+        agents: list[Agent],
+        height: int = DEFAULT_HEIGHT,
+        disabled: Mapping[str, str] | None = None,
+    ) -> None:
+        """Index the agents, in the order they should be listed.
+
+        disabled maps the names of agents that cannot be chosen to the reason.
+        """
+        self.agents = agents
+        self.height = max(1, height)
+        self.disabled = disabled or {}
+        self.search = IncrementalSearch(
+            SearchIndex([a.name for a in agents], [a.command for a in agents])
+        )
+        self.matches = self.search.matches
+        self.selected = 0  # Position in matches
+        self.offset = 0  # First visible position in matches
+        self.scanning = False  # More agents may still be added
+
+    def add_agents(self, agents: list[Agent]) -> None:
+        """List more agents after the current ones, keeping the selection.
+
+        Agents whose name is already listed replace the listed ones.
+        """
+        positions = {agent.name: i for i, agent in enumerate(self.agents)}
+        new: list[Agent] = []
+        for agent in agents:
+            if agent.name in positions:
+                self.agents[positions[agent.name]] = agent
+            else:
+                positions[agent.name] = len(self.agents) + len(new)
+                new.append(agent)
+        if not new:
+            return
+        selected = self._selected_position()
+        self.agents.extend(new)
+        self.search.index.add([a.name for a in new], [a.command for a in new])
+        self.matches = self.search.refresh()
+        self._select_position(selected)
+
+    def set_agents(self, agents: list[Agent]) -> None:
+        """Replace the listed agents, keeping the query and the selection."""
+        selected = self._selected_position()
+        name = None if selected is None else self.agents[selected].name
+        query = self.search.query
+        self.agents = agents
+        self.search = IncrementalSearch(
+            SearchIndex([a.name for a in agents], [a.command for a in agents])
+        )
+        self.matches = self.search.update(query)
+        position = next((i for i, a in enumerate(agents) if a.name == name), None)
+        self._select_position(position)
+
+    def _selected_position(self) -> int | None:
+        return self.matches[self.selected] if self.matches else None
+
+    def _select_position(self, position: int | None) -> None:
+        """Select the agent at position of agents, if it matches the query."""
+        try:
+            selected = self.matches.index(position) if position is not None else 0
+        except ValueError:
+            selected = 0
+        self.selected = 0
+        self.offset = 0
+        self.move(selected)
+
+    def set_query(self, query: str) -> None:
+        """Update the matches for a new query and select the first one."""
+        self.matches = self.search.update(query)
+        self.selected = 0
+        self.offset = 0
+
+    def move(self, delta: int) -> None:
+        """Move the selection by delta entries, scrolling to keep it visible."""
+        if not self.matches:
+            return
+        self.selected = max(0, min(len(self.matches) - 1, self.selected + delta))
+        if self.selected < self.offset:
+            self.offset = self.selected
+        elif self.selected >= self.offset + self.height:
+            self.offset = self.selected - self.height + 1
+
+    def visible(self) -> list[tuple[Agent, bool]]:
+        """Get the agents in the visible window and whether each is selected."""
+        window = self.matches[self.offset : self.offset + self.height]
+        return [
+            (self.agents[position], self.offset + i == self.selected)
+            for i, position in enumerate(window)
+        ]
+
+    @property
+    def selected_agent(self) -> Agent | None:
+        """Get the currently selected agent, if any and not disabled."""
+        if not self.matches:
+            return None
+        agent = self.agents[self.matches[self.selected]]
+        return None if agent.name in self.disabled else agent
+
+    def render(self) -> "StyleAndTextTuples":
+        """Render the visible window as prompt_toolkit formatted text."""
+        fragments: StyleAndTextTuples = []
+        for agent, selected in self.visible():
+            pointer = " » " if selected else "   "
+            if agent.name in self.disabled:
+                fragments.append(("class:pointer" if selected else "", pointer))
+                fragments.append(
+                    ("class:disabled", f"{agent.name} ({self.disabled[agent.name]})")
+                )
+            elif selected:
+                fragments.append(("class:pointer", pointer))
+                fragments.append(("class:highlighted", agent.name))
+            else:
+                fragments.append(("class:text", f"{pointer}{agent.name}"))
+            fragments.append(("", "\n"))
+
+        counter = f"   {len(self.matches)}/{len(self.agents)}"
+        if self.scanning:
+            counter += " (searching for more agents...)"
+        fragments.append(("class:instruction", counter))
+        return fragments
+
+
+def pick_agent(
+    agents: list[Agent],
+    message: str = "Select an AI agent:",
+    style: "BaseStyle | None" = None,
+    height: int = DEFAULT_HEIGHT,
+    disabled: Mapping[str, str] | None = None,
+) -> Agent | None:
+    """Show the search picker and return the chosen agent.
+
+    Args:
+    ----
+        agents: Agents, in the order they should be listed
+        message: Prompt shown before the query
+        style: prompt_toolkit style (class names as in the questionary menu)
+        height: Number of matches shown at once
+        disabled: Names of the agents that cannot be chosen, with the reason
+
+    Returns:
+    -------
+        Selected Agent or None if cancelled
+
+    """
+    state = PickerState(agents, height, disabled)
+    return build_picker(state, message, style).run()
+
+
+def build_picker(
+    state: PickerState,
+    message: str = "Select an AI agent:",
+    style: "BaseStyle | None" = None,
+) -> "Application[Agent | None]":
+    """Build the picker application for state (see pick_agent()).
+
+    The application can be run with run() or, next to other tasks that
+    update state (redrawing it with invalidate()), with run_async().
+    """
+    from prompt_toolkit.application import Application
+    from prompt_toolkit.buffer import Buffer
+    from prompt_toolkit.key_binding import KeyBindings, KeyPressEvent
+    from prompt_toolkit.layout import HSplit, Layout, Window
+    from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
+    from prompt_toolkit.layout.processors import BeforeInput
+
+    prompt: StyleAndTextTuples = [
+        ("class:qmark", "? "),
+        ("class:question", message),
+        ("", " "),
+    ]
+    query = Buffer(multiline=False)
+    query.on_text_changed += lambda buffer: state.set_query(buffer.text)
+
+    bindings = KeyBindings()
+
+    @bindings.add("up")
+    @bindings.add("c-p")
+    def _up(event: KeyPressEvent) -> None:
+        state.move(-1)
+
+    @bindings.add("down")
+    @bindings.add("c-n")
+    def _down(event: KeyPressEvent) -> None:
+        state.move(1)
+
+    @bindings.add("pageup")
+    def _page_up(event: KeyPressEvent) -> None:
+        state.move(-state.height)
+
+    @bindings.add("pagedown")
+    def _page_down(event: KeyPressEvent) -> None:
+        state.move(state.height)
+
+    @bindings.add("enter")
+    def _accept(event: KeyPressEvent) -> None:
+        if state.selected_agent is not None:
+            event.app.exit(result=state.selected_agent)
+
+    @bindings.add("c-c")
+    @bindings.add("escape", eager=True)
+    def _cancel(event: KeyPressEvent) -> None:
+        event.app.exit(result=None)
+
+    layout = Layout(
+        HSplit(
+            [
+                Window(
+                    BufferControl(
+                        query,
+                        input_processors=[BeforeInput(prompt)],
+                    ),
+                    height=1,
+                ),
+                Window(FormattedTextControl(state.render), height=state.height + 1),
+            ]
+        )
+    )
+
+    return Application(
+        layout=layout, key_bindings=bindings, style=style, erase_when_done=True
+    )
@@ -0,0 +1,234 @@
+"""Warm start for agents launched through npx or uvx.
+
+An agent whose .env sets ``PREWARM=1`` and whose ALIAS is a plain
+``npx <package>`` or ``uvx <package>`` command is launched by executing the
+package binary directly, skipping the wrapper's package resolution and, for
+npx, a whole extra Node process. The binary is looked up once:
+
+- npx: the package installed in the agent's ``node_modules`` (its bin entry
+  under ``node_modules/.bin``)
+- uvx: the command in the agent's ``.venv/bin`` or in the package installed
+  with ``uv tool install``
+
+and the resolution is cached in ``$XDG_CACHE_HOME/ai-selector/resolved.json``
+until one of the agent's manifests or lockfiles changes or the binary goes
+away. Commands that cannot be resolved (pinned versions that are not the
+installed ones, unknown wrapper options, packages not installed locally)
+keep running through the wrapper.
+"""
+
+import json
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from .cache import Signature, get_cache_dir, stat_signature, write_private_json
+from .config import Agent
+
+CACHE_VERSION = 1
+
+# Files whose change may install, remove or upgrade the wrapped package
+LOCKFILES = (
+    "package.json",
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "bun.lock",
+    "bun.lockb",
+    "pyproject.toml",
+    "uv.lock",
+)
+
+# Wrapper options that do not change which binary runs
+NPX_FLAGS = frozenset({"-y", "--yes", "--no-install", "--no", "-q", "--quiet"})
+UVX_FLAGS = frozenset({"-q", "--quiet", "--offline", "--no-progress"})
+
+
+def resolution_cache_path() -> Path:
+    """Get the path of the command resolution cache."""
+    return get_cache_dir() / "resolved.json"
+
+
+def _split_version(spec: str) -> tuple[str, str | None]:
+    """Split ``name@version`` (npm scopes start with @) or ``name==version``."""
+    if "==" in spec:
+        name, _, version = spec.partition("==")
+        return name, version
+    at = spec.rfind("@")
+    if at > 0:
+        return spec[:at], spec[at + 1 :]
+    return spec, None
+
+
+def _resolve_npx(agent_dir: Path, args: list[str]) -> list[str] | None:
+    while args and args[0] in NPX_FLAGS:
+        args = args[1:]
+    if not args or args[0].startswith("-"):
+        return None
+
+    package, version = _split_version(args[0])
+    try:
+        manifest = json.loads(
+            (agent_dir / "node_modules" / package / "package.json").read_text(
+                encoding="utf-8"
+            )
+        )
+        installed, bins = manifest.get("version"), manifest.get("bin")
+    except (OSError, ValueError, AttributeError):
+        return None
+    if version is not None and version != installed:
+        return None
+
+    # npx runs the package's only binary, or the one named after the package
+    short_name = package.rsplit("/", 1)[-1]
+    if isinstance(bins, str):
+        bin_name = short_name
+    elif isinstance(bins, dict) and len(bins) == 1:
+        bin_name = next(iter(bins))
+    elif isinstance(bins, dict) and short_name in bins:
+        bin_name = short_name
+    else:
+        return None
+
+    return _executable(agent_dir / "node_modules" / ".bin" / bin_name, args[1:])
+
+
+def _uv_tool_dir() -> Path:
+    tool_dir = os.getenv("UV_TOOL_DIR")
+    if tool_dir:
+        return Path(tool_dir).expanduser()
+    data_home = os.getenv("XDG_DATA_HOME") or "~/.local/share"
+    return Path(data_home).expanduser() / "uv" / "tools"
+
+
+def _resolve_uvx(agent_dir: Path, args: list[str]) -> list[str] | None:
+    package = None
+    while args and args[0].startswith("-"):
+        if args[0] == "--from" and len(args) > 1:
+            package, args = args[1], args[2:]
+        elif args[0] in UVX_FLAGS:
+            args = args[1:]
+        else:
+            return None
+    if not args:
+        return None
+
+    command, version = _split_version(args[0])
+    if version is not None:
+        return None
+    package = package or command
+    if package != _split_version(package)[0]:
+        return None  # --from with a pinned version
+
+    for candidate in (
+        agent_dir / ".venv" / "bin" / command,
+        _uv_tool_dir() / package / "bin" / command,
+    ):
+        argv = _executable(candidate, args[1:])
+        if argv is not None:
+            return argv
+    return None
+
+
+def _executable(path: Path, args: list[str]) -> list[str] | None:
+    if path.is_file() and os.access(path, os.X_OK):
+        return [str(path), *args]
+    return None
+
+
+def resolve_uncached(agent: Agent) -> list[str] | None:
+    """Resolve the agent command to its package binary, without the cache.
+
+    Returns
+    -------
+        The argv to execute, or None if the command must run as written
+
+    """
+    # Imported here to avoid a circular import (executor uses this module)
+    from .executor import command_argv
+
+    argv = command_argv(agent.command)
+    wrapper = os.path.basename(argv[0])
+    if wrapper == "npx":
+        return _resolve_npx(agent.full_path, argv[1:])
+    if wrapper == "uvx":
+        return _resolve_uvx(agent.full_path, argv[1:])
+    return None
+
+
+def _lock_signatures(agent_dir: Path) -> dict[str, Signature | None]:
+    return {name: stat_signature(agent_dir / name) for name in LOCKFILES}
+
+
+def _load_cache() -> dict[str, Any]:
+    try:
+        data = json.loads(resolution_cache_path().read_text(encoding="utf-8"))
+        if data["version"] == CACHE_VERSION and isinstance(data["agents"], dict):
+            return dict(data["agents"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return {}
+
+
+def _is_valid(entry: Any, agent: Agent, locks: dict[str, Any]) -> bool:
+    try:
+        if entry["command"] != agent.command or entry["locks"] != locks:
+            return False
+        argv = entry["argv"]
+        return argv is None or os.access(argv[0], os.X_OK)
+    except (KeyError, TypeError, IndexError):
+        return False
+
+
+def warm_agents(agents: Iterable[Agent]) -> dict[str, list[str] | None]:
+    """Resolve the commands of the PREWARM agents, refreshing the cache.
+
+    Returns
+    -------
+        Agent directory -> argv to execute (None if not resolvable)
+
+    """
+    cache = _load_cache()
+    resolved: dict[str, list[str] | None] = {}
+    changed = False
+
+    for agent in agents:
+        if not agent.prewarm:
+            continue
+        key = str(agent.full_path)
+        # JSON turns the signature tuples into lists
+        locks = {
+            name: list(sig) if sig else None
+            for name, sig in _lock_signatures(agent.full_path).items()
+        }
+        entry: Any = cache.get(key)
+        if not _is_valid(entry, agent, locks):
+            entry = {
+                "command": agent.command,
+                "locks": locks,
+                "argv": resolve_uncached(agent),
+            }
+            cache[key] = entry
+            changed = True
+        resolved[key] = entry["argv"]
+
+    if changed:
+        write_private_json(
+            resolution_cache_path(), {"version": CACHE_VERSION, "agents": cache}
+        )
+    return resolved
+
+
+def resolve_command(agent: Agent) -> list[str] | None:
+    """Get the argv to launch a PREWARM agent directly, using the cache.
+
+    Returns
+    -------
+        The argv to execute, or None if the command must run as written
+
+    """
+    if not agent.prewarm:
+        return None
+    return warm_agents([agent]).get(str(agent.full_path))
@@ -0,0 +1,396 @@
+"""Session recording for AI Agent Selector.
+
+With ``--record`` (or ``AI_SELECTOR_RECORD=1``) the agent runs under a
+pseudo-terminal and everything it prints is copied both to the terminal and
+to a gzip-compressed asciicast v2 file in
+``$XDG_DATA_HOME/ai-selector/recordings``, which asciinema can play too.
+Output goes through a fixed-size buffer straight to the compressor, so the
+selector's memory does not grow with the length of the session. Recordings
+are read back as streams as well, by ``ai-selector recordings play`` and
+``ai-selector recordings grep``.
+"""
+
+import argparse
+import codecs
+import fcntl
+import gzip
+import json
+import os
+import pty
+import re
+import select
+import signal
+import struct
+import sys
+import termios
+import time
+import tty
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from .usage import get_data_dir
+
+# Pending output is written to the compressed file when it reaches this size
+BUFFER_SIZE = 64 * 1024
+
+# Longest line kept while searching; longer lines are split
+MAX_LINE_LENGTH = 64 * 1024
+
+# Escape sequences (CSI, OSC and two-character ones) removed before searching
+ANSI_ESCAPE = re.compile(
+    r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])"
+)
+
+SUFFIX = ".cast.gz"
+
+
+def recordings_dir() -> Path:
+    """Get the directory where sessions are recorded."""
+    return get_data_dir() / "recordings"
+
+
+def recording_path(name: str) -> Path:
+    """Get a new recording path for a session of the named agent."""
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return recordings_dir() / f"{name.replace('/', '-')}-{stamp}{SUFFIX}"
+
+
+class CastWriter:
+    """Streaming writer of gzip-compressed asciicast v2 recordings.
+
+    Output events are encoded as they arrive and kept in a buffer of at most
+    BUFFER_SIZE bytes, which is handed to the compressor when full.
+    """
+
+    def __init__(
+        self, path: Path, width: int, height: int, title: str | None = None
+    ) -> None:
+        """Create the recording file and write its header."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        self._raw = open(fd, "wb")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self._buffer = bytearray()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._started = time.monotonic()
+        header: dict[str, Any] = {
+            "version": 2,
+            "width": width,
+            "height": height,
+            "timestamp": int(time.time()),
+            "env": {"TERM": os.getenv("TERM", ""), "SHELL": os.getenv("SHELL", "")},
+        }
+        if title:
+            header["title"] = title
+        self._append(header)
+
+    def _append(self, item: object) -> None:
+        line = json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n"
+        if len(self._buffer) + len(line) > BUFFER_SIZE:
+            self.flush()
+        if len(line) > BUFFER_SIZE:
+            self._file.write(line)
+        else:
+            self._buffer += line
+
+    def output(self, data: bytes) -> None:
+        """Record data written by the agent to the terminal."""
+        text = self._decoder.decode(data)
+        if text:
+            self._append([round(time.monotonic() - self._started, 6), "o", text])
+
+    def flush(self) -> None:
+        """Hand the buffered events to the compressor."""
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+    def close(self) -> None:
+        """Write the pending events and close the file."""
+        text = self._decoder.decode(b"", final=True)
+        if text:
+            self._append([round(time.monotonic() - self._started, 6), "o", text])
+        self.flush()
+        self._file.close()
+        self._raw.close()
+
+
+def read_cast(path: Path) -> tuple[dict[str, Any], Iterator[tuple[float, str]]]:
+    """Open a recording, streaming its output events.
+
+    A recording cut short (the selector was killed) yields the events written
+    until then.
+
+    Returns
+    -------
+        The header and an iterator of (seconds since start, output) events
+
+    """
+    f = gzip.open(path, "rt", encoding="utf-8")
+    try:
+        header = json.loads(f.readline())
+    except (OSError, EOFError, ValueError):
+        f.close()
+        raise ValueError(f"{path} is not an asciicast recording") from None
+    if not isinstance(header, dict) or header.get("version") != 2:
+        f.close()
+        raise ValueError(f"{path} is not an asciicast v2 recording")
+
+    def events() -> Iterator[tuple[float, str]]:
+        with f:
+            try:
+                for line in f:
+                    try:
+                        time_, kind, data = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue
+                    if kind == "o":
+                        yield float(time_), str(data)
+            except (OSError, EOFError):
+                return  # Truncated recording
+
+    return header, events()
+
+
+def _window_size(fd: int) -> bytes | None:
+    try:
+        return fcntl.ioctl(fd, termios.TIOCGWINSZ, b"\0" * 8)
+    except OSError:
+        return None
+
+
+def _copy_window_size(source: int, target: int) -> None:
+    size = _window_size(source)
+    if size is not None:
+        fcntl.ioctl(target, termios.TIOCSWINSZ, size)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    while data:
+        data = data[os.write(fd, data) :]
+
+
+def record_session(
+    argv: list[str], env: dict[str, str] | None, path: Path, title: str | None = None
+) -> int:
+    """Run argv under a pseudo-terminal, recording its output to path.
+
+    The terminal is put in raw mode so keys (Ctrl-C included) go straight to
+    the agent, and window size changes are passed on to it.
+
+    Args:
+    ----
+        argv: The program to run and its arguments
+        env: Environment of the program, the selector's when None
+        path: Recording file to create
+        title: Title stored in the recording header
+
+    Returns:
+    -------
+        Exit code of the program (127 if it could not be executed)
+
+    """
+    stdin, stdout = sys.stdin.fileno(), sys.stdout.fileno()
+    size = _window_size(stdout)
+    rows, columns = struct.unpack("HHHH", size)[:2] if size else (24, 80)
+    writer = CastWriter(path, columns, rows, title)
+
+    sys.stdout.flush()
+    pid, master = pty.fork()
+    if pid == 0:
+        try:
+            if env is None:
+                os.execvp(argv[0], argv)
+            else:
+                os.execvpe(argv[0], argv, env)
+        except OSError as e:
+            os.write(2, f"Error executing agent: {e}\n".encode())
+        os._exit(127)
+
+    def resize(signum: int, frame: FrameType | None) -> None:
+        _copy_window_size(stdout, master)
+
+    _copy_window_size(stdout, master)
+    previous_handler = signal.signal(signal.SIGWINCH, resize)
+    saved_mode = termios.tcgetattr(stdin) if os.isatty(stdin) else None
+    if saved_mode is not None:
+        tty.setraw(stdin)
+
+    inputs = [master, stdin]
+    try:
+        while True:
+            try:
+                ready, _, _ = select.select(inputs, [], [])
+            except InterruptedError:
+                continue
+            if master in ready:
+                try:
+                    data = os.read(master, BUFFER_SIZE)
+                except OSError:
+                    data = b""  # EIO: the agent closed the terminal
+                if not data:
+                    break
+                _write_all(stdout, data)
+                writer.output(data)
+            if stdin in ready:
+                data = os.read(stdin, BUFFER_SIZE)
+                if data:
+                    _write_all(master, data)
+                else:
+                    inputs.remove(stdin)
+    finally:
+        if saved_mode is not None:
+            termios.tcsetattr(stdin, termios.TCSAFLUSH, saved_mode)
+        signal.signal(signal.SIGWINCH, previous_handler)
+        os.close(master)
+        writer.close()
+
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def play(path: Path, speed: float = 1.0, max_wait: float | None = 2.0) -> None:
+    """Write a recording to the terminal with its original timing.
+
+    Args:
+    ----
+        path: The recording to play
+        speed: Playback speed factor
+        max_wait: Longest pause between two events, in seconds (None: no limit)
+
+    """
+    _, events = read_cast(path)
+    previous = 0.0
+    for time_, data in events:
+        wait = (time_ - previous) / speed
+        if max_wait is not None:
+            wait = min(wait, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        previous = time_
+        sys.stdout.write(data)
+        sys.stdout.flush()
+
+
+def iter_lines(events: Iterable[tuple[float, str]]) -> Iterator[tuple[float, str]]:
+    """Split output events into plain text lines, without escape sequences.
+
+    Each line comes with the time of the event that completed it.
+    """
+    pending = ""
+    time_ = 0.0
+    for time_, data in events:
+        pending += data
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield time_, ANSI_ESCAPE.sub("", line).rstrip("\r")
+        while len(pending) > MAX_LINE_LENGTH:
+            yield time_, ANSI_ESCAPE.sub("", pending[:MAX_LINE_LENGTH])
+            pending = pending[MAX_LINE_LENGTH:]
+    if pending:
+        yield time_, ANSI_ESCAPE.sub("", pending).rstrip("\r")
+
+
+def grep(pattern: re.Pattern[str], paths: Iterable[Path]) -> Iterator[str]:
+    """Search the recordings for lines matching pattern.
+
+    Yields
+    ------
+        ``<file>:<minutes>:<seconds>: <line>`` for every matching line
+
+    """
+    for path in paths:
+        try:
+            _, events = read_cast(path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: {e}", file=sys.stderr)
+            continue
+        for time_, line in iter_lines(events):
+            if pattern.search(line):
+                minutes, seconds = divmod(int(time_), 60)
+                yield f"{path.name}:{minutes}:{seconds:02d}: {line}"
+
+
+def list_recordings() -> list[Path]:
+    """Get the recordings, oldest first."""
+    try:
+        return sorted(recordings_dir().glob(f"*{SUFFIX}"), key=os.path.getmtime)
+    except OSError:
+        return []
+
+
+def _find_recording(name: str) -> Path:
+    path = Path(name).expanduser()
+    if path.exists():
+        return path
+    matches = [p for p in list_recordings() if p.name.startswith(name)]
+    if not matches:
+        raise FileNotFoundError(f"No recording matches '{name}'")
+    return matches[-1]
+
+
+def _positive_float(value: str) -> float:
+    """Parse a command line number that must be greater than zero."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: '{value}'") from None
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: '{value}'")
+    return number
+
+
+def recordings_command(argv: list[str]) -> int:
+    """Run the ``ai-selector recordings`` subcommand."""
+    parser = argparse.ArgumentParser(
+        prog="ai-selector recordings",
+        description="List, play and search recorded agent sessions.",
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    subparsers.add_parser("list", help="list the recordings")
+    play_parser = subparsers.add_parser("play", help="replay a recording")
+    play_parser.add_argument("recording", help="file, or name prefix of a recording")
+    play_parser.add_argument(
+        "--speed", type=_positive_float, default=1.0, help="playback speed factor"
+    )
+    play_parser.add_argument(
+        "--max-wait",
+        type=float,
+        default=2.0,
+        help="longest pause in seconds (0: no limit, default 2)",
+    )
+    grep_parser = subparsers.add_parser("grep", help="search the recorded output")
+    grep_parser.add_argument("pattern", help="regular expression")
+    grep_parser.add_argument(
+        "recordings", nargs="*", help="files or name prefixes (default: all)"
+    )
+    grep_parser.add_argument("-i", "--ignore-case", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.action == "list":
+        for path in list_recordings():
+            print(path)
+        return 0
+
+    if args.action == "play":
+        try:
+            play(_find_recording(args.recording), args.speed, args.max_wait or None)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        return 0
+
+    pattern = re.compile(args.pattern, re.IGNORECASE if args.ignore_case else 0)
+    paths = (
+        [_find_recording(name) for name in args.recordings]
+        if args.recordings
+        else list_recordings()
+    )
+    found = False
+    for match in grep(pattern, paths):
+        print(match)
+        found = True
+    return 0 if found else 1
@@ -0,0 +1,173 @@
+"""Agent name matching and incremental search for AI Agent Selector."""
+
+import bisect
+import difflib
+import heapq
+from collections.abc import Sequence
+
+# Entries added at once from which merging the sorted names beats inserting
+# them one by one (live discovery adds agents in small batches)
+MERGE_THRESHOLD = 64
+
+
+def _is_subsequence(query: str, name: str) -> bool:
+    """Check whether all characters of query appear in name, in order."""
+    it = iter(name)
+    return all(char in it for char in query)
+
+
+def match_names(query: str, names: list[str]) -> list[str]:
+    """Find the agent names matching query, best match tier first.
+
+    Tiers are tried in order and the first non-empty one is returned: exact
+    name, case-insensitive exact name, prefix, substring, subsequence (e.g.
+    "cc" for "claude-code") and finally close matches for typos.
+
+    Args:
+    ----
+        query: Agent name, prefix or abbreviation typed by the user
+        names: Available agent names
+
+    Returns:
+    -------
+        Matching names; more than one means the query is ambiguous
+
+    """
+    if query in names:
+        return [query]
+
+    lowered = query.lower()
+    candidates = [(name, name.lower()) for name in names]
+    tiers = (
+        lambda name: name == lowered,
+        lambda name: name.startswith(lowered),
+        lambda name: lowered in name,
+        lambda name: _is_subsequence(lowered, name),
+    )
+    for matches_tier in tiers:
+        matches = [name for name, lower in candidates if matches_tier(lower)]
+        if matches:
+            return sorted(matches)
+
+    return difflib.get_close_matches(query, names, n=3, cutoff=0.75)
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Prefix and trigram index over agent names and commands.
+
+    Built once from the discovered agents; queries return entry positions in
+    the original order, with name-prefix matches first. Queries of three or
+    more characters only verify the entries sharing all of the query's
+    trigrams instead of scanning every entry.
+    """
+
+    def __init__(self, names: Sequence[str], commands: Sequence[str]) -> None:
+        """Index the entries given by parallel names and commands sequences."""
+        self._names: list[str] = []
+        self._texts: list[str] = []
+        self._sorted_names: list[tuple[str, int]] = []
+        self._trigrams: dict[str, list[int]] = {}
+        self.add(names, commands)
+
+    def add(self, names: Sequence[str], commands: Sequence[str]) -> None:
+        """Index more entries, at the positions following the current ones."""
+        start = len(self._names)
+        self._names.extend(name.lower() for name in names)
+        self._texts.extend(
+            f"{name} {command}".lower()
+            for name, command in zip(self._names[start:], commands)
+        )
+        added = sorted((name, start + i) for i, name in enumerate(self._names[start:]))
+        if len(added) < MERGE_THRESHOLD:
+            for entry in added:
+                bisect.insort(self._sorted_names, entry)
+        else:
+            self._sorted_names = list(heapq.merge(self._sorted_names, added))
+        for position in range(start, len(self._texts)):
+            for trigram in _trigrams(self._texts[position]):
+                self._trigrams.setdefault(trigram, []).append(position)
+
+    def __len__(self) -> int:
+        """Get the number of indexed entries."""
+        return len(self._names)
+
+    def prefix_matches(self, prefix: str) -> list[int]:
+        """Get the positions of the entries whose name starts with prefix.
+
+        Positions are returned in name order.
+        """
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._sorted_names, (prefix, -1))
+        positions: list[int] = []
+        for name, position in self._sorted_names[start:]:
+            if not name.startswith(prefix):
+                break
+            positions.append(position)
+        return positions
+
+    def search(self, query: str, within: Sequence[int] | None = None) -> list[int]:
+        """Get the positions of the entries matching query.
+
+        An entry matches when the query is a substring of its name or command.
+
+        Args:
+        ----
+            query: Text typed by the user
+            within: Only consider these positions (e.g. the previous matches)
+
+        Returns:
+        -------
+            Matching positions, name-prefix matches first, then index order
+
+        """
+        query = query.lower()
+        if not query:
+            return list(range(len(self))) if within is None else list(within)
+
+        candidates: Sequence[int]
+        if within is not None:
+            candidates = sorted(within)
+        elif len(query) >= 3:
+            postings = sorted(
+                (self._trigrams.get(t, []) for t in _trigrams(query)), key=len
+            )
+            candidates = sorted(set(postings[0]).intersection(*postings[1:]))
+        else:
+            candidates = range(len(self))
+
+        texts = self._texts
+        matches = [position for position in candidates if query in texts[position]]
+        prefixed = set(self.prefix_matches(query))
+        return [position for position in matches if position in prefixed] + [
+            position for position in matches if position not in prefixed
+        ]
+
+
+class IncrementalSearch:
+    """Search that narrows the previous matches while the query grows."""
+
+    def __init__(self, index: SearchIndex) -> None:
+        """Start with an empty query matching every entry."""
+        self.index = index
+        self.query = ""
+        self.matches = index.search("")
+
+    def update(self, query: str) -> list[int]:
+        """Set a new query and return its matches."""
+        if query == self.query:
+            return self.matches
+
+        # Matching is by substring, so extending the query can only remove matches
+        within = self.matches if self.query and query.startswith(self.query) else None
+        self.query = query
+        self.matches = self.index.search(query, within)
+        return self.matches
+
+    def refresh(self) -> list[int]:
+        """Search the current query again, after entries were added to the index."""
+        self.matches = self.index.search(self.query)
+        return self.matches
@@ -1,64 +1,133 @@
-"""Interactive agent selector using questionary."""
-
-import shutil
-from pathlib import Path
-from typing import cast
-
-import questionary
-from questionary import Style
-
-from .config import Agent
-
-# Custom style for the selector
-custom_style = Style(
-    [
-        ("qmark", "fg:#673ab7 bold"),  # Question mark
-        ("question", "bold"),  # Question text
-        ("answer", "fg:#f44336 bold"),  # Selected answer
-        ("pointer", "fg:#673ab7 bold"),  # Pointer
-        ("highlighted", "fg:#673ab7 bold"),  # Highlighted choice
-        ("selected", "fg:#cc5454"),  # Selected choice
-        ("separator", "fg:#cc5454"),  # Separator
-        ("instruction", ""),  # Instructions
-        ("text", ""),  # Plain text
-        ("disabled", "fg:#858585 italic"),  # Disabled choices
-    ]
-)
+"""Interactive agent selector using questionary.
 
+questionary pulls in the whole prompt_toolkit stack, which dominates the
+selector's cold start, so it is only imported once the menu is shown.
+"""
 
-def display_logo() -> None:
-    """Display the AI Selector logo from logo.txt file or alternative text."""
-    # Get terminal width
+import sys
+from functools import cache
+from importlib import resources
+from typing import TYPE_CHECKING, cast
+
+from .config import Agent, get_settings
+from .health import unavailable_agents
+from .terminal import is_tty, terminal_columns
+from .usage import frecency_scores
+
+if TYPE_CHECKING:
+    from questionary import Style
+
+    from .stream import DiscoveryStream
+
+# questionary can only assign keyboard shortcuts to this many choices
+SHORTCUT_LIMIT = 36
+
+# Logo file shipped inside the package
+LOGO_RESOURCE = "logo.txt"
+
+# Set once the logo has been printed, so it is not printed twice
+_logo_shown = False
+
+# Custom style rules for the selector
+STYLE_RULES = [
+    ("qmark", "fg:#673ab7 bold"),  # Question mark
+    ("question", "bold"),  # Question text
+    ("answer", "fg:#f44336 bold"),  # Selected answer
+    ("pointer", "fg:#673ab7 bold"),  # Pointer
+    ("highlighted", "fg:#673ab7 bold"),  # Highlighted choice
+    ("selected", "fg:#cc5454"),  # Selected choice
+    ("separator", "fg:#cc5454"),  # Separator
+    ("instruction", ""),  # Instructions
+    ("text", ""),  # Plain text
+    ("disabled", "fg:#858585 italic"),  # Disabled choices
+]
+
+
+@cache
+def get_style() -> "Style":
+    """Build the questionary style for the selector (imports questionary)."""
+    from questionary import Style
+
+    return Style(STYLE_RULES)
+
+
+@cache
+def load_logo() -> str | None:
+    """Read the logo bundled with the package, once per process."""
     try:
-        columns = shutil.get_terminal_size().columns
-    except (AttributeError, OSError):
-        # Fallback if terminal size cannot be determined
-        columns = 80
+        return (
+            resources.files(__package__)
+            .joinpath(LOGO_RESOURCE)
+            .read_text(encoding="utf-8")
+        )
+    except OSError:
+        return None
+
+
+def display_logo() -> None:
+    """Display the AI Selector logo, or a plain title on narrow terminals.
+
+    The logo is shown at most once per process, and never when the selector
+    is not running in a terminal (pipes, scripts, log files).
+    """
+    global _logo_shown
+    if _logo_shown or not (is_tty(sys.stdin) and is_tty(sys.stdout)):
+        return
+    _logo_shown = True
 
     # If terminal is too narrow, display simple text instead of logo
-    if columns < 60:
+    if terminal_columns() < 60:
         print("AI-SELECTOR")
         print()  # Add blank line for spacing
         return
 
-    # Terminal is wide enough, try to display logo
-    # Get project root directory (parent of src)
-    project_root = Path(__file__).parent.parent
-    logo_path = project_root / "logo.txt"
+    logo = load_logo()
+    if logo is not None:
+        print(logo)
+        print()  # Add blank line after logo for spacing
+
+
+def sort_agents(agents: list[Agent]) -> list[Agent]:
+    """Sort agents for the menu.
+
+    By default the most frecent agents (launched often and recently) come
+    first and the rest follow by name; with AI_SELECTOR_SORT=alpha the menu
+    is purely alphabetical.
+    """
+    # Sort agents by name for consistent display
+    agents = sorted(agents, key=lambda a: a.name)
+    if get_settings().sort_order == "alpha":
+        return agents
+
+    scores = frecency_scores()
+    return sorted(agents, key=lambda a: -scores.get(a.name, 0.0))
 
-    try:
-        with open(logo_path, "r", encoding="utf-8") as f:
-            logo = f.read()
-            print(logo)
-            print()  # Add blank line after logo for spacing
-    except FileNotFoundError:
-        # Silently continue if logo file doesn't exist
-        pass
+
+def disabled_agents(agents: list[Agent]) -> dict[str, str]:
+    """Get the agents that cannot be chosen, with the reason (AI_SELECTOR_HEALTH).
+
+    Returns
+    -------
+        Agent name -> reason, empty unless the health check is enabled
+
+    """
+    if not get_settings().health_check:
+        return {}
+    return {
+        name: f"{program} not found"
+        for name, program in unavailable_agents(agents).items()
+    }
 
 
 def select_agent(agents: list[Agent]) -> Agent | None:
     """Display an interactive menu to select an agent.
 
+    Up to SHORTCUT_LIMIT agents are shown in a questionary menu with keyboard
+    shortcuts; larger lists (or AI_SELECTOR_PICKER=search) use the
+    search-as-you-type picker from src.picker instead. With
+    AI_SELECTOR_HEALTH=1, agents whose command is not installed are listed
+    but cannot be chosen (see src.health).
+
     Args:
     ----
         agents: List of available agents
@@ -72,14 +141,34 @@ def select_agent(agents: list[Agent]) -> Agent | None:
         print("No agents available.")
         return None
 
-    # Display logo
+    # Display logo (main() usually shows it before discovering the agents)
     display_logo()
 
-    # Sort agents by name for consistent display
-    agents = sorted(agents, key=lambda a: a.name)
+    agents = sort_agents(agents)
 
-    # Create choices using agent names
-    choices = [{"name": agent.name, "value": agent} for agent in agents]
+    settings = get_settings()
+    disabled = disabled_agents(agents)
+    if len(disabled) == len(agents):
+        print("None of the agents' commands is installed.")
+        return None
+
+    picker = settings.picker
+    if picker == "search" or (picker == "auto" and len(agents) > SHORTCUT_LIMIT):
+        from .picker import pick_agent
+
+        try:
+            return pick_agent(agents, style=get_style(), disabled=disabled)
+        except KeyboardInterrupt:
+            print("\nSelection cancelled.")
+            return None
+
+    # Create choices using agent names, greying out the broken agents
+    choices = [
+        {"name": agent.name, "value": agent, "disabled": disabled.get(agent.name)}
+        for agent in agents
+    ]
+
+    import questionary
 
     try:
         selected = cast(
@@ -87,8 +176,8 @@ def select_agent(agents: list[Agent]) -> Agent | None:
             questionary.select(
                 "Select an AI agent:",
                 choices=choices,
-                style=custom_style,
-                use_shortcuts=True,
+                style=get_style(),
+                use_shortcuts=len(choices) <= SHORTCUT_LIMIT,
                 use_arrow_keys=True,
             ).ask(),
         )
@@ -98,3 +187,69 @@ def select_agent(agents: list[Agent]) -> Agent | None:
     except KeyboardInterrupt:
         print("\nSelection cancelled.")
         return None
+
+
+def select_agent_live(stream: "DiscoveryStream") -> Agent | None:
+    """Show the search picker while discovery goes on, adding agents as found.
+
+    The picker starts with the agents known from the discovery indexes,
+    sorted as in select_agent(); agents confirmed by the scan are appended
+    as they come and, when it ends, the list is replaced by its result in
+    menu order. The query and the selected agent are kept throughout.
+
+    Args:
+    ----
+        stream: The running discovery
+
+    Returns:
+    -------
+        Selected Agent (possibly only known from an index, see
+        DiscoveryStream.found()), or None if cancelled or none was found
+
+    """
+    import asyncio
+
+    from .picker import PickerState, build_picker
+
+    state = PickerState([])
+    state.scanning = True
+    app = build_picker(state, style=get_style())
+
+    def stop(exception: Exception | None = None) -> None:
+        if not app.is_running or app.is_done:
+            return
+        if exception is None:
+            app.exit(result=None)
+        else:
+            app.exit(exception=exception)
+
+    async def follow() -> None:
+        try:
+            async for update in stream.updates():
+                if update.kind == "done":
+                    state.set_agents(sort_agents(update.agents))
+                    state.scanning = False
+                elif update.kind == "known":
+                    state.add_agents(sort_agents(update.agents))
+                else:
+                    state.add_agents(sorted(update.agents, key=lambda a: a.name))
+                if update.kind != "found":
+                    state.disabled = await asyncio.to_thread(
+                        disabled_agents, state.agents
+                    )
+                app.invalidate()
+        except Exception as e:
+            stop(e)
+            return
+        if not state.agents:
+            stop()
+
+    # Background tasks are cancelled when the picker exits
+    def start() -> None:
+        app.create_background_task(follow())
+
+    try:
+        return asyncio.run(app.run_async(pre_run=start))
+    except KeyboardInterrupt:
+        print("\nSelection cancelled.")
+        return None
@@ -0,0 +1,175 @@
+"""Streaming discovery: show the menu while agents are still being found.
+
+On slow filesystems a full scan can take seconds. A DiscoveryStream runs
+scan_agents() in a background thread and publishes what it learns as a
+stream of updates, read with ``async for`` on an asyncio event loop
+(DiscoveryStream.updates()):
+
+- known: the agents recorded in the discovery indexes, available at once
+  but possibly stale
+- found: agents confirmed by the scan, as soon as each one is parsed
+- done: the complete result, which replaces everything published before
+
+The menu (see selector.select_agent_live()) starts with the known agents and
+appends the others live, so an agent can be picked before the scan ends.
+"""
+
+import threading
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .config import Agent, ScanCancelledError, indexed_agents, scan_agents
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+@dataclass(frozen=True)
+class DiscoveryUpdate:
+    """A step of a discovery stream."""
+
+    kind: str  # "known", "found" or "done"
+    agents: list[Agent]  # New agents; with "done", every agent sorted by name
+    warnings: list[str] = field(default_factory=list)  # Only with "done"
+
+
+class DiscoveryStream:
+    """Agent discovery running in a background thread.
+
+    Updates are queued by the scanning threads and delivered to one consumer,
+    either all at once with wait() and result() or as a stream with
+    updates(). The scan goes on (and refreshes the indexes) even if the
+    consumer stops listening, until stop() is called.
+    """
+
+    def __init__(self, workers: int | None = None) -> None:
+        """Start discovering the agents."""
+        self._lock = threading.Lock()
+        self._pending: list[DiscoveryUpdate] = []
+        self._found: dict[str, Agent] = {}
+        self._done = threading.Event()
+        self._stop = threading.Event()
+        self._cancelled = False
+        self._result: tuple[list[Agent], list[str]] | None = None
+        self._error: Exception | None = None
+        self._loop: "asyncio.AbstractEventLoop | None" = None
+        self._wakeup: "asyncio.Event | None" = None
+        self._thread = threading.Thread(
+            target=self._run, args=(workers,), name="discovery", daemon=True
+        )
+        self._thread.start()
+
+    def _publish(self, update: DiscoveryUpdate) -> None:
+        with self._lock:
+            self._pending.append(update)
+            if update.kind == "found":
+                self._found.update((agent.name, agent) for agent in update.agents)
+            loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            # The loop is closed once the consumer is gone
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(wakeup.set)
+
+    def _run(self, workers: int | None) -> None:
+        try:
+            self._publish(DiscoveryUpdate("known", indexed_agents()))
+            agents, warnings = scan_agents(
+                workers,
+                on_agent=lambda agent: self._publish(DiscoveryUpdate("found", [agent])),
+                stop=self._stop,
+            )
+            self._result = agents, warnings
+            self._publish(DiscoveryUpdate("done", agents, warnings))
+        except ScanCancelledError as e:
+            self._cancelled = True
+            self._error = e
+            self._publish(DiscoveryUpdate("done", []))
+        except Exception as e:
+            self._error = e
+            self._publish(DiscoveryUpdate("done", []))
+        finally:
+            self._done.set()
+
+    def stop(self) -> None:
+        """Cancel the scan if it is still running, without waiting for it.
+
+        Directories being read are finished, the rest are dropped, so no
+        scanning thread outlives the selector for long (e.g. when it exits
+        or is replaced by the agent).
+        """
+        self._stop.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the scan ended because stop() was called."""
+        return self._cancelled
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait up to timeout seconds for the scan to end; True if it did."""
+        return self._done.wait(timeout)
+
+    def result(self) -> tuple[list[Agent], list[str]]:
+        """Wait for the scan to end and get its result.
+
+        Returns
+        -------
+            Same as scan_agents(), whose exceptions are raised here
+            (ScanCancelledError after stop())
+
+        """
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        assert self._result is not None
+        return self._result
+
+    def found(self, name: str) -> Agent | None:
+        """Get the agent named name if the scan confirmed it, else None.
+
+        Only agents that take precedence over those of other roots are
+        confirmed, so this is the agent scan_agents() returns for name.
+        """
+        with self._lock:
+            return self._found.get(name)
+
+    async def updates(self) -> AsyncIterator[DiscoveryUpdate]:
+        """Deliver the updates as they come, found agents in batches.
+
+        Raises
+        ------
+            The exception the scan failed with, instead of the done update
+
+        """
+        # Imported here: a stream may be waited for without an event loop
+        import asyncio
+
+        wakeup = asyncio.Event()
+        with self._lock:
+            self._loop, self._wakeup = asyncio.get_running_loop(), wakeup
+        try:
+            while True:
+                wakeup.clear()
+                with self._lock:
+                    pending, self._pending = self._pending, []
+                # Agents found since the last delivery come as one update
+                found: list[Agent] = []
+                for update in pending:
+                    if update.kind == "found":
+                        found.extend(update.agents)
+                        continue
+                    if found:
+                        yield DiscoveryUpdate("found", found)
+                        found = []
+                    if update.kind == "done" and self._error is not None:
+                        raise self._error
+                    yield update
+                    if update.kind == "done":
+                        return
+                if found:
+                    yield DiscoveryUpdate("found", found)
+                await wakeup.wait()
+        finally:
+            with self._lock:
+                self._loop = self._wakeup = None
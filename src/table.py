@@ -0,0 +1,114 @@
+"""Compact, column-oriented collection of agents.
+
+An AgentTable stores the fields of many agents in a few tuples sorted by
+name instead of one object (with its Paths and env_vars mapping) per agent.
+Agent objects are only built when an entry is accessed, so large registries
+kept in memory cost a handful of pointers per agent.
+"""
+
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+from typing import overload
+
+from .config import Agent, LazyEnvVars
+
+# Placeholder for a missing directory or an env_file that is <directory>/.env
+_DEFAULT = ""
+
+
+class AgentTable(Sequence[Agent]):
+    """Agents sorted by name, with name lookup by binary search.
+
+    Agents rebuilt from the table read their environment variables lazily
+    from env_file (see LazyEnvVars); variables set by hand are not kept.
+    """
+
+    __slots__ = ("_commands", "_directories", "_env_files", "_names", "_prewarm")
+
+    def __init__(self, agents: Iterable[Agent] = ()) -> None:
+        """Build the table from agents (the first one wins for duplicate names)."""
+        by_name: dict[str, Agent] = {}
+        for agent in agents:
+            by_name.setdefault(agent.name, agent)
+        ordered = [by_name[name] for name in sorted(by_name)]
+
+        directories = [
+            _DEFAULT if agent.directory is None else str(agent.directory)
+            for agent in ordered
+        ]
+        self._names = tuple(agent.name for agent in ordered)
+        self._commands = tuple(agent.command for agent in ordered)
+        self._directories = tuple(directories)
+        self._env_files = tuple(
+            _DEFAULT
+            if directory and agent.env_file == Path(directory, ".env")
+            else str(agent.env_file)
+            for agent, directory in zip(ordered, directories)
+        )
+        self._prewarm = bytes(agent.prewarm for agent in ordered)
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        """Get the agent names, sorted."""
+        return self._names
+
+    def _agent(self, position: int) -> Agent:
+        directory = self._directories[position]
+        env_file = Path(self._env_files[position] or Path(directory, ".env"))
+        return Agent(
+            name=self._names[position],
+            command=self._commands[position],
+            env_vars=LazyEnvVars(env_file),
+            env_file=env_file,
+            directory=Path(directory) if directory else None,
+            prewarm=bool(self._prewarm[position]),
+        )
+
+    def index_of(self, name: str) -> int:
+        """Get the position of the named agent, or -1 if it is not in the table."""
+        position = bisect_left(self._names, name)
+        if position < len(self._names) and self._names[position] == name:
+            return position
+        return -1
+
+    def get(self, name: str) -> Agent | None:
+        """Get the named agent, or None if it is not in the table."""
+        position = self.index_of(name)
+        return None if position < 0 else self._agent(position)
+
+    def __len__(self) -> int:
+        """Count the agents."""
+        return len(self._names)
+
+    @overload
+    def __getitem__(self, index: int) -> Agent: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Agent]: ...
+
+    def __getitem__(self, index: int | slice) -> Agent | Sequence[Agent]:
+        """Get the agent at a position in name order (or a list for a slice)."""
+        if isinstance(index, slice):
+            return [self._agent(i) for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("AgentTable index out of range")
+        return self._agent(index)
+
+    def __iter__(self) -> Iterator[Agent]:
+        """Iterate over the agents in name order."""
+        return (self._agent(i) for i in range(len(self)))
+
+    def __contains__(self, item: object) -> bool:
+        """Check whether an agent, or an agent name, is in the table."""
+        if isinstance(item, str):
+            return self.index_of(item) >= 0
+        if isinstance(item, Agent):
+            return self.get(item.name) == item
+        return False
+
+    def __repr__(self) -> str:
+        """Show the number of agents."""
+        return f"<AgentTable of {len(self)} agents>"
@@ -0,0 +1,54 @@
+"""In-process terminal control for AI Agent Selector.
+
+Escape sequences are written straight to the terminal instead of spawning a
+shell and the external ``clear`` binary.
+"""
+
+import os
+import shutil
+import sys
+from typing import TextIO
+
+from .config import get_settings
+
+# Cursor home, erase the screen and the scrollback buffer
+CLEAR_SEQUENCE = "\033[H\033[2J\033[3J"
+
+
+def is_tty(stream: TextIO | None = None) -> bool:
+    """Check whether stream (stdout by default) is attached to a terminal."""
+    stream = sys.stdout if stream is None else stream
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        # Replaced or closed streams
+        return False
+
+
+def _clear_enabled() -> bool:
+    """Check whether screen clearing is enabled (AI_SELECTOR_CLEAR, TERM)."""
+    if not get_settings().clear_screen:
+        return False
+    return os.getenv("TERM") != "dumb"
+
+
+def clear_screen(stream: TextIO | None = None) -> None:
+    """Clear the terminal screen.
+
+    Nothing is written when the stream is not a terminal (pipes, log files)
+    or when clearing is disabled with AI_SELECTOR_CLEAR=0 or TERM=dumb.
+    """
+    stream = sys.stdout if stream is None else stream
+    if not _clear_enabled() or not is_tty(stream):
+        return
+
+    stream.write(CLEAR_SEQUENCE)
+    stream.flush()
+
+
+def terminal_columns(default: int = 80) -> int:
+    """Get the terminal width, or default if it cannot be determined."""
+    try:
+        return shutil.get_terminal_size((default, 24)).columns
+    except (AttributeError, OSError, ValueError):
+        return default
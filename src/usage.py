@@ -0,0 +1,103 @@
+"""Frecency-based agent ranking for AI Agent Selector.
+
+Launches are recorded in a small SQLite database holding, per agent, a score
+that decays exponentially with time (frequency x recency). Recording a launch
+updates a single row and the menu reads all scores with a single query.
+sqlite3 is imported on first use to keep it off the startup path.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# A launch counts half as much after this many seconds
+HALF_LIFE = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    name TEXT PRIMARY KEY,
+    score REAL NOT NULL,
+    updated REAL NOT NULL,
+    launches INTEGER NOT NULL
+)
+"""
+
+
+def get_data_dir() -> Path:
+    """Get the ai-selector data directory, honouring XDG_DATA_HOME."""
+    base = os.getenv("XDG_DATA_HOME") or "~/.local/share"
+    return Path(base).expanduser() / "ai-selector"
+
+
+def usage_db_path() -> Path:
+    """Get the path of the usage database."""
+    return get_data_dir() / "usage.sqlite3"
+
+
+def _decay(elapsed: float) -> float:
+    """Get the weight left after elapsed seconds."""
+    return 0.5 ** (max(elapsed, 0.0) / HALF_LIFE)
+
+
+def _connect(path: Path) -> "sqlite3.Connection":
+    import sqlite3
+
+    conn = sqlite3.connect(path, timeout=1.0)
+    conn.create_function("decay", 1, _decay, deterministic=True)
+    conn.execute(SCHEMA)
+    return conn
+
+
+def record_launch(name: str, now: float | None = None) -> None:
+    """Record a launch of the named agent.
+
+    Errors are ignored: usage ranking is best effort and must never prevent
+    an agent from starting.
+    """
+    import sqlite3
+
+    now = time.time() if now is None else now
+    path = usage_db_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = _connect(path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO usage (name, score, updated, launches) "
+                    "VALUES (?, 1.0, ?, 1) "
+                    "ON CONFLICT (name) DO UPDATE SET "
+                    "score = score * decay(excluded.updated - updated) + 1.0, "
+                    "updated = excluded.updated, "
+                    "launches = launches + 1",
+                    (name, now),
+                )
+        finally:
+            conn.close()
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def frecency_scores(now: float | None = None) -> dict[str, float]:
+    """Get the current frecency score of every launched agent."""
+    import sqlite3
+
+    now = time.time() if now is None else now
+    path = usage_db_path()
+    if not path.exists():
+        return {}
+
+    try:
+        conn = _connect(path)
+        try:
+            rows = conn.execute("SELECT name, score, updated FROM usage").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return {}
+
+    return {name: score * _decay(now - updated) for name, score, updated in rows}
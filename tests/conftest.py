@@ -0,0 +1,70 @@
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Generator
+
+import pytest
+
+from src.config import Agent, reset_settings
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep every test away from the user's real cache, data and daemon."""
+    cache_home = tmp_path / "xdg-cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "xdg-data"))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "xdg-runtime"))
+    return cache_home
+
+
+@pytest.fixture(autouse=True)
+def fresh_settings() -> Generator[None, None, None]:
+    """Reload the memoized settings in every test."""
+    reset_settings()
+    yield
+    reset_settings()
+
+
+@pytest.fixture
+def make_executable() -> Callable[[Path], Path]:
+    """Get a function creating an executable script at a path."""
+
+    def make(path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("#!/bin/sh\necho ready\n")
+        path.chmod(0o755)
+        return path
+
+    return make
+
+
+@pytest.fixture
+def make_agent(tmp_path: Path) -> Callable[..., Agent]:
+    """Get a function building an agent that lives in tmp_path/<name>.
+
+    Other Agent fields (env_vars, prewarm...) are passed as keywords.
+    """
+
+    def make(name: str, command: str, **fields: Any) -> Agent:
+        directory = tmp_path / name
+        directory.mkdir(parents=True, exist_ok=True)
+        return Agent(name=name, command=command, directory=directory, **fields)
+
+    return make
+
+
+@pytest.fixture
+def age() -> Callable[..., None]:
+    """Get a function moving the mtime of a path seconds into the past.
+
+    Caches trust files older than their racy window, so tests age the files
+    they expect to be served from a cache.
+    """
+
+    def move(path: Path, seconds: int = 60) -> None:
+        past = time.time() - seconds
+        os.utime(path, (past, past))
+
+    return move
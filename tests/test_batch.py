@@ -0,0 +1,109 @@
+import asyncio
+import json
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from src.batch import CANCELLED, format_results, run_many, run_many_command
+from src.config import Agent
+from src.history import LOG_FILENAME
+
+
+def make_dirs(tmp_path: Path, count: int) -> list[Path]:
+    """Create count project directories."""
+    directories = [tmp_path / f"repo{i}" for i in range(count)]
+    for directory in directories:
+        directory.mkdir()
+    return directories
+
+
+def test_run_many(tmp_path: Path, make_agent: Callable[..., Agent]) -> None:
+    """Test each job runs in its directory with its output captured and logged."""
+    directories = make_dirs(tmp_path, 3)
+    reviewer = make_agent(
+        "review",
+        'echo "$GREETING from $(pwd)"; echo oops >&2',
+        env_vars={"GREETING": "hi"},
+    )
+
+    results = asyncio.run(run_many(reviewer, directories, tmp_path / "out", jobs=2))
+
+    assert [r.exit_code for r in results] == [0, 0, 0]
+    for result, directory in zip(results, directories):
+        assert result.directory == directory
+        assert result.stdout.read_text() == f"hi from {directory}\n"
+        assert result.stderr.read_text() == "oops\n"
+
+    records = [
+        json.loads(line)
+        for line in (reviewer.full_path / LOG_FILENAME).read_text().splitlines()
+    ]
+    assert sorted(r["event"] for r in records) == ["exit"] * 3 + ["launch"] * 3
+    assert {r["cwd"] for r in records if r["event"] == "launch"} == {
+        str(d) for d in directories
+    }
+    # Batch jobs must not skew the startup overhead reported by stats
+    assert not any("timings" in r for r in records)
+
+
+def test_run_many_limits_concurrency(
+    tmp_path: Path, make_agent: Callable[..., Agent]
+) -> None:
+    """Test no more than jobs agents run at the same time."""
+    directories = make_dirs(tmp_path, 4)
+    counter = tmp_path / "running"
+    counter.mkdir()
+    # Each job leaves a marker while running and records how many it saw
+    reviewer = make_agent(
+        "review",
+        f"touch {counter}/$$; sleep 0.2; ls {counter} | wc -l; rm {counter}/$$",
+    )
+
+    results = asyncio.run(run_many(reviewer, directories, tmp_path / "out", jobs=2))
+
+    assert max(int(r.stdout.read_text()) for r in results) <= 2
+
+
+def test_run_many_fail_fast(tmp_path: Path, make_agent: Callable[..., Agent]) -> None:
+    """Test --fail-fast stops running jobs and skips the pending ones."""
+    directories = make_dirs(tmp_path, 4)
+    reviewer = make_agent(
+        "review", '[ "$(basename "$(pwd)")" = repo0 ] && exit 3; sleep 5'
+    )
+
+    results = asyncio.run(
+        run_many(reviewer, directories, tmp_path / "out", jobs=2, fail_fast=True)
+    )
+
+    assert [r.exit_code for r in results] == [3, CANCELLED, None, None]
+    assert results[1].duration < 5
+    assert "skip" in format_results(results)
+
+
+def test_run_many_command(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test the subcommand reports every job and fails if one does."""
+    agents_dir = tmp_path / "agents"
+    (agents_dir / "review").mkdir(parents=True)
+    (agents_dir / "review" / ".env").write_text('ALIAS=test "$(basename $PWD)" = a\n')
+    monkeypatch.setenv("AI_AGENTS_DIR", str(agents_dir))
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    output_dir = tmp_path / "out"
+
+    argv = ["rev", str(tmp_path / "a"), str(tmp_path / "b"), "-o", str(output_dir)]
+    assert run_many_command(argv) == 1
+
+    output = capsys.readouterr().out
+    assert "1/2 succeeded" in output
+    assert sorted(p.name for p in output_dir.iterdir()) == [
+        "001-a.stderr",
+        "001-a.stdout",
+        "002-b.stderr",
+        "002-b.stdout",
+    ]
+    assert run_many_command(["rev", str(tmp_path / "missing")]) == 1
@@ -0,0 +1,81 @@
+import json
+import os
+from pathlib import Path
+
+from src.cache import (
+    RACY_WINDOW_NS,
+    DiscoveryIndex,
+    IndexEntry,
+    get_cache_dir,
+    index_path,
+    load_index,
+    save_index,
+    stat_signature,
+)
+
+
+def test_get_cache_dir_uses_xdg_cache_home(isolated_cache: Path) -> None:
+    """Test get_cache_dir honours XDG_CACHE_HOME."""
+    assert get_cache_dir() == isolated_cache / "ai-selector"
+
+
+def test_stat_signature_missing_file(tmp_path: Path) -> None:
+    """Test stat_signature returns None for missing paths."""
+    assert stat_signature(tmp_path / "missing") is None
+
+
+def test_save_and_load_index_roundtrip(tmp_path: Path) -> None:
+    """Test an index survives a save/load roundtrip."""
+    index = DiscoveryIndex(
+        root=(1, 2, 3),
+        entries={
+            "agent1": IndexEntry(env=(4, 5, 6), record={"name": "agent1"}),
+            "agent2": IndexEntry(env=None, record=None),
+        },
+    )
+
+    save_index(tmp_path, index)
+    loaded = load_index(tmp_path)
+
+    assert loaded.root == (1, 2, 3)
+    assert loaded.entries == index.entries
+    assert loaded.written_ns == index.written_ns > 0
+    assert os.stat(index_path(tmp_path)).st_mode & 0o777 == 0o600
+
+
+def test_load_index_missing(tmp_path: Path) -> None:
+    """Test load_index returns an empty index when there is no cache file."""
+    assert load_index(tmp_path) == DiscoveryIndex()
+
+
+def test_load_index_corrupted(tmp_path: Path) -> None:
+    """Test load_index returns an empty index for a corrupted cache file."""
+    path = index_path(tmp_path)
+    path.parent.mkdir(parents=True)
+    path.write_text("{not json")
+    assert load_index(tmp_path) == DiscoveryIndex()
+
+    path.write_text(json.dumps({"version": 1, "agents_dir": str(tmp_path)}))
+    assert load_index(tmp_path) == DiscoveryIndex()
+
+
+def test_load_index_other_directory(tmp_path: Path) -> None:
+    """Test an index written for another directory is ignored."""
+    save_index(tmp_path, DiscoveryIndex(root=(1, 2, 3)))
+    data = json.loads(index_path(tmp_path).read_text())
+    data["agents_dir"] = "/elsewhere"
+    index_path(tmp_path).write_text(json.dumps(data))
+
+    assert load_index(tmp_path) == DiscoveryIndex()
+
+
+def test_is_fresh() -> None:
+    """Test is_fresh rejects changed and recently modified signatures."""
+    index = DiscoveryIndex(written_ns=10 * RACY_WINDOW_NS)
+    old = (RACY_WINDOW_NS, 10, 1)
+    racy = (10 * RACY_WINDOW_NS - 1, 10, 1)
+
+    assert index.is_fresh(old, old)
+    assert not index.is_fresh(old, (RACY_WINDOW_NS, 11, 1))
+    assert not index.is_fresh(None, None)
+    assert not index.is_fresh(racy, racy)
@@ -1,8 +1,26 @@
+import json
+import os
+from collections.abc import Callable
 from pathlib import Path
 
 import pytest
 
-from src.config import Agent, discover_agents, get_agents_directory
+from src.cache import index_path
+from src.config import (
+    Agent,
+    LazyEnvVars,
+    discover_agents,
+    get_agents_directories,
+    get_agents_directory,
+    get_settings,
+    indexed_agents,
+    list_agent_names,
+    load_agent,
+    read_env_header,
+    reset_settings,
+    scan_agents,
+    walk_agents_root,
+)
 
 
 @pytest.fixture
@@ -55,7 +73,7 @@ def test_get_agents_directory_not_found(
 
 def test_discover_agents(monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path) -> None:
     """Test discover_agents finds valid agents."""
-    monkeypatch.setattr("src.config.get_agents_directory", lambda: mock_agent_dir)
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
 
     agents = discover_agents()
 
@@ -67,12 +85,59 @@ def test_discover_agents(monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path)
     assert agent.env_vars == {"VAR1": "value1"}
 
 
+def test_discover_agents_prewarm(
+    monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path
+) -> None:
+    """Test PREWARM configures the agent and is not passed to its environment."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    (mock_agent_dir / "agent1" / ".env").write_text("ALIAS=npx a\nPREWARM=1\nV=1")
+
+    (agent,) = discover_agents()
+
+    assert agent.prewarm is True
+    assert agent.env_vars == {"V": "1"}
+    assert Agent.from_record(agent.to_record()) == agent
+
+
+def test_discover_agents_reads_env_vars_lazily(
+    monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path
+) -> None:
+    """Test discovery keeps only ALIAS and loads the other variables on use."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    env_file = mock_agent_dir / "agent1" / ".env"
+    env_file.write_text("ALIAS=command1\nSECRET='s3cr3t'\nTOOL=${HOME}/x\n")
+
+    (agent,) = discover_agents()
+
+    assert isinstance(agent.env_vars, LazyEnvVars)
+    assert "s3cr3t" not in repr(agent)
+    assert "s3cr3t" not in index_path(mock_agent_dir).read_text()
+
+    env_file.write_text("ALIAS=command1\nSECRET=changed\n")
+    assert dict(agent.env_vars) == {"SECRET": "changed"}
+
+
+def test_discover_agents_interpolated_alias(
+    monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path
+) -> None:
+    """Test an ALIAS referencing other variables is interpolated as by dotenv."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    (mock_agent_dir / "agent1" / ".env").write_text(
+        "BIN=/opt/agent\nALIAS=${BIN}/run --fast\n"
+    )
+
+    (agent,) = discover_agents()
+
+    assert agent.command == "/opt/agent/run --fast"
+    assert agent.env_vars == {"BIN": "/opt/agent"}
+
+
 def test_get_agents_directory_default(
     monkeypatch: pytest.MonkeyPatch, tmp_path: Path
 ) -> None:
     """Test get_agents_directory returns the default path."""
     monkeypatch.delenv("AI_AGENTS_DIR", raising=False)
-    monkeypatch.setattr("src.config.load_dotenv", lambda *args, **kwargs: None)
+    monkeypatch.setattr("src.config.envfile.load_env", lambda *args, **kwargs: None)
 
     # Create a temporary directory to use as the default
     default_dir = tmp_path / "ia"
@@ -94,7 +159,7 @@ def test_discover_agents_no_alias(
     monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path
 ) -> None:
     """Test discover_agents skips agents without an ALIAS variable."""
-    monkeypatch.setattr("src.config.get_agents_directory", lambda: mock_agent_dir)
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
     # Only agent1 has an ALIAS
     (mock_agent_dir / "agent2" / ".env").write_text("VAR2=value2")
     agents = discover_agents()
@@ -106,7 +171,7 @@ def test_discover_agents_invalid_env_file(
     monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path, capsys: pytest.CaptureFixture
 ) -> None:
     """Test discover_agents handles invalid .env files."""
-    monkeypatch.setattr("src.config.get_agents_directory", lambda: mock_agent_dir)
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
     # Create an invalid .env file
     (mock_agent_dir / "agent3" / ".env").write_text("ALIAS=")
     agents = discover_agents()
@@ -119,13 +184,13 @@ def test_discover_agents_invalid_env_file(
 def test_discover_agents_dotenv_exception(
     monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path, capsys: pytest.CaptureFixture
 ) -> None:
-    """Test that discover_agents handles exceptions from dotenv_values."""
-    monkeypatch.setattr("src.config.get_agents_directory", lambda: mock_agent_dir)
+    """Test that discover_agents handles exceptions while reading a .env."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
 
     def raise_exception(*args: object, **kwargs: object) -> None:
         raise Exception("dotenv_error")
 
-    monkeypatch.setattr("src.config.dotenv_values", raise_exception)
+    monkeypatch.setattr("src.config.read_env_header", raise_exception)
 
     agents = discover_agents()
 
@@ -136,6 +201,363 @@ def test_discover_agents_dotenv_exception(
 
 def test_agent_full_path(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
     """Test the full_path property of the Agent class."""
-    monkeypatch.setattr("src.config.get_agents_directory", lambda: tmp_path)
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (tmp_path,))
     agent = Agent(name="test_agent", command="echo hello")
     assert agent.full_path == tmp_path / "test_agent"
+
+
+def test_discover_agents_reuses_index(
+    monkeypatch: pytest.MonkeyPatch,
+    mock_agent_dir: Path,
+    capsys: pytest.CaptureFixture,
+    age: Callable[..., None],
+) -> None:
+    """Test unchanged .env files are not parsed again on the next discovery."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    for env_file in mock_agent_dir.glob("*/.env"):
+        age(env_file)
+    age(mock_agent_dir)
+
+    first = discover_agents()
+
+    def fail(*args: object, **kwargs: object) -> None:
+        raise AssertionError("read_env_header should not be called")
+
+    monkeypatch.setattr("src.config.read_env_header", fail)
+    capsys.readouterr()
+
+    assert discover_agents() == first
+    # Cached agents without ALIAS keep reporting the warning
+    assert "agent2/.env has no ALIAS variable" in capsys.readouterr().out
+
+
+def test_discover_agents_reparses_changed_env(
+    monkeypatch: pytest.MonkeyPatch,
+    mock_agent_dir: Path,
+    age: Callable[..., None],
+) -> None:
+    """Test only modified .env files are parsed again."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    for env_file in mock_agent_dir.glob("*/.env"):
+        age(env_file)
+    age(mock_agent_dir)
+    discover_agents()
+
+    (mock_agent_dir / "agent2" / ".env").write_text("ALIAS=command2")
+    parsed: list[Path] = []
+    original = read_env_header
+
+    def tracking_read_env_header(path: Path) -> dict[str, str | None]:
+        parsed.append(path)
+        return original(path)
+
+    monkeypatch.setattr("src.config.read_env_header", tracking_read_env_header)
+
+    agents = discover_agents()
+
+    assert parsed == [mock_agent_dir / "agent2" / ".env"]
+    assert [agent.name for agent in agents] == ["agent1", "agent2"]
+
+
+def test_discover_agents_new_directory(
+    monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path
+) -> None:
+    """Test agents added after the index was written are discovered."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    discover_agents()
+
+    new_agent = mock_agent_dir / "agent4"
+    new_agent.mkdir()
+    (new_agent / ".env").write_text("ALIAS=command4")
+
+    assert [agent.name for agent in discover_agents()] == ["agent1", "agent4"]
+
+
+def test_discover_agents_corrupted_index(
+    monkeypatch: pytest.MonkeyPatch,
+    mock_agent_dir: Path,
+    age: Callable[..., None],
+) -> None:
+    """Test a corrupted index record falls back to parsing the .env file."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    for env_file in mock_agent_dir.glob("*/.env"):
+        age(env_file)
+    age(mock_agent_dir)
+    discover_agents()
+
+    path = index_path(mock_agent_dir)
+    data = json.loads(path.read_text())
+    data["entries"]["agent1"]["record"] = {"name": "agent1"}
+    path.write_text(json.dumps(data))
+
+    agents = discover_agents()
+
+    assert len(agents) == 1
+    assert agents[0].command == "command1"
+
+
+def test_discover_agents_cache_disabled(
+    monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path
+) -> None:
+    """Test AI_SELECTOR_CACHE=0 disables the on-disk index."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    monkeypatch.setenv("AI_SELECTOR_CACHE", "0")
+
+    discover_agents()
+
+    assert not index_path(mock_agent_dir).exists()
+
+
+def test_discover_agents_parallel_matches_sequential(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    """Test parallel discovery returns the same agents and warnings in order."""
+    agents_dir = tmp_path / "agents"
+    for i in range(50):
+        agent_dir = agents_dir / f"agent{i:02d}"
+        agent_dir.mkdir(parents=True)
+        alias = f"ALIAS=command{i}" if i % 5 else "VAR=value"
+        (agent_dir / ".env").write_text(alias)
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (agents_dir,))
+    monkeypatch.setenv("AI_SELECTOR_CACHE", "0")
+
+    sequential = discover_agents(workers=1)
+    sequential_out = capsys.readouterr().out
+    parallel = discover_agents(workers=4)
+    parallel_out = capsys.readouterr().out
+
+    assert parallel == sequential
+    assert [agent.name for agent in parallel] == sorted(a.name for a in parallel)
+    assert len(parallel) == 40
+    assert parallel_out == sequential_out
+    assert parallel_out.count("has no ALIAS variable") == 10
+
+
+@pytest.mark.parametrize(("value", "expected"), [("4", 4), ("0", 1), ("many", 8)])
+def test_discovery_workers_setting(
+    monkeypatch: pytest.MonkeyPatch, value: str, expected: int
+) -> None:
+    """Test AI_SELECTOR_WORKERS is parsed with a safe fallback."""
+    monkeypatch.setenv("AI_SELECTOR_WORKERS", value)
+    assert get_settings().workers == expected
+
+
+def test_list_agent_names(
+    monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path
+) -> None:
+    """Test list_agent_names lists directories with a .env file."""
+    from src.config import list_agent_names
+
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+
+    assert list_agent_names() == ["agent1", "agent2", "agent3"]
+
+
+def test_list_agent_names_from_index(
+    monkeypatch: pytest.MonkeyPatch,
+    mock_agent_dir: Path,
+    age: Callable[..., None],
+) -> None:
+    """Test list_agent_names uses a fresh index instead of scanning."""
+    from src.config import list_agent_names
+
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    for env_file in mock_agent_dir.glob("*/.env"):
+        age(env_file)
+    age(mock_agent_dir)
+    discover_agents()
+
+    def fail(*args: object) -> None:
+        raise AssertionError("the agents directory should not be scanned")
+
+    monkeypatch.setattr("src.config.os.scandir", fail)
+
+    assert list_agent_names() == ["agent1", "agent2", "agent3"]
+
+
+def test_load_agent(
+    monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path, capsys: pytest.CaptureFixture
+) -> None:
+    """Test load_agent parses a single agent directory."""
+    from src.config import load_agent
+
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+
+    agent = load_agent("agent1")
+    assert agent is not None
+    assert agent.command == "command1"
+    assert agent.env_vars == {"VAR1": "value1"}
+
+    assert load_agent("agent2") is None
+    assert "agent2/.env has no ALIAS variable" in capsys.readouterr().out
+
+
+def test_get_settings_is_memoized(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test settings are loaded once until reset_settings() is called."""
+    monkeypatch.setenv("AI_AGENTS_DIR", str(tmp_path))
+    monkeypatch.setenv("AI_SELECTOR_EXEC", "yes")
+    settings = get_settings()
+    assert settings.agents_dir == tmp_path
+    assert settings.exec_mode
+
+    monkeypatch.setenv("AI_SELECTOR_EXEC", "0")
+    assert get_settings() is settings
+
+    reset_settings()
+    assert not get_settings().exec_mode
+
+
+def test_discovered_agent_full_path_without_io(
+    monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path
+) -> None:
+    """Test discovered agents know their directory without further lookups."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    agent = discover_agents()[0]
+
+    def fail() -> Path:
+        raise AssertionError("full_path should not resolve the agents directory")
+
+    monkeypatch.setattr("src.config.get_agents_directory", fail)
+
+    assert agent.directory == mock_agent_dir / "agent1"
+    assert agent.full_path == mock_agent_dir / "agent1"
+
+
+def write_agent(directory: Path, alias: str) -> Path:
+    """Create an agent directory with a .env file setting ALIAS."""
+    directory.mkdir(parents=True)
+    (directory / ".env").write_text(f"ALIAS={alias}\n")
+    return directory
+
+
+@pytest.fixture
+def roots(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> tuple[Path, Path]:
+    """Create a personal and a team root, with a missing root in between."""
+    personal, team = tmp_path / "personal", tmp_path / "team"
+    write_agent(personal / "shared", "personal-shared")
+    write_agent(personal / "mine", "mine")
+    write_agent(team / "shared", "team-shared")
+    write_agent(team / "tools" / "linter", "linter")
+    write_agent(team / "tools" / "node_modules" / "pkg", "pkg")
+    write_agent(team / "tools" / "linter" / "plugin", "plugin")
+    monkeypatch.setenv(
+        "AI_AGENTS_DIR",
+        os.pathsep.join([str(personal), str(tmp_path / "no"), str(team)]),
+    )
+    return personal, team
+
+
+def test_settings_agents_dirs(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test AI_AGENTS_DIR is split into roots, without empty items or duplicates."""
+    a, b = tmp_path / "a", tmp_path / "b"
+    monkeypatch.setenv("AI_AGENTS_DIR", os.pathsep.join([str(a), "", str(b), str(a)]))
+    monkeypatch.setenv("AI_SELECTOR_PRUNE", "dist, build")
+
+    settings = get_settings()
+
+    assert settings.agents_dirs == (a, b)
+    assert settings.agents_dir == a
+    assert settings.prune == {"dist", "build"}
+
+
+def test_get_agents_directories_skips_missing(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test missing roots are skipped and an error is raised if none exists."""
+    monkeypatch.setenv("AI_AGENTS_DIR", f"{tmp_path / 'no'}{os.pathsep}{tmp_path}")
+    assert get_agents_directories() == (tmp_path,)
+
+    monkeypatch.setenv("AI_AGENTS_DIR", str(tmp_path / "no"))
+    reset_settings()
+    with pytest.raises(FileNotFoundError):
+        get_agents_directories()
+
+
+def test_discover_agents_multiple_roots(roots: tuple[Path, Path]) -> None:
+    """Test agents from every root are merged, the first root winning conflicts."""
+    personal, _ = roots
+
+    agents = discover_agents()
+
+    assert [(a.name, a.command) for a in agents] == [
+        ("mine", "mine"),
+        ("shared", "personal-shared"),
+    ]
+    assert agents[1].directory == personal / "shared"
+
+
+def test_discover_agents_nested(
+    monkeypatch: pytest.MonkeyPatch, roots: tuple[Path, Path]
+) -> None:
+    """Test grouping directories are searched up to the maximum depth.
+
+    node_modules is pruned and agent directories are never searched.
+    """
+    _, team = roots
+    monkeypatch.setenv("AI_SELECTOR_MAX_DEPTH", "3")
+
+    agents = discover_agents()
+
+    assert [a.name for a in agents] == ["mine", "shared", "tools/linter"]
+    assert agents[2].directory == team / "tools" / "linter"
+    assert list_agent_names() == ["mine", "shared", "tools/linter"]
+
+    agent = load_agent("tools/linter")
+    assert agent is not None
+    assert agent.command == "linter"
+    assert load_agent("tools/node_modules/pkg") is None
+
+
+def test_walk_agents_root_uses_dir_entries(tmp_path: Path) -> None:
+    """Test the walk lists candidates and groups, skipping pruned directories."""
+    write_agent(tmp_path / "group" / "agent", "agent")
+    write_agent(tmp_path / ".git" / "agent", "agent")
+    (tmp_path / "file").touch()
+
+    names, groups = walk_agents_root(tmp_path, 2, frozenset({".git"}))
+
+    assert names == ["group/agent"]
+    assert list(groups) == [str(tmp_path / "group")]
+
+
+def test_discover_agents_nested_index(
+    monkeypatch: pytest.MonkeyPatch,
+    roots: tuple[Path, Path],
+    age: Callable[..., None],
+) -> None:
+    """Test agents added to a grouping directory invalidate a fresh index."""
+    _, team = roots
+    monkeypatch.setenv("AI_SELECTOR_MAX_DEPTH", "2")
+    for path in [*team.rglob("*"), team]:
+        age(path)
+    assert "tools/linter" in [a.name for a in discover_agents()]
+
+    write_agent(team / "tools" / "formatter", "formatter")
+
+    assert "tools/formatter" in [a.name for a in discover_agents()]
+
+
+def test_scan_agents_reports_each_agent(
+    monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path
+) -> None:
+    """Test on_agent is called with every agent found, from cache too."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    for _ in range(2):
+        found: list[Agent] = []
+        agents, _ = scan_agents(on_agent=found.append)
+
+        assert found == agents
+        assert [agent.name for agent in found] == ["agent1"]
+
+
+def test_indexed_agents(monkeypatch: pytest.MonkeyPatch, mock_agent_dir: Path) -> None:
+    """Test indexed_agents lists the indexed agents without checking them."""
+    monkeypatch.setattr("src.config.get_agents_directories", lambda: (mock_agent_dir,))
+    assert indexed_agents() == []
+
+    agents = discover_agents()
+    (mock_agent_dir / "agent1" / ".env").unlink()
+
+    assert indexed_agents() == agents
@@ -0,0 +1,188 @@
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Generator, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.config import get_settings
+from src.daemon import PollingWatcher, query_daemon, request, serve, socket_path
+from src.main import load_agents
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(monkeypatch: pytest.MonkeyPatch) -> Generator[Path, None, None]:
+    """Use a short runtime directory: Unix socket paths are limited to ~100 bytes."""
+    path = Path(tempfile.mkdtemp(prefix="ais-"))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(path))
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def agents_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Create an agents directory with a single agent."""
+    agents_dir = tmp_path / "agents"
+    (agents_dir / "alpha").mkdir(parents=True)
+    (agents_dir / "alpha" / ".env").write_text("ALIAS=alpha-cli\nKEY=1\n")
+    monkeypatch.setenv("AI_AGENTS_DIR", str(agents_dir))
+    return agents_dir.resolve()
+
+
+@contextmanager
+def running_daemon(poll: bool) -> Iterator[threading.Thread]:
+    """Run serve() in a thread until the block exits."""
+    stop, ready = threading.Event(), threading.Event()
+    thread = threading.Thread(
+        target=serve,
+        args=(stop,),
+        kwargs={"poll": poll, "interval": 0.05, "ready": ready},
+    )
+    thread.start()
+    try:
+        assert ready.wait(5)
+        yield thread
+    finally:
+        stop.set()
+        thread.join(5)
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    """Poll condition until it holds or timeout seconds have passed."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def names() -> list[str] | None:
+    """Get the names of the agents served by the daemon."""
+    result = query_daemon()
+    return None if result is None else [agent.name for agent in result[0]]
+
+
+def test_query_daemon_without_daemon(agents_dir: Path) -> None:
+    """Test the client reports no daemon when the socket does not exist."""
+    assert query_daemon() is None
+
+
+def test_query_daemon_stale_socket(agents_dir: Path) -> None:
+    """Test a socket file left behind without a daemon is ignored."""
+    path = socket_path()
+    path.parent.mkdir(parents=True)
+    path.touch()
+    assert query_daemon() is None
+
+
+def test_daemon_serves_registry(agents_dir: Path) -> None:
+    """Test the daemon serves the discovered agents and their warnings."""
+    (agents_dir / "broken").mkdir()
+    (agents_dir / "broken" / ".env").write_text("KEY=1\n")
+
+    with running_daemon(poll=True):
+        result = query_daemon()
+        assert "pid" in request(socket_path(), "ping")
+        assert (socket_path().stat().st_mode & 0o777) == 0o600
+
+    assert result is not None
+    agents, warnings = result
+    assert [(a.name, a.command, a.env_vars) for a in agents] == [
+        ("alpha", "alpha-cli", {"KEY": "1"})
+    ]
+    assert agents[0].directory == agents_dir / "alpha"
+    assert warnings == ["Warning: broken/.env has no ALIAS variable, skipping"]
+    assert not socket_path().exists()
+
+
+@pytest.mark.parametrize(
+    "poll",
+    [
+        True,
+        pytest.param(
+            False,
+            marks=pytest.mark.skipif(
+                not sys.platform.startswith("linux"), reason="inotify is Linux only"
+            ),
+        ),
+    ],
+)
+def test_daemon_picks_up_changes(agents_dir: Path, poll: bool) -> None:
+    """Test added, edited and removed agents reach the served registry."""
+    with running_daemon(poll=poll):
+        assert names() == ["alpha"]
+
+        (agents_dir / "beta").mkdir()
+        (agents_dir / "beta" / ".env").write_text("ALIAS=beta-cli\n")
+        assert wait_for(lambda: names() == ["alpha", "beta"])
+
+        (agents_dir / "alpha" / ".env").write_text("KEY=1\n")
+        assert wait_for(lambda: names() == ["beta"])
+
+        shutil.rmtree(agents_dir / "beta")
+        assert wait_for(lambda: names() == [])
+
+
+def test_polling_watcher_honours_interval(agents_dir: Path) -> None:
+    """Test short waits do not snapshot the tree more than once per interval."""
+    watcher = PollingWatcher(get_settings(), interval=0.8)
+    (agents_dir / "beta").mkdir()
+    (agents_dir / "beta" / ".env").write_text("ALIAS=beta-cli\n")
+
+    with patch.object(
+        watcher, "_take_snapshot", wraps=watcher._take_snapshot
+    ) as take_snapshot:
+        started = time.monotonic()
+        changes = []
+        while time.monotonic() - started < 1.2:
+            changes.append(watcher.wait(0.1))
+
+    assert take_snapshot.call_count == 1
+    assert changes.count(True) == 1
+
+
+def test_serve_refuses_second_daemon(agents_dir: Path) -> None:
+    """Test a second daemon for the same directory does not steal the socket."""
+    with running_daemon(poll=True):
+        with pytest.raises(RuntimeError, match="already running"):
+            serve(threading.Event(), poll=True)
+        assert names() == ["alpha"]
+
+
+def test_load_agents_prefers_daemon(agents_dir: Path) -> None:
+    """Test main uses the daemon registry instead of scanning."""
+    with (
+        running_daemon(poll=True),
+        patch("src.main.discover_agents") as mock_discover,
+    ):
+        agents = load_agents()
+
+    mock_discover.assert_not_called()
+    assert [agent.name for agent in agents] == ["alpha"]
+
+
+def test_load_agents_without_daemon(agents_dir: Path) -> None:
+    """Test main scans by itself when no daemon is running."""
+    sentinel = [MagicMock()]
+    with patch("src.main.discover_agents", return_value=sentinel) as mock_discover:
+        assert load_agents() is sentinel
+    mock_discover.assert_called_once()
+
+
+def test_load_agents_daemon_disabled(
+    monkeypatch: pytest.MonkeyPatch, agents_dir: Path
+) -> None:
+    """Test AI_SELECTOR_DAEMON=0 ignores a running daemon."""
+    monkeypatch.setenv("AI_SELECTOR_DAEMON", "0")
+    with (
+        running_daemon(poll=True),
+        patch("src.main.discover_agents", return_value=[]) as mock_discover,
+    ):
+        assert load_agents() == []
+    mock_discover.assert_called_once()
@@ -0,0 +1,188 @@
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from src.config import load_env_vars
+from src.envcache import (
+    EnvCacheEntry,
+    compile_env,
+    decode_entry,
+    encode_entry,
+    env_cache_path,
+    load_entry,
+    read_env_cached,
+    save_entry,
+    verify_env,
+    verify_env_command,
+)
+from src.envfile import read_env
+
+ENV_TEXT = (
+    "export BIN=/opt/agent\n"
+    "ALIAS=${BIN}/run\n"
+    'CERT="-----BEGIN-----\nabc\n-----END-----"\n'
+    "HOME_DIR=${ENVCACHE_HOME:-/home/nobody}/.agent\n"
+    "EMPTY=\n"
+    "NO_VALUE\n"
+    "UNICODE=café 日本\n"
+)
+
+
+@pytest.fixture
+def env_file(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, age: Callable[..., None]
+) -> Path:
+    """Write an agent .env file using interpolation, aged out of the racy window."""
+    monkeypatch.delenv("ENVCACHE_HOME", raising=False)
+    path = tmp_path / "agent" / ".env"
+    path.parent.mkdir()
+    path.write_text(ENV_TEXT, encoding="utf-8")
+    age(path)
+    return path
+
+
+def _fail(*args: object) -> None:
+    raise AssertionError("the .env file should not be parsed")
+
+
+def test_entry_round_trip() -> None:
+    """Test entries survive encoding, unset environment variables included."""
+    entry = EnvCacheEntry(
+        digest=b"0123456789abcdef",
+        signature=(1, 2, 3),
+        written_ns=4,
+        environ={"HOME": "/root", "UNSET": None},
+        values={"A": "", "B": "multi\nline café"},
+    )
+
+    assert decode_entry(encode_entry(entry)) == entry
+    entry.signature = None
+    assert decode_entry(encode_entry(entry)) == entry
+
+
+@pytest.mark.parametrize("cut", [0, 3, 20, 60, -1])
+def test_decode_entry_rejects_truncated_data(cut: int) -> None:
+    """Test truncated or foreign data is reported as ValueError."""
+    data = encode_entry(
+        EnvCacheEntry(b"0" * 16, None, 0, {"HOME": "/root"}, {"A": "value"})
+    )
+
+    with pytest.raises(ValueError):
+        decode_entry(data[:cut])
+    with pytest.raises(ValueError):
+        decode_entry(b"XXXXX" + data[5:])
+
+
+def test_read_env_cached_matches_read_env(env_file: Path) -> None:
+    """Test the cached variables are those of a full read."""
+    expected = {k: v for k, v in read_env(env_file).items() if v is not None}
+
+    assert read_env_cached(env_file) == expected
+    assert read_env_cached(env_file) == expected
+    assert env_cache_path(env_file).stat().st_mode & 0o777 == 0o600
+
+
+def test_read_env_cached_skips_unchanged_file(
+    monkeypatch: pytest.MonkeyPatch, env_file: Path
+) -> None:
+    """Test an unchanged .env is neither parsed nor hashed again."""
+    expected = read_env_cached(env_file)
+    monkeypatch.setattr("src.envcache._compile", _fail)
+    monkeypatch.setattr("src.envcache._digest", _fail)
+
+    assert read_env_cached(env_file) == expected
+
+
+def test_read_env_cached_touched_file(
+    monkeypatch: pytest.MonkeyPatch, env_file: Path, age: Callable[..., None]
+) -> None:
+    """Test a .env with a new mtime but the same contents is not parsed again."""
+    expected = read_env_cached(env_file)
+    age(env_file, 30)
+    monkeypatch.setattr("src.envcache._compile", _fail)
+
+    assert read_env_cached(env_file) == expected
+    entry = load_entry(env_file)
+    assert entry is not None
+    assert entry.signature is not None
+    assert entry.signature[0] == env_file.stat().st_mtime_ns
+
+
+def test_read_env_cached_changed_file(env_file: Path, age: Callable[..., None]) -> None:
+    """Test a changed .env is compiled again."""
+    read_env_cached(env_file)
+    env_file.write_text("ALIAS=agent\nKEY=new\n")
+    age(env_file, 30)
+
+    assert read_env_cached(env_file) == {"ALIAS": "agent", "KEY": "new"}
+
+
+def test_read_env_cached_environment_change(
+    monkeypatch: pytest.MonkeyPatch, env_file: Path
+) -> None:
+    """Test values interpolated from the environment follow its changes."""
+    assert read_env_cached(env_file)["HOME_DIR"] == "/home/nobody/.agent"
+    entry = load_entry(env_file)
+    assert entry is not None
+    assert entry.environ == {"ENVCACHE_HOME": None}
+
+    monkeypatch.setenv("ENVCACHE_HOME", "/srv")
+
+    assert read_env_cached(env_file)["HOME_DIR"] == "/srv/.agent"
+
+
+def test_load_env_vars_cache_disabled(
+    monkeypatch: pytest.MonkeyPatch, env_file: Path
+) -> None:
+    """Test AI_SELECTOR_CACHE=0 reads the .env without the cache."""
+    monkeypatch.setenv("AI_SELECTOR_CACHE", "0")
+
+    assert load_env_vars(env_file)["BIN"] == "/opt/agent"
+    assert "ALIAS" not in load_env_vars(env_file)
+    assert not env_cache_path(env_file).exists()
+
+
+def test_verify_env(monkeypatch: pytest.MonkeyPatch, env_file: Path) -> None:
+    """Test cached environments are classified against their .env file."""
+    assert verify_env(env_file).status == "missing"
+
+    read_env_cached(env_file)
+    assert verify_env(env_file).status == "ok"
+
+    monkeypatch.setenv("ENVCACHE_HOME", "/srv")
+    result = verify_env(env_file)
+    assert (result.status, result.reason) == ("stale", "ENVCACHE_HOME changed")
+    assert result.differences == ["~HOME_DIR"]
+    monkeypatch.delenv("ENVCACHE_HOME")
+
+    # An entry that would be used but holds other values
+    entry = compile_env(env_file)
+    entry.values = {**entry.values, "EXTRA": "x"}
+    del entry.values["BIN"]
+    save_entry(env_file, entry)
+    result = verify_env(env_file)
+    assert (result.status, result.differences) == ("mismatch", ["+BIN", "-EXTRA"])
+
+    env_file.write_text("ALIAS=agent\n")
+    assert verify_env(env_file).status == "stale"
+
+
+def test_verify_env_command(
+    monkeypatch: pytest.MonkeyPatch, env_file: Path, capsys: pytest.CaptureFixture
+) -> None:
+    """Test verify-env reports keys but never values, and --rebuild fixes."""
+    monkeypatch.setenv("AI_AGENTS_DIR", str(env_file.parent.parent))
+    entry = compile_env(env_file)
+    entry.values["BIN"] = "s3cr3t"
+    save_entry(env_file, entry)
+
+    assert verify_env_command([]) == 1
+    out = capsys.readouterr().out
+    assert "mismatch  agent: ~BIN" in out
+    assert "s3cr3t" not in out and "/opt/agent" not in out
+
+    assert verify_env_command(["--rebuild", "ag"]) == 1
+    capsys.readouterr()
+    assert verify_env_command([]) == 0
+    assert capsys.readouterr().out == "ok        agent\n"
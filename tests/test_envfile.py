@@ -0,0 +1,149 @@
+import io
+import logging
+import os
+from pathlib import Path
+
+import pytest
+from dotenv import dotenv_values, load_dotenv
+
+from src import envfile
+from src.envfile import interpolate, load_env, parse_env, read_env, read_env_header
+
+# .env texts parsed the same by parse_env() and python-dotenv
+CONFORMANCE_CASES = {
+    "simple": "A=1\nB=two words\n",
+    "export": "export A=1\nexport  B='x'\n",
+    "spaces_around_equal": "A = 1\n  B\t=\t2  \n",
+    "quoted_key": "'A B'=1\n",
+    "single_quoted": "A='a \\'b\\' \\\\ \\n c'\n",
+    "double_quoted": 'A="a \\"b\\" \\\\ \\n \\t \\x c"\n',
+    "multiline_single": "A='line 1\nline 2'\nB=3\n",
+    "multiline_double": 'A="line 1\nline 2\n\nline 4"\nB=3\n',
+    "inline_comment": "A=value # comment\nB='quoted' # comment\nC=a#b\n",
+    "empty_comment": "A= # comment\nB=#value\nC=\nD=''\n",
+    "no_value": "A\nB=1\nexport C\n",
+    "comments_blank_lines": "# comment\n\n   \n  # indented\nA=1\n",
+    "broken_lines": "A=1\nnot valid=\"\nB=2\n=C\nD='unterminated\nE=5\n",
+    "crlf": "A=1\r\nB='x'\r\nC\r\n",
+    "cr": "A=1\rB=2\r",
+    "no_final_newline": "A=1\nB=2",
+    "unicode": 'A=café\nB="日本"\n',
+    "bom": "\ufeffA=1\nB=2\n",
+    "interpolation": "A=x\nB=${A}/y\nC=${MISSING:-fallback}\nD=${MISSING}\n",
+    "interpolation_single_quoted": "A=x\nB='${A}'\n",
+    "interpolation_environ": "B=${ENVFILE_TEST}-${ENVFILE_TEST:-unused}\n",
+    "interpolation_shadows_environ": "ENVFILE_TEST=file\nB=${ENVFILE_TEST}\n",
+    "interpolation_no_value": "A\nB=${A:-default}\n",
+    "interpolation_later": "B=${A}\nA=x\n",
+    "not_interpolated": "A=$HOME ${ } $ {A}\n",
+    "duplicates": "A=1\nB=${A}\nA=2\nC=${A}\n",
+}
+
+
+@pytest.fixture(autouse=True)
+def environ(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Set a variable the .env files may reference."""
+    monkeypatch.setenv("ENVFILE_TEST", "environ")
+
+
+@pytest.mark.parametrize("text", CONFORMANCE_CASES.values(), ids=CONFORMANCE_CASES)
+@pytest.mark.parametrize("interpolate_values", [True, False])
+def test_parse_env_matches_dotenv(text: str, interpolate_values: bool) -> None:
+    """Test parse_env gives the variables dotenv_values gives."""
+    expected = dotenv_values(stream=io.StringIO(text), interpolate=interpolate_values)
+
+    assert parse_env(text, interpolate_values) == expected
+    assert list(parse_env(text, interpolate_values)) == list(expected)
+
+
+@pytest.mark.parametrize("text", CONFORMANCE_CASES.values(), ids=CONFORMANCE_CASES)
+def test_read_env_header_matches_read_env(tmp_path: Path, text: str) -> None:
+    """Test the header mode gives the values of a full read."""
+    env_file = tmp_path / ".env"
+    env_file.write_text(text, encoding="utf-8")
+    keys = {"A", "B"}
+
+    full = read_env(env_file)
+
+    assert read_env_header(env_file, keys) == {k: full[k] for k in full if k in keys}
+
+
+def test_parse_env_logs_unparsable_lines(caplog: pytest.LogCaptureFixture) -> None:
+    """Test unparsable statements are reported with their line, like dotenv."""
+    with caplog.at_level(logging.WARNING):
+        values = parse_env("A=1\nB='x\n\nC=3\n")
+
+    assert values == {"A": "1", "C": "3"}
+    assert caplog.messages == [
+        "python-dotenv could not parse statement starting at line 2"
+    ]
+
+
+def test_read_env_header_stops_after_keys(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test the file is not parsed past the last place a key appears."""
+    env_file = tmp_path / ".env"
+    env_file.write_text("ALIAS=claude\n" + "".join(f"K{i}=v\n" for i in range(100)))
+    parsed: list[str] = []
+    original = envfile._parse_value
+
+    def tracking_parse_value(text: str, pos: int) -> tuple[str, int]:
+        value, end = original(text, pos)
+        parsed.append(value)
+        return value, end
+
+    monkeypatch.setattr(envfile, "_parse_value", tracking_parse_value)
+
+    assert read_env_header(env_file, {"ALIAS", "PREWARM"}) == {"ALIAS": "claude"}
+    assert parsed == ["claude"]
+
+
+def test_read_env_header_last_assignment_wins(tmp_path: Path) -> None:
+    """Test a key assigned again further down takes the later value."""
+    env_file = tmp_path / ".env"
+    env_file.write_text("ALIAS=old\nX=1\n# ALIAS is set below\nALIAS=new\nY=2\n")
+
+    assert read_env_header(env_file, {"ALIAS"}) == {"ALIAS": "new"}
+
+
+def test_read_env_header_interpolates_from_whole_file(tmp_path: Path) -> None:
+    """Test a key referencing a variable set after it resolves as dotenv does."""
+    env_file = tmp_path / ".env"
+    env_file.write_text("BIN=/opt\nALIAS=${BIN}/agent ${LATER:-x}\nLATER=y\n")
+
+    assert read_env_header(env_file, {"ALIAS", "PREWARM"}) == {"ALIAS": "/opt/agent x"}
+
+
+def test_interpolate_scopes_in_order() -> None:
+    """Test variables are looked up in each scope in turn."""
+    assert interpolate("${A}-${B}-${C:-c}", {"A": "1"}, {"A": "2", "B": "2"}) == (
+        "1-2-c"
+    )
+    assert interpolate("${A:-default}", {"A": None}) == ""
+
+
+def test_load_env_does_not_override(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test load_env sets only unset variables, like load_dotenv."""
+    env_file = tmp_path / ".env"
+    env_file.write_text(
+        "ENVFILE_TEST=file\nENVFILE_NEW=${ENVFILE_TEST}\nENVFILE_BARE\n"
+    )
+    for key in ("ENVFILE_NEW", "ENVFILE_BARE"):
+        monkeypatch.delenv(key, raising=False)
+
+    load_env(env_file)
+    loaded = {k: os.environ.get(k) for k in ("ENVFILE_TEST", "ENVFILE_NEW")}
+    monkeypatch.delenv("ENVFILE_NEW")
+    load_dotenv(env_file)
+
+    assert loaded == {"ENVFILE_TEST": "environ", "ENVFILE_NEW": "environ"}
+    assert os.environ["ENVFILE_NEW"] == loaded["ENVFILE_NEW"]
+    assert "ENVFILE_BARE" not in os.environ
+
+
+def test_load_env_missing_file(tmp_path: Path) -> None:
+    """Test a missing .env file is ignored."""
+    load_env(tmp_path / ".env")
@@ -1,52 +1,54 @@
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from src.config import Agent
-from src.executor import execute_agent
+from src.executor import child_environment, command_argv, execute_agent
 
 
 @pytest.fixture
-def mock_agent() -> Agent:
+def mock_agent(tmp_path: Path) -> Agent:
     """Fixture for a mock agent."""
     return Agent(
         name="test_agent",
         command="echo 'hello'",
         env_vars={"MY_VAR": "my_value"},
+        directory=tmp_path,
     )
 
 
 @patch("src.executor.clear_screen")
 @patch("src.executor.log_execution")
-@patch("subprocess.run")
+@patch("subprocess.Popen")
 def test_execute_agent_success(
-    mock_run: MagicMock,
+    mock_popen: MagicMock,
     mock_log_execution: MagicMock,
     mock_clear_screen: MagicMock,
     mock_agent: Agent,
 ) -> None:
     """Test execute_agent successfully runs a command."""
-    mock_run.return_value.returncode = 0
+    mock_popen.return_value.wait.return_value = 0
 
     return_code = execute_agent(mock_agent)
 
     assert return_code == 0
     mock_clear_screen.assert_called_once()
     mock_log_execution.assert_called_once()
-    mock_run.assert_called_once()
+    mock_popen.assert_called_once()
 
 
 @patch("src.executor.clear_screen")
 @patch("src.executor.log_execution")
-@patch("subprocess.run")
+@patch("subprocess.Popen")
 def test_execute_agent_failure(
-    mock_run: MagicMock,
+    mock_popen: MagicMock,
     mock_log_execution: MagicMock,
     mock_clear_screen: MagicMock,
     mock_agent: Agent,
 ) -> None:
     """Test execute_agent handles a command failure."""
-    mock_run.return_value.returncode = 1
+    mock_popen.return_value.wait.return_value = 1
 
     return_code = execute_agent(mock_agent)
 
@@ -55,9 +57,9 @@ def test_execute_agent_failure(
 
 @patch("src.executor.clear_screen")
 @patch("src.executor.log_execution")
-@patch("subprocess.run", side_effect=KeyboardInterrupt)
+@patch("subprocess.Popen", side_effect=KeyboardInterrupt)
 def test_execute_agent_keyboard_interrupt(
-    mock_run: MagicMock,
+    mock_popen: MagicMock,
     mock_log_execution: MagicMock,
     mock_clear_screen: MagicMock,
     mock_agent: Agent,
@@ -70,9 +72,9 @@ def test_execute_agent_keyboard_interrupt(
 
 @patch("src.executor.clear_screen")
 @patch("src.executor.log_execution")
-@patch("subprocess.run", side_effect=Exception("test_error"))
+@patch("subprocess.Popen", side_effect=Exception("test_error"))
 def test_execute_agent_exception(
-    mock_run: MagicMock,
+    mock_popen: MagicMock,
     mock_log_execution: MagicMock,
     mock_clear_screen: MagicMock,
     mock_agent: Agent,
@@ -83,15 +85,18 @@ def test_execute_agent_exception(
     assert return_code == 1
 
 
-@patch("builtins.open", side_effect=Exception("test_error"))
+@patch("src.history.os.open", side_effect=Exception("test_error"))
 def test_log_execution_exception(
-    mock_open: MagicMock, capsys: pytest.CaptureFixture
+    mock_open: MagicMock,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
 ) -> None:
     """Test that log_execution handles exceptions when writing to the log file."""
     from pathlib import Path
 
     from src.executor import log_execution
 
+    monkeypatch.setenv("AI_SELECTOR_LOG_ASYNC", "0")
     mock_agent = MagicMock()
     mock_agent.full_path = Path("/test/path")
     mock_agent.name = "test_agent"
@@ -104,44 +109,195 @@ def test_log_execution_exception(
     assert "Warning: Could not write to log file: test_error" in captured.out
 
 
-@patch("os.system")
-def test_clear_screen(mock_system: MagicMock) -> None:
-    """Test that clear_screen calls os.system with the correct command."""
-    from src.executor import clear_screen
+def test_log_execution_no_env_vars(tmp_path: Path) -> None:
+    """Test that log_execution works correctly when agent.env_vars is empty."""
+    from src.executor import log_execution
+    from src.history import LOG_FILENAME, flush_records, iter_records
+
+    agent = Agent(name="test_agent", command="echo hello", directory=tmp_path)
+
+    launch_id = log_execution(agent, "/test/dir")
+
+    assert flush_records()
+    (record,) = iter_records([tmp_path / LOG_FILENAME])
+    assert record["id"] == launch_id
+    assert record["env"] == []
 
-    clear_screen()
-    mock_system.assert_called_once_with("clear")
 
+@pytest.mark.parametrize(
+    ("command", "expected"),
+    [
+        ("npx @anthropic-ai/claude-code", ["npx", "@anthropic-ai/claude-code"]),
+        ("agent --title 'two words'", ["agent", "--title", "two words"]),
+        ("agent | tee out.log", ["/bin/sh", "-c", "agent | tee out.log"]),
+        ("agent $HOME", ["/bin/sh", "-c", "agent $HOME"]),
+        ("DEBUG=1 agent", ["/bin/sh", "-c", "DEBUG=1 agent"]),
+        ("cd /tmp && agent", ["/bin/sh", "-c", "cd /tmp && agent"]),
+        ("agent 'unbalanced", ["/bin/sh", "-c", "agent 'unbalanced"]),
+    ],
+)
+def test_command_argv(command: str, expected: list[str]) -> None:
+    """Test command_argv only falls back to the shell when needed."""
+    assert command_argv(command) == expected
 
-@patch("os.system")
-def test_clear_screen_windows(
-    mock_system: MagicMock, monkeypatch: pytest.MonkeyPatch
+
+@patch("src.executor.clear_screen")
+@patch("src.executor.log_execution")
+@patch("os.execvpe")
+@patch("subprocess.Popen")
+def test_execute_agent_exec_mode(
+    mock_popen: MagicMock,
+    mock_execvpe: MagicMock,
+    mock_log_execution: MagicMock,
+    mock_clear_screen: MagicMock,
 ) -> None:
-    """Test that clear_screen calls os.system with the correct command on Windows."""
-    from src.executor import clear_screen
+    """Test exec mode replaces the process instead of spawning a shell."""
+    agent = Agent(name="test_agent", command="agent --flag", env_vars={"A": "1"})
+
+    execute_agent(agent, exec_mode=True)
 
-    monkeypatch.setattr("os.name", "nt")
-    clear_screen()
-    mock_system.assert_called_once_with("cls")
+    mock_popen.assert_not_called()
+    mock_log_execution.assert_called_once()
+    program, argv, env = mock_execvpe.call_args.args
+    assert program == "agent"
+    assert argv == ["agent", "--flag"]
+    assert env["A"] == "1"
 
 
-@patch("builtins.open")
-def test_log_execution_no_env_vars(
-    mock_open: MagicMock, capsys: pytest.CaptureFixture
+@patch("src.executor.clear_screen")
+@patch("src.executor.log_execution")
+@patch("os.execvpe", side_effect=FileNotFoundError("no such file"))
+def test_execute_agent_exec_mode_missing_program(
+    mock_execvpe: MagicMock,
+    mock_log_execution: MagicMock,
+    mock_clear_screen: MagicMock,
+    monkeypatch: pytest.MonkeyPatch,
+    mock_agent: Agent,
+    capsys: pytest.CaptureFixture,
 ) -> None:
-    """Test that log_execution works correctly when agent.env_vars is empty."""
-    from pathlib import Path
+    """Test exec mode (enabled via AI_SELECTOR_EXEC) reports missing programs."""
+    monkeypatch.setenv("AI_SELECTOR_EXEC", "1")
 
-    from src.executor import log_execution
+    assert execute_agent(mock_agent) == 127
+    assert "Error executing agent: no such file" in capsys.readouterr().out
 
-    mock_agent = MagicMock()
-    mock_agent.full_path = Path("/test/path")
-    mock_agent.name = "test_agent"
-    mock_agent.command = "echo hello"
-    mock_agent.env_vars = {}
 
-    log_execution(mock_agent, "/test/dir")
+def test_child_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the environment is only copied when the agent adds variables."""
+    monkeypatch.setenv("SELECTOR_VAR", "1")
 
-    mock_open.assert_called_once_with(
-        Path("/test/path/agent-execution.log"), "a", encoding="utf-8"
-    )
+    assert child_environment(Agent(name="a", command="a")) is None
+    env = child_environment(Agent(name="a", command="a", env_vars={"A": "2"}))
+    assert env is not None
+    assert env["SELECTOR_VAR"] == "1"
+    assert env["A"] == "2"
+
+
+@patch("src.executor.clear_screen")
+@patch("src.executor.log_execution")
+@patch("os.execvp")
+def test_execute_agent_exec_mode_inherits_environment(
+    mock_execvp: MagicMock,
+    mock_log_execution: MagicMock,
+    mock_clear_screen: MagicMock,
+) -> None:
+    """Test exec mode without agent variables passes no environment copy."""
+    execute_agent(Agent(name="a", command="agent --flag"), exec_mode=True)
+
+    mock_execvp.assert_called_once_with("agent", ["agent", "--flag"])
+
+
+@pytest.mark.parametrize("prewarm", [True, False])
+@patch("src.executor.clear_screen")
+@patch("src.executor.log_execution")
+@patch("src.executor.resolve_command", return_value=["/agent/bin/tool", "-v"])
+@patch("subprocess.Popen")
+def test_execute_agent_prewarm(
+    mock_popen: MagicMock,
+    mock_resolve: MagicMock,
+    mock_log_execution: MagicMock,
+    mock_clear_screen: MagicMock,
+    prewarm: bool,
+) -> None:
+    """Test PREWARM agents run their resolved binary without a shell."""
+    agent = Agent(name="tool", command="npx tool -v", prewarm=prewarm)
+    mock_popen.return_value.wait.return_value = 0
+
+    assert execute_agent(agent) == 0
+
+    if prewarm:
+        assert mock_popen.call_args.args[0] == ["/agent/bin/tool", "-v"]
+        assert mock_popen.call_args.kwargs["shell"] is False
+    else:
+        mock_resolve.assert_not_called()
+        assert mock_popen.call_args.args[0] == "npx tool -v"
+        assert mock_popen.call_args.kwargs["shell"] is True
+
+
+def test_launch_path_spawns_only_the_agent(
+    monkeypatch: pytest.MonkeyPatch, mock_agent: Agent
+) -> None:
+    """Test launching an agent spawns no process besides the agent itself."""
+
+    def forbidden(*args: object, **kwargs: object) -> None:
+        raise AssertionError("unexpected process spawn")
+
+    monkeypatch.setattr("os.system", forbidden)
+    monkeypatch.setattr("os.fork", forbidden)
+    monkeypatch.setattr("os.posix_spawn", forbidden)
+    monkeypatch.setattr("os.posix_spawnp", forbidden)
+    monkeypatch.setattr("sys.stdout.isatty", lambda: True, raising=False)
+
+    with patch("subprocess.Popen") as mock_popen:
+        mock_popen.return_value.wait.return_value = 0
+        execute_agent(mock_agent)
+
+    mock_popen.assert_called_once()
+    assert mock_popen.call_args.args[0] == mock_agent.command
+
+
+@patch("src.executor.clear_screen")
+@patch("subprocess.Popen")
+def test_execute_agent_logs_launch_and_exit(
+    mock_popen: MagicMock, mock_clear_screen: MagicMock, mock_agent: Agent
+) -> None:
+    """Test a session writes launch and exit records with the exit code."""
+    from src.history import LOG_FILENAME, iter_records
+
+    mock_popen.return_value.wait.return_value = 3
+
+    execute_agent(mock_agent)
+
+    launch, exit_ = iter_records([mock_agent.full_path / LOG_FILENAME])
+    assert launch["event"] == "launch"
+    assert launch["agent"] == "test_agent"
+    assert launch["command"] == "echo 'hello'"
+    assert launch["env"] == ["MY_VAR"]
+    assert exit_["event"] == "exit"
+    assert exit_["id"] == launch["id"]
+    assert exit_["exit_code"] == 3
+    assert exit_["duration"] >= 0
+    assert launch["timings"]["spawn"] >= 0
+    assert launch["timings"]["overhead"] >= launch["timings"]["spawn"]
+
+
+@patch("src.executor.clear_screen")
+@patch("src.executor.log_exit")
+@patch("src.executor.log_execution")
+@patch("subprocess.Popen")
+def test_execute_agent_interrupted_while_running(
+    mock_popen: MagicMock,
+    mock_log_execution: MagicMock,
+    mock_log_exit: MagicMock,
+    mock_clear_screen: MagicMock,
+    mock_agent: Agent,
+) -> None:
+    """Test Ctrl+C while the agent runs kills it and logs exit code 130."""
+    process = mock_popen.return_value
+    process.wait.side_effect = KeyboardInterrupt
+    mock_log_execution.return_value = "launch-id"
+
+    assert execute_agent(mock_agent) == 130
+
+    process.kill.assert_called_once()
+    assert mock_log_exit.call_args.args[1:3] == ("launch-id", 130)
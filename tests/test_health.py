@@ -0,0 +1,115 @@
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.config import Agent
+from src.health import (
+    command_program,
+    health_cache_path,
+    resolve_program,
+    unavailable_agents,
+)
+
+
+@pytest.fixture
+def bin_dir(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    make_executable: Callable[[Path], Path],
+) -> Path:
+    """Make PATH a single directory holding the program "claude"."""
+    directory = tmp_path / "bin"
+    make_executable(directory / "claude")
+    monkeypatch.setenv("PATH", str(directory))
+    return directory
+
+
+@pytest.mark.parametrize(
+    ("command", "program"),
+    [
+        ("claude --model x", "claude"),
+        ("npx @scope/tool", "npx"),
+        ("./run.sh", "./run.sh"),
+        ("FOO=1 claude", None),  # Only a shell knows
+        ("claude | tee log", None),
+    ],
+)
+def test_command_program(command: str, program: str | None) -> None:
+    """Test the program is the first word of commands without shell syntax."""
+    assert command_program(command) == program
+
+
+def test_resolve_program(
+    bin_dir: Path, tmp_path: Path, make_executable: Callable[[Path], Path]
+) -> None:
+    """Test the agent's bin directories are searched before PATH."""
+    agent_dir = tmp_path / "agent"
+    path = str(bin_dir)
+    assert resolve_program("claude", agent_dir, path) == bin_dir / "claude"
+    assert resolve_program("aider", agent_dir, path) is None
+
+    local = make_executable(agent_dir / ".venv" / "bin" / "claude")
+    assert resolve_program("claude", agent_dir, path) == local
+    (bin_dir / "not-executable").write_text("")
+    assert resolve_program("not-executable", agent_dir, path) is None
+    assert resolve_program(str(local), tmp_path, "") == local
+
+
+def test_unavailable_agents(bin_dir: Path, make_agent: Callable[..., Agent]) -> None:
+    """Test agents whose program is missing are reported, and cached."""
+    agents = [
+        make_agent("claude", "claude --flag"),
+        make_agent("aider", "aider"),
+        make_agent("shell", "aider | tee log"),
+    ]
+
+    assert unavailable_agents(agents) == {"aider": "aider"}
+    assert (health_cache_path().stat().st_mode & 0o777) == 0o600
+
+    # Cached: nothing is resolved again
+    with patch("src.health.resolve_program") as mock_resolve:
+        assert unavailable_agents(agents) == {"aider": "aider"}
+    mock_resolve.assert_not_called()
+
+
+def test_unavailable_agents_invalidation(
+    bin_dir: Path,
+    tmp_path: Path,
+    make_agent: Callable[..., Agent],
+    make_executable: Callable[[Path], Path],
+) -> None:
+    """Test installing or removing a program invalidates the cache."""
+    agents = [make_agent("claude", "claude"), make_agent("aider", "aider")]
+    old = time.time() - 60
+    os.utime(bin_dir, (old, old))
+    assert unavailable_agents(agents) == {"aider": "aider"}
+
+    make_executable(bin_dir / "aider")
+    (bin_dir / "claude").unlink()
+    assert unavailable_agents(agents) == {"claude": "claude"}
+
+    # Installed in the agent directory
+    make_executable(tmp_path / "claude" / "node_modules" / ".bin" / "claude")
+    assert unavailable_agents(agents) == {}
+
+
+def test_unavailable_agents_budget(
+    bin_dir: Path, make_agent: Callable[..., Agent]
+) -> None:
+    """Test lookups not finished within the budget count as available."""
+    agents = [make_agent("aider", "aider")]
+
+    def slow_resolve(*args: object) -> None:
+        time.sleep(0.5)
+
+    started = time.monotonic()
+    with patch("src.health.resolve_program", slow_resolve):
+        assert unavailable_agents(agents, budget=0.05) == {}
+    assert time.monotonic() - started < 0.4
+
+    # The unfinished lookup is done again next time
+    assert unavailable_agents(agents) == {"aider": "aider"}
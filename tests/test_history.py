@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+import src.history
+from src.history import (
+    LOG_FILENAME,
+    MAX_RECORD_BYTES,
+    append_record,
+    encode_record,
+    flush_records,
+    history_command,
+    iter_records,
+    iter_sessions,
+    join_sessions,
+    log_files,
+    submit_record,
+)
+
+
+def launch(launch_id: str, ts: str, agent: str = "agent1", cwd: str = "/p") -> dict:
+    """Build a launch record."""
+    return {"event": "launch", "id": launch_id, "ts": ts, "agent": agent, "cwd": cwd}
+
+
+def exit_(launch_id: str, ts: str, exit_code: int = 0) -> dict:
+    """Build an exit record."""
+    return {"event": "exit", "id": launch_id, "ts": ts, "exit_code": exit_code}
+
+
+def write_log(agent_dir: Path, records: list[dict]) -> None:
+    """Write records to the execution log of agent_dir."""
+    agent_dir.mkdir(parents=True, exist_ok=True)
+    lines = [json.dumps(record) for record in records]
+    (agent_dir / LOG_FILENAME).write_text("\n".join(lines) + "\n")
+
+
+def test_append_record_and_iter_records(tmp_path: Path) -> None:
+    """Test records are appended as JSON lines and read back."""
+    log_file = tmp_path / LOG_FILENAME
+    append_record(log_file, launch("a", "2025-01-01T10:00:00"))
+    append_record(log_file, exit_("a", "2025-01-01T10:05:00"))
+
+    assert len(log_file.read_text().splitlines()) == 2
+    assert [r["event"] for r in iter_records([log_file])] == ["launch", "exit"]
+
+
+def test_iter_records_skips_invalid_lines(tmp_path: Path) -> None:
+    """Test old plain-text lines and garbage are skipped."""
+    log_file = tmp_path / LOG_FILENAME
+    log_file.write_text(
+        "[2025-01-06 14:23:15] Agent: claude-code\n"
+        + json.dumps(launch("a", "2025-01-06T14:23:15"))
+        + "\n[1, 2]\n"
+    )
+
+    assert [r["id"] for r in iter_records([log_file, tmp_path / "missing"])] == ["a"]
+
+
+def test_rotate_log_by_size(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test the log rotates when it exceeds the size limit."""
+    monkeypatch.setenv("AI_SELECTOR_LOG_MAX_BYTES", "100")
+    monkeypatch.setenv("AI_SELECTOR_LOG_BACKUPS", "2")
+    log_file = tmp_path / LOG_FILENAME
+
+    for i in range(10):
+        append_record(log_file, launch(str(i), f"2025-01-01T10:00:0{i}"))
+
+    assert log_files(tmp_path) == [
+        tmp_path / f"{LOG_FILENAME}.2",
+        tmp_path / f"{LOG_FILENAME}.1",
+        log_file,
+    ]
+    ids = [r["id"] for r in iter_records(log_files(tmp_path))]
+    assert ids == sorted(ids) and ids[-1] == "9"
+    assert len(ids) < 10  # The oldest records were dropped
+
+
+def test_rotate_log_by_age(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test the log rotates when its first record is too old."""
+    monkeypatch.setenv("AI_SELECTOR_LOG_MAX_AGE_DAYS", "30")
+    log_file = tmp_path / LOG_FILENAME
+    append_record(log_file, launch("old", "2000-01-01T10:00:00"))
+    old_backup = tmp_path / f"{LOG_FILENAME}.1"
+    old_backup.write_text("")
+    os.utime(old_backup, (0, 0))
+
+    append_record(log_file, launch("new", datetime.now().isoformat()))
+
+    assert [r["id"] for r in iter_records([log_file])] == ["new"]
+    assert [r["id"] for r in iter_records([old_backup])] == ["old"]
+    assert not (tmp_path / f"{LOG_FILENAME}.2").exists()
+
+
+def test_encode_record_is_bounded() -> None:
+    """Test oversized records lose their optional fields to fit in one write."""
+    record = {**launch("a", "2025-01-01T10:00:00"), "env": ["KEY"] * 2000}
+
+    line = encode_record(record)
+
+    assert len(line) <= MAX_RECORD_BYTES
+    assert json.loads(line) == {**launch("a", "2025-01-01T10:00:00"), "truncated": True}
+    with pytest.raises(ValueError):
+        encode_record({"ts": "x" * MAX_RECORD_BYTES})
+
+
+def test_concurrent_appends_and_rotations(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test records appended at once are never interleaved nor lost."""
+    monkeypatch.setenv("AI_SELECTOR_LOG_MAX_BYTES", "4000")
+    monkeypatch.setenv("AI_SELECTOR_LOG_BACKUPS", "1000")
+    log_file = tmp_path / LOG_FILENAME
+
+    def append(i: int) -> None:
+        record = {**launch(str(i), "2025-01-01T10:00:00"), "command": "x" * 300}
+        append_record(log_file, record)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(append, range(400)))
+
+    lines = [
+        line for path in log_files(tmp_path) for line in path.read_text().splitlines()
+    ]
+    assert len(log_files(tmp_path)) > 2
+    assert sorted(int(json.loads(line)["id"]) for line in lines) == list(range(400))
+
+
+def test_submit_record_in_background(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test submitted records are written by a thread, in order, until flushed."""
+    log_file = tmp_path / LOG_FILENAME
+    release = threading.Event()
+    append_lines = src.history._append_lines
+
+    def slow_append(path: Path, lines: list[bytes]) -> None:
+        release.wait()
+        append_lines(path, lines)
+
+    monkeypatch.setattr("src.history._append_lines", slow_append)
+    submit_record(log_file, launch("a", "2025-01-01T10:00:00"))
+    submit_record(log_file, launch("b", "2025-01-01T10:00:01"))
+
+    assert not flush_records(0.01)
+    assert not log_file.exists()
+    release.set()
+    assert flush_records()
+    submit_record(log_file, exit_("a", "2025-01-01T10:05:00"), background=False)
+    assert [r["event"] for r in iter_records([log_file])] == ["launch"] * 2 + ["exit"]
+
+
+def test_submit_record_without_background(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test AI_SELECTOR_LOG_ASYNC=0 writes each record before returning."""
+    monkeypatch.setenv("AI_SELECTOR_LOG_ASYNC", "0")
+    log_file = tmp_path / LOG_FILENAME
+
+    submit_record(log_file, launch("a", "2025-01-01T10:00:00"))
+
+    assert [r["id"] for r in iter_records([log_file])] == ["a"]
+
+
+def test_join_sessions() -> None:
+    """Test launches are joined with their exits and kept in launch order."""
+    records = [
+        launch("a", "2025-01-01T10:00:00"),
+        launch("b", "2025-01-01T10:01:00"),
+        exit_("b", "2025-01-01T10:02:00", 1),
+        launch("c", "2025-01-01T10:03:00"),
+        exit_("a", "2025-01-01T10:04:00", 0),
+    ]
+
+    sessions = list(join_sessions(records))
+
+    assert [s["id"] for s in sessions] == ["a", "b", "c"]
+    assert [s["exit_code"] for s in sessions] == [0, 1, None]
+
+
+def test_iter_sessions_merges_and_filters(tmp_path: Path) -> None:
+    """Test sessions of several agents are merged by time and filtered."""
+    write_log(
+        tmp_path / "agent1",
+        [launch("a", "2025-01-01T10:00:00"), launch("c", "2025-01-03T10:00:00")],
+    )
+    write_log(
+        tmp_path / "agent2",
+        [launch("b", "2025-01-02T10:00:00", "agent2", "/p/sub")],
+    )
+    dirs = [tmp_path / "agent1", tmp_path / "agent2"]
+
+    assert [s["id"] for s in iter_sessions(dirs)] == ["a", "b", "c"]
+    assert [s["id"] for s in iter_sessions(dirs, agent="agent2")] == ["b"]
+    assert [s["id"] for s in iter_sessions(dirs, cwd="/p/sub")] == ["b"]
+    since = datetime(2025, 1, 2)
+    until = datetime(2025, 1, 3)
+    assert [s["id"] for s in iter_sessions(dirs, since=since, until=until)] == ["b"]
+
+
+def test_history_command(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    """Test the history subcommand prints sessions from all agents."""
+    for name in ("agent1", "agent2"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / ".env").write_text(f"ALIAS={name}")
+    write_log(
+        tmp_path / "agent1",
+        [launch("a", "2025-01-01T10:00:00"), exit_("a", "2025-01-01T10:00:05", 2)],
+    )
+    write_log(tmp_path / "agent2", [launch("b", "2025-01-02T10:00:00", "agent2")])
+    monkeypatch.setenv("AI_AGENTS_DIR", str(tmp_path))
+
+    assert history_command([]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert "agent1" in lines[0] and "exit 2" in lines[0]
+
+    assert history_command(["--agent", "agent2", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["id"] == "b"
+
+    assert history_command(["-n", "1"]) == 0
+    assert "agent2" in capsys.readouterr().out
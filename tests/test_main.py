@@ -1,9 +1,10 @@
+import importlib
 from typing import Generator
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.main import main
+from src.main import COMMANDS, main
 
 
 @pytest.fixture
@@ -26,7 +27,7 @@ def test_main_no_agents_found(
     mock_discover, _, _ = mock_dependencies
     mock_discover.return_value = []
 
-    result = main()
+    result = main([])
 
     assert result == 1
     mock_discover.assert_called_once()
@@ -42,12 +43,12 @@ def test_main_agent_selected_and_executed(
     mock_select.return_value = mock_agent
     mock_execute.return_value = 0
 
-    result = main()
+    result = main([])
 
     assert result == 0
     mock_discover.assert_called_once()
     mock_select.assert_called_once_with([mock_agent])
-    mock_execute.assert_called_once_with(mock_agent)
+    mock_execute.assert_called_once_with(mock_agent, exec_mode=None, record=None)
 
 
 def test_main_agent_selection_cancelled(
@@ -59,7 +60,7 @@ def test_main_agent_selection_cancelled(
     mock_discover.return_value = [mock_agent]
     mock_select.return_value = None
 
-    result = main()
+    result = main([])
 
     assert result == 0
     mock_discover.assert_called_once()
@@ -73,7 +74,7 @@ def test_main_file_not_found_error(
     mock_discover, _, _ = mock_dependencies
     mock_discover.side_effect = FileNotFoundError("test_error")
 
-    result = main()
+    result = main([])
 
     assert result == 1
 
@@ -85,7 +86,7 @@ def test_main_keyboard_interrupt(
     mock_discover, _, _ = mock_dependencies
     mock_discover.side_effect = KeyboardInterrupt
 
-    result = main()
+    result = main([])
 
     assert result == 130
 
@@ -97,6 +98,86 @@ def test_main_exception(
     mock_discover, mock_select, mock_execute = mock_dependencies
     mock_discover.side_effect = Exception("test_error")
 
-    result = main()
+    result = main([])
 
     assert result == 1
+
+
+@patch("src.main.execute_agent")
+@patch("src.main.load_agent")
+@patch("src.main.list_agent_names")
+def test_main_launch_by_name(
+    mock_list: MagicMock, mock_load: MagicMock, mock_execute: MagicMock
+) -> None:
+    """Test main launches a named agent without discovering the others."""
+    mock_list.return_value = ["claude-code", "crush", "opencode"]
+    mock_agent = MagicMock()
+    mock_load.return_value = mock_agent
+    mock_execute.return_value = 0
+
+    with patch("src.main.discover_agents") as mock_discover:
+        result = main(["cl"])
+
+    assert result == 0
+    mock_discover.assert_not_called()
+    mock_load.assert_called_once_with("claude-code")
+    mock_execute.assert_called_once_with(mock_agent, exec_mode=None, record=None)
+
+
+@pytest.mark.parametrize("query", ["zzz", "c"])
+@patch("src.main.execute_agent")
+@patch("src.main.load_agent")
+@patch("src.main.list_agent_names")
+def test_main_launch_by_name_no_single_match(
+    mock_list: MagicMock,
+    mock_load: MagicMock,
+    mock_execute: MagicMock,
+    query: str,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    """Test main fails when the name matches no agent or several agents."""
+    mock_list.return_value = ["claude-code", "crush"]
+
+    result = main([query])
+
+    assert result == 1
+    mock_load.assert_not_called()
+    mock_execute.assert_not_called()
+    assert query in capsys.readouterr().out
+
+
+def test_main_exec_flag(
+    mock_dependencies: tuple[MagicMock, MagicMock, MagicMock],
+) -> None:
+    """Test --exec is passed on to execute_agent."""
+    mock_discover, mock_select, mock_execute = mock_dependencies
+    mock_agent = MagicMock()
+    mock_discover.return_value = [mock_agent]
+    mock_select.return_value = mock_agent
+
+    main(["--exec"])
+
+    mock_execute.assert_called_once_with(mock_agent, exec_mode=True, record=None)
+
+
+def test_main_dispatches_subcommand(
+    mock_dependencies: tuple[MagicMock, MagicMock, MagicMock],
+) -> None:
+    """Test subcommands run instead of the agent menu."""
+    mock_discover, _, _ = mock_dependencies
+    mock_history = MagicMock(return_value=0)
+
+    with patch("src.history.history_command", mock_history):
+        result = main(["history", "--agent", "crush"])
+
+    assert result == 0
+    mock_history.assert_called_once_with(["--agent", "crush"])
+    mock_discover.assert_not_called()
+
+
+@pytest.mark.parametrize("name", sorted(COMMANDS))
+def test_subcommands_resolve(name: str) -> None:
+    """Test every subcommand names an importable function."""
+    module, _, function = COMMANDS[name].partition(":")
+
+    assert callable(getattr(importlib.import_module(module), function))
@@ -0,0 +1,82 @@
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from src import metrics
+from src.history import LOG_FILENAME
+
+
+def test_stage_timings() -> None:
+    """Test stages accumulate and overhead excludes the selection time."""
+    metrics.reset()
+    with metrics.stage("discovery"):
+        time.sleep(0.01)
+    with metrics.stage("selection"):
+        time.sleep(0.05)
+
+    timings = metrics.snapshot()
+
+    assert timings["discovery"] >= 0.01
+    assert timings["selection"] >= 0.05
+    assert timings["discovery"] <= timings["overhead"] < 0.05
+
+
+def test_percentile() -> None:
+    """Test nearest-rank percentiles."""
+    values = [float(i) for i in range(1, 101)]
+    assert metrics.percentile(values, 50) == 50.0
+    assert metrics.percentile(values, 95) == 95.0
+    assert metrics.percentile([3.0], 95) == 3.0
+    assert metrics.percentile([5.0, 1.0, 4.0, 2.0, 3.0], 50) == 3.0
+    assert metrics.percentile([float(i) for i in range(1, 31)], 95) == 29.0
+
+
+def test_summarize() -> None:
+    """Test sessions are aggregated per agent."""
+    sessions: list[dict[str, Any]] = [
+        {"agent": "a", "duration": 10.0, "timings": {"overhead": 0.1}},
+        {"agent": "a", "duration": 20.0, "timings": {"overhead": 0.3}},
+        {"agent": "b", "duration": None},
+    ]
+
+    summary = metrics.summarize(sessions)
+
+    assert summary["overhead"] == {"samples": 2, "p50": 0.1, "p95": 0.3}
+    assert summary["agents"]["a"] == {
+        "sessions": 2,
+        "total_duration": 30.0,
+        "median_duration": 15.0,
+    }
+    assert summary["agents"]["b"]["median_duration"] is None
+
+
+def test_stats_command(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    """Test the stats subcommand reports overhead and sessions."""
+    agent_dir = tmp_path / "agent1"
+    agent_dir.mkdir()
+    (agent_dir / ".env").write_text("ALIAS=agent1")
+    records = [
+        {
+            "event": "launch",
+            "id": "a",
+            "ts": "2025-01-01T10:00:00",
+            "agent": "agent1",
+            "timings": {"overhead": 0.05},
+        },
+        {"event": "exit", "id": "a", "ts": "2025-01-01T10:01:00", "duration": 60.0},
+    ]
+    (agent_dir / LOG_FILENAME).write_text(
+        "".join(json.dumps(record) + "\n" for record in records)
+    )
+    monkeypatch.setenv("AI_AGENTS_DIR", str(tmp_path))
+
+    assert metrics.stats_command([]) == 0
+
+    out = capsys.readouterr().out
+    assert "Startup overhead (1 launches): p50 50ms, p95 50ms" in out
+    assert "agent1" in out and "60.0s" in out
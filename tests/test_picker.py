@@ -0,0 +1,140 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.config import Agent, reset_settings
+from src.picker import PickerState
+
+
+@pytest.fixture
+def agents() -> list[Agent]:
+    """Fixture for a list of many agents."""
+    return [Agent(name=f"agent{i:03d}", command=f"run {i}") for i in range(100)]
+
+
+def test_picker_state_filters(agents: list[Agent]) -> None:
+    """Test typing narrows the matches and selects the first one."""
+    state = PickerState(agents, height=5)
+    state.move(3)
+
+    state.set_query("agent04")
+
+    assert len(state.matches) == 10
+    assert state.selected_agent is agents[40]
+
+
+def test_picker_state_renders_visible_window_only(agents: list[Agent]) -> None:
+    """Test only `height` entries are rendered and the window scrolls."""
+    state = PickerState(agents, height=5)
+
+    assert [a.name for a, _ in state.visible()] == [f"agent00{i}" for i in range(5)]
+
+    state.move(7)
+    visible = state.visible()
+    assert [a.name for a, _ in visible] == [f"agent00{i}" for i in range(3, 8)]
+    assert visible[-1] == (agents[7], True)
+
+    state.move(-5)
+    assert state.visible()[0] == (agents[2], True)
+
+    text = "".join(fragment[1] for fragment in state.render())
+    assert text.count("agent") == 5
+    assert text.endswith("100/100")
+
+
+def test_picker_state_disabled(agents: list[Agent]) -> None:
+    """Test disabled agents are shown with the reason but cannot be chosen."""
+    state = PickerState(agents, height=3, disabled={"agent001": "run not found"})
+
+    assert state.selected_agent is agents[0]
+    state.move(1)
+    assert state.selected_agent is None
+
+    text = "".join(fragment[1] for fragment in state.render())
+    assert "agent001 (run not found)" in text
+
+
+def test_picker_state_no_matches(agents: list[Agent]) -> None:
+    """Test a query without matches selects nothing."""
+    state = PickerState(agents)
+    state.set_query("nothing")
+    state.move(1)
+
+    assert state.visible() == []
+    assert state.selected_agent is None
+
+
+@patch("src.selector.display_logo")
+@patch("src.picker.pick_agent")
+@patch("questionary.select")
+def test_select_agent_uses_picker_for_large_lists(
+    mock_select: MagicMock,
+    mock_pick_agent: MagicMock,
+    mock_display_logo: MagicMock,
+    agents: list[Agent],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test the search picker replaces the menu beyond the shortcut limit."""
+    from src.selector import select_agent
+
+    mock_pick_agent.return_value = agents[1]
+
+    assert select_agent(agents) is agents[1]
+    mock_select.assert_not_called()
+
+    mock_pick_agent.reset_mock()
+    monkeypatch.setenv("AI_SELECTOR_PICKER", "search")
+    reset_settings()
+    select_agent(agents[:3])
+    mock_pick_agent.assert_called_once()
+
+
+def test_pick_agent_with_keyboard_input() -> None:
+    """Test typing, moving down and pressing Enter in the picker."""
+    from prompt_toolkit.application import create_app_session
+    from prompt_toolkit.input import create_pipe_input
+    from prompt_toolkit.output import DummyOutput
+
+    from src.picker import pick_agent
+
+    agents = [Agent(name=f"agent{i:04d}", command="run") for i in range(5000)]
+
+    with create_pipe_input() as pipe_input:
+        pipe_input.send_text("agent04\x1b[B\r")
+        with create_app_session(input=pipe_input, output=DummyOutput()):
+            selected = pick_agent(agents)
+
+    assert selected is agents[401]
+
+
+def test_picker_state_add_agents_keeps_selection(agents: list[Agent]) -> None:
+    """Test agents added live are matched and the selection stays put."""
+    state = PickerState(agents[:50], height=5)
+    state.set_query("agent04")
+    state.move(2)
+
+    state.add_agents([*agents[50:], Agent(name="agent042", command="new")])
+
+    assert state.selected_agent is state.agents[42]
+    assert state.agents[42].command == "new"
+    assert len(state.agents) == 100
+    state.set_query("agent09")
+    assert [a.name for a, _ in state.visible()][:2] == ["agent090", "agent091"]
+
+
+def test_picker_state_set_agents_keeps_query_and_selection(
+    agents: list[Agent],
+) -> None:
+    """Test replacing the agents keeps the query and the selected agent."""
+    state = PickerState(agents, height=5)
+    state.set_query("agent01")
+    state.move(3)
+    state.scanning = True
+    assert "searching" in "".join(fragment[1] for fragment in state.render())
+
+    state.set_agents(list(reversed(agents)))
+    state.scanning = False
+
+    assert state.selected_agent == agents[13]
+    assert len(state.matches) == 10
+    assert "searching" not in "".join(fragment[1] for fragment in state.render())
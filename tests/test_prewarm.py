@@ -0,0 +1,131 @@
+import json
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from src.config import Agent
+from src.prewarm import resolution_cache_path, resolve_command, resolve_uncached
+
+
+@pytest.fixture
+def npm_agent(tmp_path: Path, make_executable: Callable[[Path], Path]) -> Path:
+    """Create an agent directory with a locally installed npm package."""
+    agent_dir = tmp_path / "claude"
+    package_dir = agent_dir / "node_modules" / "@scope" / "tool"
+    package_dir.mkdir(parents=True)
+    (package_dir / "package.json").write_text(
+        json.dumps({"version": "1.2.3", "bin": {"tool": "cli.js"}})
+    )
+    make_executable(agent_dir / "node_modules" / ".bin" / "tool")
+    (agent_dir / "package-lock.json").write_text("{}")
+    return agent_dir
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "npx @scope/tool --flag",
+        "npx -y @scope/tool --flag",
+        "npx @scope/tool@1.2.3 --flag",
+    ],
+)
+def test_resolve_npx(
+    npm_agent: Path, command: str, make_agent: Callable[..., Agent]
+) -> None:
+    """Test npx commands resolve to the package binary in node_modules/.bin."""
+    binary = str(npm_agent / "node_modules" / ".bin" / "tool")
+    assert resolve_uncached(make_agent("claude", command, prewarm=True)) == [
+        binary,
+        "--flag",
+    ]
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "npx @scope/tool@2.0.0",  # Pinned to another version
+        "npx @scope/other",  # Not installed
+        "npx -p @scope/tool tool",  # Unknown option
+        "npx @scope/tool | tee log",  # Shell syntax
+        "claude --flag",  # Not a wrapper
+    ],
+)
+def test_resolve_npx_unresolvable(
+    npm_agent: Path, command: str, make_agent: Callable[..., Agent]
+) -> None:
+    """Test commands that cannot be resolved safely run as written."""
+    assert resolve_uncached(make_agent("claude", command, prewarm=True)) is None
+
+
+def test_resolve_uvx(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    make_agent: Callable[..., Agent],
+    make_executable: Callable[[Path], Path],
+) -> None:
+    """Test uvx commands resolve to the agent venv or the uv tool install."""
+    monkeypatch.setenv("UV_TOOL_DIR", str(tmp_path / "tools"))
+    agent_dir = tmp_path / "aider"
+    agent_dir.mkdir()
+    tool = make_executable(tmp_path / "tools" / "aider-chat" / "bin" / "aider")
+
+    resolved = resolve_uncached(
+        make_agent("aider", "uvx --from aider-chat aider -v", prewarm=True)
+    )
+    assert resolved == [str(tool), "-v"]
+    assert (
+        resolve_uncached(
+            make_agent("aider", "uvx --from aider-chat==1 aider", prewarm=True)
+        )
+        is None
+    )
+
+    venv_tool = make_executable(agent_dir / ".venv" / "bin" / "aider")
+    resolved = resolve_uncached(
+        make_agent("aider", "uvx --from aider-chat aider", prewarm=True)
+    )
+    assert resolved == [str(venv_tool)]
+
+
+def test_resolve_command_requires_prewarm(
+    npm_agent: Path, make_agent: Callable[..., Agent]
+) -> None:
+    """Test agents without PREWARM=1 are never resolved."""
+    assert (
+        resolve_command(make_agent("claude", "npx @scope/tool", prewarm=False)) is None
+    )
+    assert not resolution_cache_path().exists()
+
+
+def test_resolve_command_cache(
+    npm_agent: Path, make_agent: Callable[..., Agent]
+) -> None:
+    """Test resolutions are cached until a lockfile changes."""
+    prewarmed = make_agent("claude", "npx @scope/tool", prewarm=True)
+    binary = str(npm_agent / "node_modules" / ".bin" / "tool")
+    assert resolve_command(prewarmed) == [binary]
+    assert (resolution_cache_path().stat().st_mode & 0o777) == 0o600
+
+    # Cached: the package manifest is not read again
+    manifest = npm_agent / "node_modules" / "@scope" / "tool" / "package.json"
+    manifest.write_text(json.dumps({"version": "1.2.3", "bin": {"other": "x"}}))
+    assert resolve_command(prewarmed) == [binary]
+
+    # A lockfile change invalidates the resolution
+    lockfile = npm_agent / "package-lock.json"
+    lockfile.write_text('{"lockfileVersion": 3}')
+    os.utime(lockfile, ns=(1, 1))
+    assert resolve_command(prewarmed) is None
+
+
+def test_resolve_command_binary_removed(
+    npm_agent: Path, make_agent: Callable[..., Agent]
+) -> None:
+    """Test a cached binary that no longer exists is resolved again."""
+    prewarmed = make_agent("claude", "npx @scope/tool", prewarm=True)
+    assert resolve_command(prewarmed) is not None
+
+    (npm_agent / "node_modules" / ".bin" / "tool").unlink()
+    assert resolve_command(prewarmed) is None
@@ -0,0 +1,124 @@
+import gzip
+import os
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+from src import recording
+from src.recording import (
+    CastWriter,
+    grep,
+    iter_lines,
+    read_cast,
+    record_session,
+    recordings_command,
+)
+
+
+def write_cast(path: Path, chunks: list[bytes]) -> None:
+    """Record chunks of output to path."""
+    writer = CastWriter(path, 80, 24, title="agent")
+    for chunk in chunks:
+        writer.output(chunk)
+    writer.close()
+
+
+def test_cast_writer_round_trip(tmp_path: Path) -> None:
+    """Test recordings are asciicast v2 and keep multi-byte characters whole."""
+    path = tmp_path / "session.cast.gz"
+    text = "¡hola, señor!\r\n".encode()
+    write_cast(path, [text[:2], text[2:]])  # "¡" split between reads
+
+    header, events = read_cast(path)
+
+    assert header["version"] == 2
+    assert (header["width"], header["height"], header["title"]) == (80, 24, "agent")
+    assert "".join(data for _, data in events) == "¡hola, señor!\r\n"
+    assert (path.stat().st_mode & 0o777) == 0o600
+
+
+def test_cast_writer_bounded_buffer(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test buffered events never exceed BUFFER_SIZE before being compressed."""
+    monkeypatch.setattr(recording, "BUFFER_SIZE", 1024)
+    writer = CastWriter(tmp_path / "session.cast.gz", 80, 24)
+    for _ in range(500):
+        writer.output(b"x" * 100)
+        assert len(writer._buffer) <= 1024
+    writer.close()
+
+    _, events = read_cast(tmp_path / "session.cast.gz")
+    assert sum(len(data) for _, data in events) == 50000
+
+
+def test_read_cast_truncated(tmp_path: Path) -> None:
+    """Test a recording cut short yields the events written until then."""
+    path = tmp_path / "session.cast.gz"
+    write_cast(path, [f"line {i}\n".encode() for i in range(1000)])
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) // 2])
+
+    _, events = read_cast(path)
+
+    assert 0 < len(list(events)) < 1000
+
+
+def test_iter_lines() -> None:
+    """Test output events are joined into lines without escape sequences."""
+    events = [(0.5, "\x1b[1mbo"), (1.0, "ld\x1b[0m\r\nnext"), (2.0, " line\n")]
+    assert list(iter_lines(events)) == [(1.0, "bold"), (2.0, "next line")]
+
+
+def test_grep(tmp_path: Path) -> None:
+    """Test grep reports the recording, time and text of matching lines."""
+    path = tmp_path / "agent.cast.gz"
+    write_cast(path, [b"\x1b[31mError\x1b[0m: failed\r\n", b"all good\r\n"])
+
+    assert list(grep(re.compile("error", re.IGNORECASE), [path])) == [
+        "agent.cast.gz:0:00: Error: failed"
+    ]
+
+
+def test_record_session(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test the program runs under a pty with its output teed to the recording."""
+    terminal = tmp_path / "terminal"
+    path = tmp_path / "session.cast.gz"
+    with open(terminal, "w") as stdout, open(os.devnull) as stdin:
+        monkeypatch.setattr(sys, "stdout", stdout)
+        monkeypatch.setattr(sys, "stdin", stdin)
+        exit_code = record_session(
+            ["sh", "-c", '[ -t 1 ] && echo "tty $GREETING"; exit 3'],
+            {**os.environ, "GREETING": "hi"},
+            path,
+        )
+
+    assert exit_code == 3
+    assert terminal.read_bytes() == b"tty hi\r\n"
+    _, events = read_cast(path)
+    assert "".join(data for _, data in events) == "tty hi\r\n"
+
+
+def test_recordings_command_grep(capsys: pytest.CaptureFixture[str]) -> None:
+    """Test ``recordings grep`` searches every recording by default."""
+    recording.recordings_dir().mkdir(parents=True)
+    write_cast(recording.recordings_dir() / "a-1.cast.gz", [b"found it\n"])
+    (recording.recordings_dir() / "b-1.cast.gz").write_bytes(gzip.compress(b"[]\n"))
+
+    assert recordings_command(["grep", "found"]) == 0
+    assert capsys.readouterr().out == "a-1.cast.gz:0:00: found it\n"
+    assert recordings_command(["grep", "missing", "a-"]) == 1
+
+
+@pytest.mark.parametrize("speed", ["0", "-2", "nan", "fast"])
+def test_recordings_command_rejects_bad_speed(
+    speed: str, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test ``recordings play --speed`` only accepts numbers greater than 0."""
+    with pytest.raises(SystemExit) as exit_info:
+        recordings_command(["play", "a-1", "--speed", speed])
+
+    assert exit_info.value.code == 2
+    assert "--speed" in capsys.readouterr().err
@@ -0,0 +1,137 @@
+import pytest
+
+from src.search import IncrementalSearch, SearchIndex, match_names
+
+NAMES = ["claude-code", "crush", "gemini", "opencode", "open-interpreter"]
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("crush", ["crush"]),
+        ("Gemini", ["gemini"]),
+        ("cl", ["claude-code"]),
+        ("open", ["open-interpreter", "opencode"]),
+        ("interp", ["open-interpreter"]),
+        ("cc", ["claude-code"]),
+        ("gemnii", ["gemini"]),
+        ("xyz", []),
+    ],
+)
+def test_match_names(query: str, expected: list[str]) -> None:
+    """Test match_names returns the best tier of matches."""
+    assert match_names(query, NAMES) == expected
+
+
+def test_match_names_exact_beats_prefix() -> None:
+    """Test an exact name wins over longer names sharing the prefix."""
+    assert match_names("open", ["open", "opencode"]) == ["open"]
+
+
+@pytest.fixture
+def index() -> SearchIndex:
+    """Fixture for a search index over a few agents."""
+    return SearchIndex(
+        ["opencode", "claude-code", "crush", "open-interpreter", "codex"],
+        [
+            "bunx opencode",
+            "npx @anthropic-ai/claude-code",
+            "crush",
+            "interpreter",
+            "codex",
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("", [0, 1, 2, 3, 4]),
+        ("co", [4, 0, 1]),
+        ("code", [4, 0, 1]),
+        ("claude-", [1]),
+        ("ANTHROPIC", [1]),
+        ("open", [0, 3]),
+        ("zzz", []),
+    ],
+)
+def test_search_index(index: SearchIndex, query: str, expected: list[int]) -> None:
+    """Test search matches names and commands, name prefixes first."""
+    assert index.search(query) == expected
+
+
+def test_search_index_prefix_matches(index: SearchIndex) -> None:
+    """Test prefix lookups on the sorted names."""
+    assert index.prefix_matches("c") == [1, 4, 2]
+    assert index.prefix_matches("open-") == [3]
+    assert index.prefix_matches("x") == []
+
+
+def test_incremental_search_reuses_matches(
+    index: SearchIndex, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test a growing query only filters the previous matches."""
+    search = IncrementalSearch(index)
+    assert search.update("co") == [4, 0, 1]
+
+    calls: list[object] = []
+    original = index.search
+
+    def tracking_search(query: str, within: object = None) -> list[int]:
+        calls.append(within)
+        return original(query, within)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(index, "search", tracking_search)
+
+    assert search.update("cod") == [4, 0, 1]
+    assert calls == [[4, 0, 1]]
+
+    # A different query starts over from the whole index
+    assert search.update("cr") == [2]
+    assert calls[-1] is None
+
+
+def test_search_index_large() -> None:
+    """Test trigram lookups on thousands of entries."""
+    names = [f"agent-{i:05d}" for i in range(5000)]
+    index = SearchIndex(names, ["run"] * len(names))
+
+    assert index.search("04999") == [4999]
+    assert len(index.search("agent-001")) == 100
+
+
+def test_search_index_add_matches_building_at_once() -> None:
+    """Test entries added later are found as if indexed from the start."""
+    commands = [f"run {name}" for name in NAMES]
+    index = SearchIndex(NAMES[:2], commands[:2])
+    index.add(NAMES[2:], commands[2:])
+    full = SearchIndex(NAMES, commands)
+
+    for query in ("", "o", "op", "open", "code", "run g"):
+        assert index.search(query) == full.search(query)
+    assert index.prefix_matches("c") == full.prefix_matches("c")
+
+
+def test_search_index_add_one_by_one_and_in_bulk() -> None:
+    """Test small batches (inserted) and large ones (merged) keep name order."""
+    names = [f"agent-{(i * 7919) % 500:03d}" for i in range(500)]
+    commands = ["run"] * len(names)
+    index = SearchIndex([], [])
+    for name in names[:100]:
+        index.add([name], ["run"])
+    index.add(names[100:], commands[100:])
+    full = SearchIndex(names, commands)
+
+    assert index.prefix_matches("agent-1") == full.prefix_matches("agent-1")
+    assert index.prefix_matches("") == full.prefix_matches("")
+
+
+def test_incremental_search_refresh() -> None:
+    """Test refresh finds the matching entries added after the query."""
+    index = SearchIndex(NAMES[:2], ["", ""])
+    search = IncrementalSearch(index)
+    search.update("ope")
+
+    index.add(NAMES[2:], ["", "", ""])
+
+    assert search.refresh() == [3, 4]
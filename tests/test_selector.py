@@ -2,7 +2,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.config import Agent
+from src.config import Agent, reset_settings
 from src.selector import select_agent
 
 
@@ -30,17 +30,42 @@ def test_select_agent_selected(
     mock_select.assert_called_once()
 
 
-@patch("builtins.open")
+@pytest.fixture
+def terminal(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Pretend the selector runs in a terminal that has not shown the logo."""
+    monkeypatch.setattr("src.selector.is_tty", lambda stream=None: True)
+    monkeypatch.setattr("src.selector._logo_shown", False)
+
+
+@pytest.mark.usefixtures("terminal")
+@patch("src.selector.load_logo", return_value="test_logo")
 def test_display_logo_success(
-    mock_open: MagicMock, capsys: pytest.CaptureFixture
+    mock_load_logo: MagicMock, capsys: pytest.CaptureFixture
 ) -> None:
-    """Test that display_logo successfully displays the logo."""
+    """Test that display_logo displays the logo only once."""
     from src.selector import display_logo
 
-    mock_open.return_value.__enter__.return_value.read.return_value = "test_logo"
+    display_logo()
     display_logo()
     captured = capsys.readouterr()
-    assert "test_logo" in captured.out
+    assert captured.out.count("test_logo") == 1
+
+
+def test_display_logo_not_a_terminal(capsys: pytest.CaptureFixture) -> None:
+    """Test that nothing is displayed when not running in a terminal."""
+    from src.selector import display_logo
+
+    display_logo()
+    assert capsys.readouterr().out == ""
+
+
+def test_load_logo() -> None:
+    """Test the logo is read from the package resources once."""
+    from src.selector import load_logo
+
+    logo = load_logo()
+    assert logo is not None and "\033[" in logo
+    assert load_logo() is logo
 
 
 @patch("src.selector.display_logo")
@@ -67,16 +92,18 @@ def test_select_agent_no_agents(mock_display_logo: MagicMock) -> None:
     mock_display_logo.assert_not_called()
 
 
-@patch("builtins.open", side_effect=FileNotFoundError)
-def test_display_logo_file_not_found(mock_open: MagicMock) -> None:
-    """Test that display_logo handles FileNotFoundError."""
+@pytest.mark.usefixtures("terminal")
+@patch("src.selector.load_logo", return_value=None)
+def test_display_logo_file_not_found(mock_load_logo: MagicMock) -> None:
+    """Test that display_logo handles a missing logo."""
     from src.selector import display_logo
 
     # This should not raise an exception
     display_logo()
 
 
-@patch("src.selector.shutil.get_terminal_size")
+@pytest.mark.usefixtures("terminal")
+@patch("src.terminal.shutil.get_terminal_size")
 def test_display_logo_narrow_terminal(
     mock_get_terminal_size: MagicMock, capsys: pytest.CaptureFixture
 ) -> None:
@@ -93,10 +120,11 @@ def test_display_logo_narrow_terminal(
     assert captured.out.count("\n") >= 2  # Text plus blank line
 
 
-@patch("src.selector.shutil.get_terminal_size")
-@patch("builtins.open")
+@pytest.mark.usefixtures("terminal")
+@patch("src.terminal.shutil.get_terminal_size")
+@patch("src.selector.load_logo", return_value="test_logo")
 def test_display_logo_wide_terminal_logo_exists(
-    mock_open: MagicMock,
+    mock_load_logo: MagicMock,
     mock_get_terminal_size: MagicMock,
     capsys: pytest.CaptureFixture,
 ) -> None:
@@ -105,7 +133,6 @@ def test_display_logo_wide_terminal_logo_exists(
 
     # Simulate wide terminal
     mock_get_terminal_size.return_value.columns = 80
-    mock_open.return_value.__enter__.return_value.read.return_value = "test_logo"
 
     display_logo()
     captured = capsys.readouterr()
@@ -114,10 +141,11 @@ def test_display_logo_wide_terminal_logo_exists(
     assert "AI-SELECTOR" not in captured.out
 
 
-@patch("src.selector.shutil.get_terminal_size")
-@patch("builtins.open")
+@pytest.mark.usefixtures("terminal")
+@patch("src.terminal.shutil.get_terminal_size")
+@patch("src.selector.load_logo", return_value="test_logo")
 def test_display_logo_terminal_size_error(
-    mock_open: MagicMock,
+    mock_load_logo: MagicMock,
     mock_get_terminal_size: MagicMock,
     capsys: pytest.CaptureFixture,
 ) -> None:
@@ -126,7 +154,6 @@ def test_display_logo_terminal_size_error(
 
     # Simulate terminal size error (fallback to 80)
     mock_get_terminal_size.side_effect = OSError("Cannot get terminal size")
-    mock_open.return_value.__enter__.return_value.read.return_value = "test_logo"
 
     display_logo()
     captured = capsys.readouterr()
@@ -145,3 +172,40 @@ def test_select_agent_keyboard_interrupt(
 
     assert selected_agent is None
     mock_display_logo.assert_called_once()
+
+
+def test_sort_agents_by_frecency(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test frecent agents come first and the rest stay alphabetical."""
+    from src.selector import sort_agents
+
+    agents = [Agent(name=name, command=name) for name in ("c", "a", "d", "b")]
+    monkeypatch.setattr("src.selector.frecency_scores", lambda: {"d": 2.0, "b": 5.0})
+
+    assert [a.name for a in sort_agents(agents)] == ["b", "d", "a", "c"]
+
+    monkeypatch.setenv("AI_SELECTOR_SORT", "alpha")
+    reset_settings()
+    assert [a.name for a in sort_agents(agents)] == ["a", "b", "c", "d"]
+
+
+@patch("src.selector.display_logo")
+@patch("src.selector.unavailable_agents", return_value={"agent2": "command2"})
+@patch("questionary.select")
+def test_select_agent_disables_broken_agents(
+    mock_select: MagicMock,
+    mock_unavailable: MagicMock,
+    mock_display_logo: MagicMock,
+    mock_agents: list[Agent],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test agents whose command is missing are disabled with AI_SELECTOR_HEALTH."""
+    select_agent(mock_agents)
+    choices = mock_select.call_args.kwargs["choices"]
+    assert [c["disabled"] for c in choices] == [None, None]
+    mock_unavailable.assert_not_called()
+
+    monkeypatch.setenv("AI_SELECTOR_HEALTH", "1")
+    reset_settings()
+    select_agent(mock_agents)
+    choices = mock_select.call_args.kwargs["choices"]
+    assert [c["disabled"] for c in choices] == [None, "command2 not found"]
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Cumulative import time budget for src.main, in microseconds. Wall-clock
+# times depend on the machine load, so the budget is only checked when set
+# (about 130000 on an idle machine: twice what src.main took once questionary
+# was imported lazily).
+IMPORT_BUDGET_US = int(os.getenv("AI_SELECTOR_IMPORT_BUDGET_US", "0"))
+
+UI_MODULES = ("questionary", "prompt_toolkit")
+
+# Modules only needed by subcommands or optional features, which a plain
+# launch must not load
+DEFERRED_MODULES = (
+    "asyncio",
+    "concurrent.futures",
+    "logging",
+    "sqlite3",
+    "statistics",
+    "src.batch",
+)
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Import module in a fresh interpreter and return cumulative times (us)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["src.main", "src.selector"])
+def test_startup_does_not_import_ui(module: str) -> None:
+    """Test the UI stack is not loaded until the menu is shown."""
+    times = import_times(module)
+
+    assert module in times
+    loaded = [name for name in times if name.split(".")[0] in UI_MODULES]
+    assert loaded == []
+
+
+def test_startup_defers_optional_modules() -> None:
+    """Test importing the entry point loads none of the deferred modules."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, src.main; print(' '.join(sorted(sys.modules)))",
+        ],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    loaded = set(result.stdout.split())
+    assert "src.main" in loaded
+    assert [name for name in DEFERRED_MODULES if name in loaded] == []
+
+
+@pytest.mark.skipif(
+    not IMPORT_BUDGET_US, reason="set AI_SELECTOR_IMPORT_BUDGET_US to check"
+)
+def test_startup_import_budget() -> None:
+    """Test importing the entry point stays within the startup budget."""
+    best = min(import_times("src.main")["src.main"] for _ in range(5))
+
+    assert best < IMPORT_BUDGET_US, f"src.main took {best}us to import"
@@ -0,0 +1,229 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable, Generator
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from src import config
+from src.config import Agent, ScanCancelledError
+from src.main import select_live
+from src.stream import DiscoveryStream, DiscoveryUpdate
+
+KNOWN = [Agent(name="cached", command="old")]
+FOUND = [Agent(name=f"agent{i}", command="run") for i in range(3)]
+
+
+class SlowScan:
+    """Fake scan_agents() that reports each agent when told to."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        """Block before each agent until step() is called."""
+        self.steps = threading.Semaphore(0)
+        self.error = error
+
+    def step(self, count: int = 1) -> None:
+        """Let the scan report count more agents (or end)."""
+        for _ in range(count):
+            self.steps.release()
+
+    def __call__(
+        self,
+        workers: int | None,
+        on_agent: Callable[[Agent], object],
+        stop: threading.Event,
+    ) -> tuple[list[Agent], list[str]]:
+        """Report the agents one by one, then end."""
+        for agent in FOUND:
+            self.steps.acquire()
+            on_agent(agent)
+        self.steps.acquire()
+        if self.error is not None:
+            raise self.error
+        return FOUND, ["Warning: broken/.env has no ALIAS variable, skipping"]
+
+
+@pytest.fixture
+def scan() -> Generator[SlowScan, None, None]:
+    """Patch discovery with a SlowScan and the KNOWN indexed agents."""
+    fake = SlowScan()
+    with (
+        patch("src.stream.scan_agents", fake),
+        patch("src.stream.indexed_agents", lambda: KNOWN),
+    ):
+        yield fake
+
+
+async def collect(stream: DiscoveryStream, scan: SlowScan) -> list[DiscoveryUpdate]:
+    """Read the updates, letting the scan go on one agent per update read."""
+    updates = []
+    async for update in stream.updates():
+        updates.append(update)
+        scan.step()
+    return updates
+
+
+def test_stream_updates_in_order(scan: SlowScan) -> None:
+    """Test the known agents come first, then the found ones, then the result."""
+    stream = DiscoveryStream()
+    assert not stream.wait(0.01)
+
+    updates = asyncio.run(collect(stream, scan))
+
+    assert [u.kind for u in updates] == ["known", "found", "found", "found", "done"]
+    assert updates[0].agents == KNOWN
+    assert [a for u in updates[1:4] for a in u.agents] == FOUND
+    assert updates[-1].agents == FOUND
+    assert updates[-1].warnings == stream.result()[1]
+    assert stream.found("agent0") is FOUND[0]
+    assert stream.found("cached") is None
+
+
+def test_stream_batches_found_agents(scan: SlowScan) -> None:
+    """Test agents found while the consumer was busy come as one update."""
+    stream = DiscoveryStream()
+    scan.step(len(FOUND) + 1)
+    assert stream.wait(1)
+
+    updates = asyncio.run(collect(stream, scan))
+
+    assert [u.kind for u in updates] == ["known", "found", "done"]
+    assert updates[1].agents == FOUND
+
+
+def test_stream_result_without_updates(scan: SlowScan) -> None:
+    """Test the result can be waited for without reading the updates."""
+    stream = DiscoveryStream()
+    scan.step(len(FOUND) + 1)
+
+    assert stream.result()[0] == FOUND
+    assert stream.wait(0)
+
+
+def test_stream_scan_error(scan: SlowScan) -> None:
+    """Test an exception of the scan is raised to the consumer."""
+    scan.error = FileNotFoundError("Agents directory not found")
+    stream = DiscoveryStream()
+    scan.step(len(FOUND) + 1)
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(collect(stream, scan))
+    with pytest.raises(FileNotFoundError):
+        stream.result()
+
+
+def test_stream_goes_on_without_consumer(scan: SlowScan) -> None:
+    """Test the scan ends even if the consumer stopped listening."""
+
+    async def first(stream: DiscoveryStream) -> DiscoveryUpdate:
+        async for update in stream.updates():
+            return update
+        raise AssertionError("no update")
+
+    stream = DiscoveryStream()
+    assert asyncio.run(first(stream)).kind == "known"
+
+    scan.step(len(FOUND) + 1)
+    assert stream.wait(1)
+    assert stream.result()[0] == FOUND
+
+
+def test_select_live_reloads_unconfirmed_agent(
+    scan: SlowScan, capsys: pytest.CaptureFixture
+) -> None:
+    """Test an agent picked from the index before the scan found it is reloaded."""
+    stream = DiscoveryStream()
+    fresh = Agent(name="cached", command="new")
+
+    with (
+        patch("src.main.select_agent_live", return_value=KNOWN[0]),
+        patch("src.main.load_agent", return_value=fresh) as load,
+    ):
+        assert select_live(stream) is fresh
+    load.assert_called_once_with("cached")
+
+    with (
+        patch("src.main.select_agent_live", return_value=KNOWN[0]),
+        patch("src.main.load_agent", return_value=None),
+    ):
+        assert select_live(stream) is None
+    assert "no longer available" in capsys.readouterr().out
+
+    scan.step(len(FOUND) + 1)
+    stream.wait(1)
+    with patch("src.main.select_agent_live", return_value=FOUND[0]):
+        assert select_live(stream) is FOUND[0]
+    assert "broken/.env" in capsys.readouterr().out
+
+
+def test_stream_follows_root_precedence(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test an agent shadowed by an earlier root is never reported nor launched."""
+    for root, alias in (("r1", "first"), ("r2", "second")):
+        (tmp_path / root / "dup").mkdir(parents=True)
+        (tmp_path / root / "dup" / ".env").write_text(f"ALIAS={alias}\n")
+    (tmp_path / "r2" / "other").mkdir()
+    (tmp_path / "r2" / "other" / ".env").write_text("ALIAS=other\n")
+    monkeypatch.setenv("AI_AGENTS_DIR", f"{tmp_path / 'r1'}:{tmp_path / 'r2'}")
+
+    async def found_agents(stream: DiscoveryStream) -> list[Agent]:
+        return [
+            agent
+            async for update in stream.updates()
+            if update.kind == "found"
+            for agent in update.agents
+        ]
+
+    stream = DiscoveryStream()
+    found = asyncio.run(found_agents(stream))
+
+    assert sorted((a.name, a.command) for a in found) == [
+        ("dup", "first"),
+        ("other", "other"),
+    ]
+    dup = stream.found("dup")
+    assert dup is not None and dup.command == "first"
+
+    # A stale pick of the shadowed agent resolves to the one that wins
+    shadowed = Agent(name="dup", command="second", directory=tmp_path / "r2")
+    with patch("src.main.select_agent_live", return_value=shadowed):
+        assert select_live(stream) is dup
+
+
+def test_stream_stop_cancels_scan(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test stop() ends a slow scan without reading the remaining directories."""
+    for i in range(64):
+        (tmp_path / f"agent{i:02}").mkdir()
+        (tmp_path / f"agent{i:02}" / ".env").write_text("ALIAS=run\n")
+    monkeypatch.setenv("AI_AGENTS_DIR", str(tmp_path))
+    scanned: list[str] = []
+
+    scan_agent_dir = config._scan_agent_dir
+
+    def slow_scan(*args: Any) -> Any:
+        scanned.append(args[1])
+        time.sleep(0.05)
+        return scan_agent_dir(*args)
+
+    monkeypatch.setattr("src.config._scan_agent_dir", slow_scan)
+
+    stream = DiscoveryStream(workers=4)
+    assert not stream.wait(0.02)
+    stream.stop()
+
+    assert stream.wait(1)
+    assert stream.cancelled
+    assert len(scanned) < 64
+    with pytest.raises(ScanCancelledError):
+        stream.result()
+    # The scanning threads end at once, without reading another directory
+    for thread in threading.enumerate():
+        if thread.name.startswith("ThreadPoolExecutor"):
+            thread.join(0.5)
+            assert not thread.is_alive()
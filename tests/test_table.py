@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+from src.config import Agent, LazyEnvVars
+from src.table import AgentTable
+
+
+@pytest.fixture
+def agents(tmp_path: Path) -> list[Agent]:
+    """Build discovered-like agents in unsorted order."""
+    result = []
+    for name, prewarm in (("crush", False), ("aider", True), ("codex", False)):
+        directory = tmp_path / name
+        directory.mkdir()
+        (directory / ".env").write_text(f"ALIAS={name}\nKEY={name}-key\n")
+        result.append(
+            Agent(
+                name=name,
+                command=name,
+                env_vars=LazyEnvVars(directory / ".env"),
+                env_file=directory / ".env",
+                directory=directory,
+                prewarm=prewarm,
+            )
+        )
+    return result
+
+
+def test_agent_is_frozen_and_hashable(agents: list[Agent]) -> None:
+    """Test agents are immutable, hashable and intern their names."""
+    agent = agents[0]
+    with pytest.raises(AttributeError):
+        agent.name = "other"  # type: ignore[misc]
+    assert not hasattr(agent, "__dict__")
+    assert len({agent, Agent.from_record(agent.to_record())}) == 1
+    assert Agent(name="".join(["cr", "ush"]), command="x").name is agent.name
+
+
+def test_agent_table_sorted_iteration(agents: list[Agent]) -> None:
+    """Test the table iterates in name order and round-trips every field."""
+    table = AgentTable(agents)
+
+    assert table.names == ("aider", "codex", "crush")
+    assert list(table) == sorted(agents, key=lambda a: a.name)
+    assert table[-1].name == "crush"
+    assert [agent.name for agent in table[:2]] == ["aider", "codex"]
+    assert table[0].env_vars == {"KEY": "aider-key"}
+    assert table[0].prewarm is True
+    with pytest.raises(IndexError):
+        table[3]
+
+
+def test_agent_table_lookup(agents: list[Agent]) -> None:
+    """Test name lookup and membership."""
+    table = AgentTable(agents)
+
+    assert table.get("codex") == agents[2]
+    assert table.get("cod") is None
+    assert "crush" in table
+    assert agents[0] in table
+    assert Agent(name="crush", command="other") not in table
+    assert table.index_of("zzz") == -1
+
+
+def test_agent_table_custom_paths(tmp_path: Path) -> None:
+    """Test agents without a directory or with another env file are kept as is."""
+    loose = Agent(name="loose", command="run", env_file=tmp_path / "custom.env")
+    table = AgentTable([loose, Agent(name="loose", command="duplicate")])
+
+    assert len(table) == 1
+    (agent,) = table
+    assert agent.directory is None
+    assert agent.env_file == tmp_path / "custom.env"
+    assert agent.command == "run"
@@ -0,0 +1,59 @@
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.terminal import CLEAR_SEQUENCE, clear_screen, is_tty, terminal_columns
+
+
+class FakeTerminal(io.StringIO):
+    """StringIO that claims to be a terminal."""
+
+    def isatty(self) -> bool:
+        """Report a terminal."""
+        return True
+
+
+def test_clear_screen_writes_escape_sequence(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test clear_screen writes the ANSI sequence without spawning processes."""
+    monkeypatch.setenv("TERM", "xterm-256color")
+    stream = FakeTerminal()
+
+    with patch("os.system") as mock_system:
+        clear_screen(stream)
+
+    assert stream.getvalue() == CLEAR_SEQUENCE
+    mock_system.assert_not_called()
+
+
+def test_clear_screen_not_a_tty() -> None:
+    """Test clear_screen writes nothing when output is not a terminal."""
+    stream = io.StringIO()
+    clear_screen(stream)
+    assert stream.getvalue() == ""
+
+
+@pytest.mark.parametrize(
+    ("variable", "value"), [("AI_SELECTOR_CLEAR", "0"), ("TERM", "dumb")]
+)
+def test_clear_screen_opt_out(
+    monkeypatch: pytest.MonkeyPatch, variable: str, value: str
+) -> None:
+    """Test clear_screen honours AI_SELECTOR_CLEAR=0 and TERM=dumb."""
+    monkeypatch.setenv(variable, value)
+    stream = FakeTerminal()
+    clear_screen(stream)
+    assert stream.getvalue() == ""
+
+
+def test_is_tty_closed_stream() -> None:
+    """Test is_tty handles closed streams."""
+    stream = io.StringIO()
+    stream.close()
+    assert not is_tty(stream)
+
+
+@patch("src.terminal.shutil.get_terminal_size", side_effect=OSError)
+def test_terminal_columns_fallback(mock_get_terminal_size: MagicMock) -> None:
+    """Test terminal_columns falls back to the default width."""
+    assert terminal_columns() == 80
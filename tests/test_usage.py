@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from src.usage import HALF_LIFE, frecency_scores, record_launch, usage_db_path
+
+
+def test_usage_db_path_uses_xdg_data_home(tmp_path: Path) -> None:
+    """Test the database lives under XDG_DATA_HOME."""
+    assert usage_db_path() == tmp_path / "xdg-data" / "ai-selector" / "usage.sqlite3"
+
+
+def test_frecency_scores_without_database() -> None:
+    """Test agents have no score before any launch."""
+    assert frecency_scores() == {}
+
+
+def test_record_launch_accumulates_and_decays() -> None:
+    """Test scores grow with launches and halve every half-life."""
+    record_launch("agent1", now=0.0)
+    record_launch("agent1", now=0.0)
+    record_launch("agent2", now=0.0)
+
+    assert frecency_scores(now=0.0) == {"agent1": 2.0, "agent2": 1.0}
+    assert frecency_scores(now=HALF_LIFE) == {"agent1": 1.0, "agent2": 0.5}
+
+    # A launch after one half-life adds to the decayed score
+    record_launch("agent2", now=HALF_LIFE)
+    assert frecency_scores(now=HALF_LIFE)["agent2"] == 1.5
+
+
+def test_recency_beats_old_frequency() -> None:
+    """Test a recent launch outranks many old ones."""
+    for _ in range(5):
+        record_launch("old", now=0.0)
+    record_launch("recent", now=4 * HALF_LIFE)
+
+    scores = frecency_scores(now=4 * HALF_LIFE)
+    assert scores["recent"] > scores["old"]
+
+
+def test_record_launch_ignores_errors(tmp_path: Path) -> None:
+    """Test an unusable database never raises."""
+    usage_db_path().parent.mkdir(parents=True)
+    usage_db_path().write_text("not a database")
+
+    record_launch("agent1")
+    assert frecency_scores() == {}